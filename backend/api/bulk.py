@@ -0,0 +1,213 @@
+from datetime import datetime
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from config import Config
+from models import db
+
+
+# --- Field validators: return the value to store or raise ValueError ---
+
+def text(max_length: int | None = None, upper: bool = False):
+    def validate(value):
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            raise ValueError("must be a string")
+        if max_length and len(value) > max_length:
+            raise ValueError(f"must be at most {max_length} characters")
+        return value.upper() if upper else value
+    return validate
+
+
+def choice(*options):
+    def validate(value):
+        if value is not None and value not in options:
+            raise ValueError(f"must be one of {', '.join(options)}")
+        return value
+    return validate
+
+
+def number(value):
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise ValueError("must be a number")
+    return value
+
+
+def boolean(value):
+    if not isinstance(value, bool):
+        raise ValueError("must be true or false")
+    return value
+
+
+def timestamp(value):
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("must be an ISO 8601 timestamp")
+
+
+def validate_item(item, fields: dict, required: tuple = (), partial: bool = False) -> dict:
+    """Check one item against {field: validator}; raises ValueError naming the field.
+
+    required fields must be present and non-empty, or with partial (updates)
+    non-empty if present.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("must be an object")
+    unknown = [k for k in item if k not in fields]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    missing = [f for f in required if item.get(f) in (None, "") and (f in item or not partial)]
+    if missing:
+        raise ValueError(f"{', '.join(missing)} required")
+    values = {}
+    for name, value in item.items():
+        try:
+            values[name] = fields[name](value)
+        except ValueError as e:
+            raise ValueError(f"{name} {e}")
+    return values
+
+
+def _chunks(items: list, size: int | None = None):
+    size = size or Config.BULK_CHUNK_SIZE
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _summary(results: list[dict], ok: str) -> dict:
+    succeeded = sum(r["status"] == ok for r in results)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+def _existing_ids(model, ids: list[int]) -> set[int]:
+    found = set()
+    for chunk in _chunks(ids):
+        found.update(db.session.execute(select(model.id).where(model.id.in_(chunk))).scalars())
+    return found
+
+
+def _commit(write):
+    try:
+        write()
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+
+
+def bulk_create(model, items: list, fields: dict, required: tuple, defaults: dict,
+                atomic: bool = False) -> tuple[dict, bool]:
+    """Validate and insert items; returns (per-item results, whether anything was written).
+
+    Missing fields are filled from defaults (values or callables, else
+    None; defaults may also cover columns clients can't set) so every row
+    has the same columns, then inserted BULK_CHUNK_SIZE
+    at a time as multi-row INSERT ... RETURNING id. With atomic, any
+    invalid item means nothing is written.
+    """
+    results, rows = [], []
+    for index, item in enumerate(items):
+        try:
+            values = validate_item(item, fields, required)
+        except ValueError as e:
+            results.append({"index": index, "status": "error", "error": str(e)})
+            continue
+        row = {}
+        for name in dict.fromkeys([*fields, *defaults]):
+            default = defaults.get(name)
+            row[name] = values[name] if values.get(name) is not None else \
+                (default() if callable(default) else default)
+        rows.append((index, row))
+        results.append(None)
+    if not rows or (atomic and len(rows) < len(items)):
+        return _summary([r or {"index": i, "status": "skipped"} for i, r in enumerate(results)], "created"), False
+
+    def write():
+        for chunk in _chunks(rows):
+            ids = db.session.execute(
+                insert(model).returning(model.id, sort_by_parameter_order=True),
+                [row for _, row in chunk]).scalars().all()
+            for (index, _), row_id in zip(chunk, ids):
+                results[index] = {"index": index, "status": "created", "id": row_id}
+
+    _commit(write)
+    return _summary(results, "created"), True
+
+
+def bulk_update(model, items: list, fields: dict, required: tuple = (),
+                atomic: bool = False) -> tuple[dict, bool]:
+    """Validate and apply {"id": ..., field: value} changes; returns (results, written).
+
+    Items making the same change (e.g. archiving many ideas) become one
+    UPDATE ... WHERE id IN (...) per chunk; the remaining one-off changes
+    go through a single executemany UPDATE by primary key. Unknown ids are
+    reported as not_found.
+    """
+    results, changes = [], []
+    for index, item in enumerate(items):
+        try:
+            row_id = item.get("id") if isinstance(item, dict) else None
+            if not isinstance(row_id, int) or isinstance(row_id, bool):
+                raise ValueError("id required")
+            values = validate_item({k: v for k, v in item.items() if k != "id"}, fields, required, partial=True)
+            if not values:
+                raise ValueError("no fields to update")
+        except ValueError as e:
+            results.append({"index": index, "status": "error", "error": str(e)})
+            continue
+        changes.append((index, row_id, values))
+        results.append(None)
+
+    found = _existing_ids(model, [row_id for _, row_id, _ in changes])
+    for index, row_id, _ in changes:
+        if row_id not in found:
+            results[index] = {"index": index, "id": row_id, "status": "not_found"}
+    changes = [c for c in changes if c[1] in found]
+    if not changes or (atomic and len(changes) < len(items)):
+        return _summary([r or {"index": i, "status": "skipped"} for i, r in enumerate(results)], "updated"), False
+
+    groups: dict[tuple, list[int]] = {}
+    for _, row_id, values in changes:
+        groups.setdefault(tuple(sorted(values.items())), []).append(row_id)
+
+    def write():
+        by_key = []
+        for values, ids in groups.items():
+            if len(ids) == 1:
+                by_key.append({"id": ids[0], **dict(values)})
+                continue
+            for chunk in _chunks(ids):
+                db.session.execute(update(model).where(model.id.in_(chunk)).values(**dict(values))
+                                   .execution_options(synchronize_session=False))
+        if by_key:
+            db.session.execute(update(model), by_key)
+        for index, row_id, _ in changes:
+            results[index] = {"index": index, "id": row_id, "status": "updated"}
+
+    _commit(write)
+    return _summary(results, "updated"), True
+
+
+def bulk_delete(model, ids: list) -> dict:
+    """Delete rows by id with DELETE ... WHERE id IN (...) per chunk; unknown ids are not_found."""
+    valid = [i for i in ids if isinstance(i, int) and not isinstance(i, bool)]
+    found = _existing_ids(model, valid)
+
+    def write():
+        for chunk in _chunks(sorted(found)):
+            db.session.execute(delete(model).where(model.id.in_(chunk))
+                               .execution_options(synchronize_session=False))
+
+    if found:
+        _commit(write)
+    results = []
+    for index, row_id in enumerate(ids):
+        if not isinstance(row_id, int) or isinstance(row_id, bool):
+            results.append({"index": index, "status": "error", "error": "id must be an integer"})
+        else:
+            results.append({"index": index, "id": row_id,
+                            "status": "deleted" if row_id in found else "not_found"})
+    return _summary(results, "deleted")
@@ -1,6 +1,10 @@
+import functools
 from flask import Blueprint, jsonify, request
+from sqlalchemy import select
+from config import Config
 from models import db
 from models.feature import Feature
+from services.cache import cache_delete, cache_fetch
 
 features_bp = Blueprint("features", __name__)
 
@@ -49,6 +53,26 @@ DEFAULT_FEATURES = [
 ]
 
 
+def feature_enabled(name: str) -> bool:
+    """Whether a feature is switched on (cached briefly; toggling clears it)."""
+    return cache_fetch(f"feature:{name}",
+                       lambda: bool(db.session.execute(
+                           select(Feature.is_enabled).where(Feature.name == name)).scalar()),
+                       ttl=Config.FEATURE_FLAG_CACHE_TTL)
+
+
+def requires_feature(name: str):
+    """Route decorator answering 403 while the named feature is disabled."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not feature_enabled(name):
+                return jsonify({"error": f"Feature '{name}' is not enabled"}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
 @features_bp.route("/", methods=["GET"])
 def list_features():
     """List all available features and their status."""
@@ -71,6 +95,7 @@ def toggle_feature(feature_id):
         return jsonify({"error": "Feature not found"}), 404
     feature.is_enabled = not feature.is_enabled
     db.session.commit()
+    cache_delete(f"feature:{feature.name}")
     return jsonify(feature.to_dict())
 
 
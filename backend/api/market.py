@@ -1,5 +1,10 @@
-from flask import Blueprint, jsonify, request
+from datetime import date, datetime
+from flask import Blueprint, Response, jsonify, request
+from api.features import requires_feature
+from config import Config
+from services.indicators import parse_indicator
 from services.market_data import MarketDataService
+from services.options_flow import get_flow_overview, get_options_flow
 
 market_bp = Blueprint("market", __name__)
 market_service = MarketDataService()
@@ -15,12 +20,81 @@ def get_quote(ticker):
     return jsonify(data)
 
 
+@market_bp.route("/quotes")
+def get_quotes():
+    """Get quotes for a comma-separated list of tickers in one request."""
+    market = request.args.get("market", "US")
+    tickers = [t.strip().upper() for t in request.args.get("tickers", "").split(",") if t.strip()]
+    if not tickers:
+        return jsonify({"error": "Query parameter 'tickers' is required"}), 400
+    if len(tickers) > Config.MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {Config.MAX_BATCH_TICKERS} tickers per request"}), 400
+
+    results = market_service.get_quotes(tickers, market)
+    quotes = {t: q for t, q in results.items() if q is not None}
+    errors = {t: f"Could not fetch quote for {t}" for t, q in results.items() if q is None}
+    return jsonify({"quotes": quotes, "errors": errors})
+
+
 @market_bp.route("/intraday/<ticker>")
 def get_intraday(ticker):
-    """Get intraday price data."""
+    """Get intraday price data, optionally a stored range (?start=&end=&limit=).
+
+    ?format=columns returns parallel arrays and ?format=binary the packed
+    BarSeries (application/octet-stream) instead of one object per bar.
+    """
     interval = request.args.get("interval", "5min")
     market = request.args.get("market", "US")
-    data = market_service.get_intraday(ticker, interval, market)
+    fmt = request.args.get("format", "rows")
+    if fmt not in ("rows", "columns", "binary"):
+        return jsonify({"error": "format must be one of rows, columns, binary"}), 400
+    if interval not in Config.INTRADAY_INTERVALS:
+        return jsonify({"error": f"interval must be one of {', '.join(Config.INTRADAY_INTERVALS)}"}), 400
+    try:
+        start = datetime.fromisoformat(request.args["start"]) if request.args.get("start") else None
+        end = datetime.fromisoformat(request.args["end"]) if request.args.get("end") else None
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO 8601 timestamps"}), 400
+    limit = request.args.get("limit", type=int)
+    if limit is not None:
+        limit = max(1, min(limit, Config.INTRADAY_MAX_BARS))
+    elif start or end:
+        limit = Config.INTRADAY_MAX_BARS
+
+    if fmt == "binary":
+        series = market_service.get_intraday_series(ticker, interval, market, start, end, limit)
+        if series is None:
+            return jsonify({"error": f"Could not fetch intraday data for {ticker}"}), 404
+        return Response(series.pack(), mimetype="application/octet-stream")
+
+    data = market_service.get_intraday(ticker, interval, market, start, end, limit,
+                                       columnar=fmt == "columns")
+    if data is None:
+        return jsonify({"error": f"Could not fetch intraday data for {ticker}"}), 404
+    return jsonify(data)
+
+
+@market_bp.route("/indicators/<ticker>")
+@requires_feature("technical_indicators")
+def get_indicators(ticker):
+    """Compute several indicators over intraday bars (?indicators=rsi:14,macd,bbands:20:2)."""
+    interval = request.args.get("interval", "5min")
+    market = request.args.get("market", "US")
+    if interval not in Config.INTRADAY_INTERVALS:
+        return jsonify({"error": f"interval must be one of {', '.join(Config.INTRADAY_INTERVALS)}"}), 400
+    specs = [s for s in request.args.get("indicators", "").split(",") if s.strip()]
+    if not specs:
+        return jsonify({"error": "Query parameter 'indicators' is required"}), 400
+    if len(specs) > Config.MAX_INDICATORS_PER_REQUEST:
+        return jsonify({"error": f"At most {Config.MAX_INDICATORS_PER_REQUEST} indicators per request"}), 400
+    try:
+        indicators = [parse_indicator(s) for s in specs]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = max(1, min(request.args.get("limit", Config.INTRADAY_DEFAULT_BARS, type=int),
+                       Config.INDICATOR_HISTORY_BARS))
+
+    data = market_service.get_indicators(ticker, interval, market, indicators, limit)
     if data is None:
         return jsonify({"error": f"Could not fetch intraday data for {ticker}"}), 404
     return jsonify(data)
@@ -28,20 +102,65 @@ def get_intraday(ticker):
 
 @market_bp.route("/options/<ticker>")
 def get_options(ticker):
-    """Get options chain data for a stock."""
-    data = market_service.get_options_chain(ticker)
+    """Get options chain data for a stock, filtered server-side.
+
+    ?expiration_from=&expiration_to= (ISO dates, inclusive), ?strike_window=
+    (fraction of spot, e.g. 0.1), ?min_strike=&max_strike=, ?min_volume=,
+    ?min_open_interest= and ?side=call|put narrow the contracts returned;
+    ?format=columns returns parallel arrays instead of one object each.
+    """
+    fmt = request.args.get("format", "rows")
+    if fmt not in ("rows", "columns"):
+        return jsonify({"error": "format must be one of rows, columns"}), 400
+    side = request.args.get("side")
+    if side not in (None, "call", "put"):
+        return jsonify({"error": "side must be call or put"}), 400
+    filters = {"side": side,
+               "min_strike": request.args.get("min_strike", type=float),
+               "max_strike": request.args.get("max_strike", type=float),
+               "min_volume": request.args.get("min_volume", 0, type=int),
+               "min_open_interest": request.args.get("min_open_interest", 0, type=int)}
+    try:
+        for bound in ("expiration_from", "expiration_to"):
+            value = request.args.get(bound)
+            filters[bound] = date.fromisoformat(value).isoformat() if value else None
+    except ValueError:
+        return jsonify({"error": "expiration_from and expiration_to must be ISO dates"}), 400
+    strike_window = request.args.get("strike_window", type=float)
+    if strike_window is not None and not 0 < strike_window <= 1:
+        return jsonify({"error": "strike_window must be a fraction of spot between 0 and 1"}), 400
+
+    data = market_service.get_options_chain(ticker.upper(), strike_window=strike_window,
+                                            columnar=fmt == "columns", **filters)
     if data is None:
         return jsonify({"error": f"Could not fetch options data for {ticker}"}), 404
     return jsonify(data)
 
 
+@market_bp.route("/options-flow")
+@requires_feature("options_flow")
+def get_options_flow_overview():
+    """Summary of the latest options flow scan over the watchlist."""
+    return jsonify(get_flow_overview() or {"as_of": None, "tickers": []})
+
+
+@market_bp.route("/options-flow/<ticker>")
+@requires_feature("options_flow")
+def get_ticker_options_flow(ticker):
+    """Precomputed unusual activity, block trades and IV summary for a ticker."""
+    data = get_options_flow(ticker)
+    if data is None:
+        return jsonify({"error": f"No options flow for {ticker} yet; add it to the watchlist to have it scanned"}), 404
+    return jsonify(data)
+
+
 @market_bp.route("/search")
 def search_stocks():
     """Search for stocks by keyword."""
     query = request.args.get("q", "")
     if not query:
         return jsonify({"error": "Query parameter 'q' is required"}), 400
-    results = market_service.search(query)
+    results = market_service.search(query, request.args.get("market"))
     return jsonify({"results": results})
 
 
@@ -0,0 +1,43 @@
+import re
+from flask import Blueprint, jsonify, request
+from models import db
+from models.user_preference import UserPreference
+from services.notifications import device_token_key, registered_device_tokens
+
+notifications_bp = Blueprint("notifications", __name__)
+
+# APNs device tokens are hex strings (64 characters today)
+_DEVICE_TOKEN_RE = re.compile(r"[0-9a-f]{32,80}")
+
+
+@notifications_bp.route("/devices", methods=["GET"])
+def list_devices():
+    """Registered devices, by token prefix."""
+    return jsonify({"devices": [f"{t[:8]}..." for t in registered_device_tokens()]})
+
+
+@notifications_bp.route("/devices", methods=["POST"])
+def register_device():
+    """Register an iPhone for reminder and price alert pushes ({"token": "<hex>"})."""
+    data = request.get_json(silent=True)
+    token = data.get("token") if isinstance(data, dict) else None
+    token = token.strip().lower() if isinstance(token, str) else ""
+    if not _DEVICE_TOKEN_RE.fullmatch(token):
+        return jsonify({"error": "token must be an APNs device token (hex)"}), 400
+
+    key = device_token_key(token)
+    if not UserPreference.query.filter_by(key=key).first():
+        db.session.add(UserPreference(key=key, value=token, category="notifications"))
+        db.session.commit()
+    return jsonify({"registered": f"{token[:8]}..."}), 201
+
+
+@notifications_bp.route("/devices/<token>", methods=["DELETE"])
+def unregister_device(token):
+    """Stop sending pushes to a device."""
+    pref = UserPreference.query.filter_by(key=device_token_key(token.lower())).first()
+    if not pref:
+        return jsonify({"error": "Device not registered"}), 404
+    db.session.delete(pref)
+    db.session.commit()
+    return jsonify({"message": "Device unregistered"})
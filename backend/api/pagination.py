@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import select, tuple_
+from config import Config
+from models import db
+
+
+def encode_cursor(values: list) -> str:
+    """Opaque cursor for the sort key of the last row on a page."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: tuple) -> tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(values) != len(columns):
+            raise ValueError
+        return tuple(datetime.fromisoformat(v) if isinstance(c.type, db.DateTime) else v
+                     for v, c in zip(values, columns))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_page(model, filters: list, order: tuple, descending: bool = False) -> tuple[list[dict], str | None]:
+    """One page of model rows as dicts, from ?limit=, ?cursor= and ?fields=.
+
+    Rows are ordered by the order columns (a unique key such as
+    (created_at, id)) and a page resumes after the cursor's key, so any page
+    costs one index range scan however deep it is. fields= selects only
+    the listed columns (default: all); the sort key columns are read either
+    way to build next_cursor, which is None on the last page. Raises
+    ValueError for unknown fields or a malformed cursor.
+    """
+    names = model.__table__.columns.keys()
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()] or names
+    unknown = [f for f in fields if f not in names]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (expected any of {', '.join(names)})")
+    limit = max(1, min(request.args.get("limit", Config.LIST_PAGE_SIZE, type=int), Config.LIST_MAX_PAGE_SIZE))
+
+    keys = [c.key for c in order]
+    columns = [getattr(model, f) for f in dict.fromkeys([*fields, *keys])]
+    query = select(*columns).where(*filters)
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = decode_cursor(cursor, order)
+        query = query.where(tuple_(*order) < after if descending else tuple_(*order) > after)
+    query = query.order_by(*(c.desc() if descending else c.asc() for c in order)).limit(limit + 1)
+
+    rows = db.session.execute(query).mappings().all()
+    next_cursor = encode_cursor([rows[limit - 1][k] for k in keys]) if len(rows) > limit else None
+    # Raw column values; the JSON encoder writes datetimes as ISO 8601
+    return [{f: row[f] for f in fields} for row in rows[:limit]], next_cursor
@@ -1,4 +1,5 @@
 from flask import Blueprint, jsonify, request
+from config import Config
 from services.sentiment import SentimentService
 
 sentiment_bp = Blueprint("sentiment", __name__)
@@ -34,5 +35,9 @@ def get_combined_sentiment(ticker):
 @sentiment_bp.route("/trending")
 def get_trending():
     """Get currently trending tickers on Reddit."""
-    data = sentiment_service.get_trending_tickers()
-    return jsonify({"trending": data})
+    window = request.args.get("window", "24h")
+    if window not in Config.TRENDING_WINDOWS:
+        return jsonify({"error": f"window must be one of {', '.join(Config.TRENDING_WINDOWS)}"}), 400
+    limit = max(1, min(request.args.get("limit", 15, type=int), 100))
+    data = sentiment_service.get_trending_tickers(window, limit)
+    return jsonify({"trending": data, "window": window})
@@ -1,26 +1,86 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from flask import Blueprint, jsonify, request
+from api import bulk
+from api.features import requires_feature
+from api.pagination import keyset_page
+from config import Config
 from models import db
 from models.trading_idea import TradingIdea
 from models.reminder import Reminder
+from services.backtest import idea_rule, run_backtest
 
 tasks_bp = Blueprint("tasks", __name__)
 
+IDEA_FIELDS = {
+    "ticker": bulk.text(20, upper=True),
+    "market": bulk.choice("US", "IN"),
+    "idea_type": bulk.choice("buy", "sell", "watch", "options"),
+    "entry_price": bulk.number,
+    "target_price": bulk.number,
+    "stop_loss": bulk.number,
+    "notes": bulk.text(),
+    "voice_transcript": bulk.text(),
+    "status": bulk.choice("active", "executed", "expired", "cancelled"),
+    "created_at": bulk.timestamp,  # lets imports keep their original dates
+}
+IDEA_UPDATE_FIELDS = {f: IDEA_FIELDS[f] for f in ["ticker", "market", "idea_type", "entry_price",
+                                                  "target_price", "stop_loss", "notes", "status"]}
+
+REMINDER_FIELDS = {
+    "title": bulk.text(200),
+    "description": bulk.text(),
+    "reminder_time": bulk.timestamp,
+    "recurrence": bulk.choice("hourly", "daily", "weekly", "market_open", "market_close"),
+    "ticker": bulk.text(20),
+    "alert_type": bulk.choice("push", "email", "in_app"),
+    "is_active": bulk.boolean,
+}
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def _bulk_items(data, key: str):
+    """The item list of a bulk request body, or an error response.
+
+    Once this succeeds data is known to be an object, so callers can read
+    its other keys ("atomic").
+    """
+    if not isinstance(data, dict):
+        return None, (jsonify({"error": "Request body must be a JSON object"}), 400)
+    items = data.get(key)
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": f"'{key}' must be a non-empty list"}), 400)
+    if len(items) > Config.MAX_BULK_ITEMS:
+        return None, (jsonify({"error": f"At most {Config.MAX_BULK_ITEMS} items per request"}), 400)
+    return items, None
+
+
+def _bulk_response(result: dict, written: bool, created: bool = False):
+    if result["failed"] and not written:
+        return jsonify(result), 400
+    return jsonify(result), 201 if created else 200
+
 
 # --- Trading Ideas ---
 
 @tasks_bp.route("/ideas", methods=["GET"])
 def list_ideas():
-    """List all trading ideas."""
+    """List trading ideas, newest first, a page at a time (?limit=&cursor=&fields=)."""
     status = request.args.get("status", "active")
     market = request.args.get("market")
-    query = TradingIdea.query
+    filters = []
     if status != "all":
-        query = query.filter_by(status=status)
+        filters.append(TradingIdea.status == status)
     if market:
-        query = query.filter_by(market=market)
-    ideas = query.order_by(TradingIdea.created_at.desc()).all()
-    return jsonify({"ideas": [i.to_dict() for i in ideas]})
+        filters.append(TradingIdea.market == market)
+    try:
+        ideas, next_cursor = keyset_page(TradingIdea, filters, (TradingIdea.created_at, TradingIdea.id),
+                                         descending=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"ideas": ideas, "next_cursor": next_cursor})
 
 
 @tasks_bp.route("/ideas", methods=["POST"])
@@ -73,17 +133,113 @@ def delete_idea(idea_id):
     return jsonify({"message": "Idea deleted"})
 
 
+@tasks_bp.route("/ideas/bulk", methods=["POST"])
+def bulk_create_ideas():
+    """Create many ideas in one transaction ({"ideas": [...], "atomic": false}).
+
+    Returns a result per item; with atomic, one invalid idea rejects them all.
+    """
+    data = request.get_json(silent=True)
+    items, error = _bulk_items(data, "ideas")
+    if error:
+        return error
+    defaults = {"market": "US", "idea_type": "watch", "status": "active",
+                "created_at": _utcnow, "updated_at": _utcnow}
+    result, written = bulk.bulk_create(TradingIdea, items, IDEA_FIELDS, ("ticker",), defaults,
+                                       atomic=bool(data.get("atomic")))
+    return _bulk_response(result, written, created=True)
+
+
+@tasks_bp.route("/ideas/bulk", methods=["PATCH"])
+def bulk_update_ideas():
+    """Update many ideas ({"ideas": [{"id": 1, "status": "cancelled"}, ...], "atomic": false})."""
+    data = request.get_json(silent=True)
+    items, error = _bulk_items(data, "ideas")
+    if error:
+        return error
+    result, written = bulk.bulk_update(TradingIdea, items, IDEA_UPDATE_FIELDS, ("ticker", "market", "idea_type"),
+                                       atomic=bool(data.get("atomic")))
+    return _bulk_response(result, written)
+
+
+@tasks_bp.route("/ideas/bulk", methods=["DELETE"])
+def bulk_delete_ideas():
+    """Delete many ideas ({"ids": [...]})."""
+    items, error = _bulk_items(request.get_json(silent=True), "ids")
+    if error:
+        return error
+    return jsonify(bulk.bulk_delete(TradingIdea, items))
+
+
+@tasks_bp.route("/ideas/backtest", methods=["POST"])
+@requires_feature("backtesting")
+def backtest_ideas():
+    """Replay ideas' entry/target/stop rules over stored bars.
+
+    Body: idea_ids (default: all active buy/sell ideas) and/or ad-hoc ideas,
+    interval, start, end, and an optional sweep of target_pct/stop_pct lists.
+    Without start, each idea is replayed from when it was created.
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    interval = data.get("interval", "5min")
+    if interval not in Config.INTRADAY_INTERVALS:
+        return jsonify({"error": f"interval must be one of {', '.join(Config.INTRADAY_INTERVALS)}"}), 400
+    try:
+        start = datetime.fromisoformat(data["start"]) if data.get("start") else None
+        end = datetime.fromisoformat(data["end"]) if data.get("end") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "start and end must be ISO 8601 timestamps"}), 400
+
+    sweep = data.get("sweep")
+    if sweep is not None:
+        lists = [sweep.get(key) for key in ("target_pct", "stop_pct")] if isinstance(sweep, dict) else None
+        values = [v for pcts in lists or [] if isinstance(pcts, list) for v in pcts]
+        if (not values or not all(pcts is None or isinstance(pcts, list) for pcts in lists)
+                or not all(isinstance(v, (int, float)) and not isinstance(v, bool) and v > 0 for v in values)):
+            return jsonify({"error": "sweep needs positive target_pct and/or stop_pct lists"}), 400
+
+    ideas = data.get("ideas") or []
+    if not isinstance(ideas, list):
+        return jsonify({"error": "ideas must be a list"}), 400
+    idea_ids = data.get("idea_ids")
+    if idea_ids is not None:
+        if not isinstance(idea_ids, list) or any(not isinstance(i, int) or isinstance(i, bool) for i in idea_ids):
+            return jsonify({"error": "idea_ids must be a list of integers"}), 400
+        ideas = ideas + [i.to_dict() for i in TradingIdea.query.filter(TradingIdea.id.in_(idea_ids))]
+    elif not ideas:
+        ideas = [i.to_dict() for i in TradingIdea.query.filter(
+            TradingIdea.status == "active", TradingIdea.idea_type.in_(["buy", "sell"]))]
+    prices = ("entry_price", "target_price", "stop_loss")
+    if any(not isinstance(i, dict) or not i.get("ticker") or not isinstance(i["ticker"], str)
+           or any(not isinstance(i.get(p), (int, float, type(None))) for p in prices) for i in ideas):
+        return jsonify({"error": "every idea needs a ticker, and prices must be numbers"}), 400
+    combos = len((sweep or {}).get("target_pct") or [None]) * len((sweep or {}).get("stop_pct") or [None])
+    if len(ideas) * combos > Config.MAX_BACKTEST_RUNS:
+        return jsonify({"error": f"At most {Config.MAX_BACKTEST_RUNS} idea runs per request"}), 400
+
+    try:
+        rules = [idea_rule(i) for i in ideas]
+    except (TypeError, ValueError):
+        return jsonify({"error": "created_at must be an ISO 8601 timestamp"}), 400
+    return jsonify(run_backtest(rules, interval, start, end, sweep))
+
+
 # --- Reminders ---
 
 @tasks_bp.route("/reminders", methods=["GET"])
 def list_reminders():
-    """List all active reminders."""
+    """List active reminders, soonest first, a page at a time (?limit=&cursor=&fields=)."""
     active_only = request.args.get("active_only", "true") == "true"
-    query = Reminder.query
-    if active_only:
-        query = query.filter_by(is_active=True)
-    reminders = query.order_by(Reminder.reminder_time.asc()).all()
-    return jsonify({"reminders": [r.to_dict() for r in reminders]})
+    filters = [Reminder.is_active.is_(True)] if active_only else []
+    try:
+        reminders, next_cursor = keyset_page(Reminder, filters, (Reminder.reminder_time, Reminder.id))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"reminders": reminders, "next_cursor": next_cursor})
 
 
 @tasks_bp.route("/reminders", methods=["POST"])
@@ -106,6 +262,40 @@ def create_reminder():
     return jsonify(reminder.to_dict()), 201
 
 
+@tasks_bp.route("/reminders/bulk", methods=["POST"])
+def bulk_create_reminders():
+    """Create many reminders in one transaction ({"reminders": [...], "atomic": false})."""
+    data = request.get_json(silent=True)
+    items, error = _bulk_items(data, "reminders")
+    if error:
+        return error
+    defaults = {"alert_type": "push", "is_active": True, "is_triggered": False, "created_at": _utcnow}
+    result, written = bulk.bulk_create(Reminder, items, REMINDER_FIELDS, ("title", "reminder_time"), defaults,
+                                       atomic=bool(data.get("atomic")))
+    return _bulk_response(result, written, created=True)
+
+
+@tasks_bp.route("/reminders/bulk", methods=["PATCH"])
+def bulk_update_reminders():
+    """Update many reminders ({"reminders": [{"id": 1, "is_active": false}, ...], "atomic": false})."""
+    data = request.get_json(silent=True)
+    items, error = _bulk_items(data, "reminders")
+    if error:
+        return error
+    result, written = bulk.bulk_update(Reminder, items, REMINDER_FIELDS, ("title", "reminder_time"),
+                                       atomic=bool(data.get("atomic")))
+    return _bulk_response(result, written)
+
+
+@tasks_bp.route("/reminders/bulk", methods=["DELETE"])
+def bulk_delete_reminders():
+    """Delete many reminders ({"ids": [...]})."""
+    items, error = _bulk_items(request.get_json(silent=True), "ids")
+    if error:
+        return error
+    return jsonify(bulk.bulk_delete(Reminder, items))
+
+
 @tasks_bp.route("/reminders/<int:reminder_id>", methods=["PUT"])
 def update_reminder(reminder_id):
     """Update a reminder."""
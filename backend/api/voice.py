@@ -2,11 +2,11 @@ import re
 from flask import Blueprint, jsonify, request
 from models import db
 from models.trading_idea import TradingIdea
+from services.tickers import extract_tickers, ticker_extractor
 
 voice_bp = Blueprint("voice", __name__)
 
 # Simple keyword-based intent parser for voice transcripts
-TICKER_PATTERN = re.compile(r"\b([A-Z]{1,5})\b")
 ACTION_KEYWORDS = {
     "buy": ["buy", "long", "call", "bullish", "accumulate"],
     "sell": ["sell", "short", "put", "bearish", "dump", "exit"],
@@ -15,7 +15,7 @@ ACTION_KEYWORDS = {
 }
 
 
-def parse_voice_intent(transcript: str) -> dict:
+def parse_voice_intent(transcript: str, market: str | None = None) -> dict:
     """Parse a voice transcript into a structured trading idea."""
     lower = transcript.lower()
 
@@ -26,11 +26,8 @@ def parse_voice_intent(transcript: str) -> dict:
             idea_type = action
             break
 
-    # Extract tickers (uppercase words 1-5 chars that look like tickers)
-    tickers = TICKER_PATTERN.findall(transcript)
-    # Filter common English words
-    common_words = {"I", "A", "THE", "AND", "OR", "BUT", "FOR", "AT", "TO", "IN", "ON", "IS", "IT", "IF"}
-    tickers = [t for t in tickers if t not in common_words and len(t) >= 2]
+    # Extract tickers: listed symbols, company names and cashtags
+    tickers = extract_tickers(transcript, market)
 
     # Extract price mentions
     price_pattern = re.compile(r"\$?([\d]+\.?\d*)")
@@ -61,14 +58,14 @@ def process_voice():
     if not transcript:
         return jsonify({"error": "transcript is required"}), 400
 
-    parsed = parse_voice_intent(transcript)
+    parsed = parse_voice_intent(transcript, data.get("market"))
 
     # Create trading ideas for each detected ticker
     created_ideas = []
     for ticker in parsed.get("tickers", []):
         idea = TradingIdea(
             ticker=ticker,
-            market=data.get("market", "US"),
+            market=data.get("market") or ticker_extractor.market_of(ticker) or "US",
             idea_type=parsed["idea_type"],
             entry_price=parsed.get("entry_price"),
             target_price=parsed.get("target_price"),
@@ -94,4 +91,4 @@ def parse_only():
     transcript = data.get("transcript", "")
     if not transcript:
         return jsonify({"error": "transcript is required"}), 400
-    return jsonify(parse_voice_intent(transcript))
+    return jsonify(parse_voice_intent(transcript, data.get("market")))
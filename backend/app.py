@@ -10,7 +10,14 @@ from api.sentiment import sentiment_bp
 from api.tasks import tasks_bp
 from api.voice import voice_bp
 from api.features import features_bp
-from services.scheduler import init_scheduler
+from api.notifications import notifications_bp
+from services.bar_store import bar_store
+from services.scheduler import init_scheduler, scheduler_lease
+from services.cache import cache_stats
+from services.http_pool import pool_stats
+from services.rate_limit import alpha_vantage_limiter
+from services.streaming import quote_streamer
+from utils.serialization import FastJSONProvider
 
 socketio = SocketIO()
 migrate = Migrate()
@@ -19,12 +26,16 @@ migrate = Migrate()
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
 
     # Extensions
     db.init_app(app)
     migrate.init_app(app, db)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
-    socketio.init_app(app, cors_allowed_origins="*", async_mode="eventlet")
+    socketio.init_app(app, cors_allowed_origins="*", async_mode="eventlet",
+                      message_queue=config_class.SOCKETIO_MESSAGE_QUEUE)
+    quote_streamer.init_app(socketio)
+    bar_store.init_app(app)
 
     # Blueprints
     app.register_blueprint(market_bp, url_prefix="/api/market")
@@ -32,12 +43,23 @@ def create_app(config_class=Config):
     app.register_blueprint(tasks_bp, url_prefix="/api/tasks")
     app.register_blueprint(voice_bp, url_prefix="/api/voice")
     app.register_blueprint(features_bp, url_prefix="/api/features")
+    app.register_blueprint(notifications_bp, url_prefix="/api/notifications")
 
     # Health check
     @app.route("/api/health")
     def health():
         return {"status": "healthy", "service": "trading-assistant-api"}
 
+    # Per-worker runtime metrics
+    @app.route("/api/metrics")
+    def metrics():
+        return {
+            "cache": cache_stats(),
+            "http_pools": pool_stats(),
+            "rate_limits": {"alpha_vantage": alpha_vantage_limiter.stats()},
+            "scheduler": {"is_leader": scheduler_lease.is_leader},
+        }
+
     # Create tables and start scheduler
     with app.app_context():
         db.create_all()
@@ -16,14 +16,100 @@ class Config:
     # Redis
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+    # Socket.IO message queue so any worker can emit to clients on every worker
+    # (set SOCKETIO_MESSAGE_QUEUE= to disable for a single-process dev server)
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", REDIS_URL) or None
+
     # Market Data
     ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY", "")
     ALPHA_VANTAGE_BASE_URL = "https://www.alphavantage.co/query"
+    ALPHA_VANTAGE_MAX_CONCURRENCY = int(os.getenv("ALPHA_VANTAGE_MAX_CONCURRENCY", "8"))
+    MAX_BATCH_TICKERS = 100
+
+    # Alpha Vantage quota, shared by all workers. Lower priority classes leave
+    # a fraction of the burst in reserve for higher ones, and wait for at
+    # most their deadline (seconds) before giving up.
+    ALPHA_VANTAGE_REQUESTS_PER_MINUTE = int(os.getenv("ALPHA_VANTAGE_REQUESTS_PER_MINUTE", "75"))
+    ALPHA_VANTAGE_REQUESTS_PER_DAY = int(os.getenv("ALPHA_VANTAGE_REQUESTS_PER_DAY", "0"))  # 0 = no cap
+    ALPHA_VANTAGE_BURST = int(os.getenv("ALPHA_VANTAGE_BURST", "10"))
+    ALPHA_VANTAGE_PRIORITY_RESERVES = {"interactive": 0.0, "refresh": 0.3, "search": 0.5}
+    ALPHA_VANTAGE_PRIORITY_DEADLINES = {"interactive": 8, "refresh": 30, "search": 3}
+
+    # Intraday bars are kept in the price_bars table and served from there
+    INTRADAY_INTERVALS = ("1min", "5min", "15min", "30min", "60min")
+    INTRADAY_DEFAULT_BARS = 100
+    INTRADAY_MAX_BARS = 5000
+
+    # Technical indicators: state and values for the latest bars are cached
+    # per (symbol, interval, indicator, params) and advanced as bars arrive
+    INDICATOR_HISTORY_BARS = 1000
+    INDICATOR_CACHE_TTL = 24 * 3600
+    INDICATOR_MAX_PERIOD = 500
+    MAX_INDICATORS_PER_REQUEST = 10
+
+    # Feature flags: enabled state is cached briefly (toggling clears it)
+    FEATURE_FLAG_CACHE_TTL = 30
+
+    # Backtesting over stored bars: ideas are simulated in (ideas x bars)
+    # chunks, and large runs are split into tasks for a process pool
+    BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+    BACKTEST_CHUNK_CELLS = 2_000_000
+    BACKTEST_TASK_IDEAS = 2000
+    BACKTEST_PARALLEL_MIN_IDEAS = 5000
+    MAX_BACKTEST_RUNS = 100_000  # ideas x sweep combinations per request
+    # Bar timestamps are exchange-local; idea creation times are converted to match
+    BACKTEST_MARKET_TIMEZONES = {"US": "America/New_York", "IN": "Asia/Kolkata"}
+
+    # Options flow: watchlist chains are scanned on a schedule and diffed
+    # against the previous snapshot; the API serves the stored results
+    OPTIONS_FLOW_INTERVAL = int(os.getenv("OPTIONS_FLOW_INTERVAL", "300"))
+    OPTIONS_FLOW_WORKERS = 4
+    OPTIONS_FLOW_MAX_TICKERS = 50
+    OPTIONS_FLOW_RESULT_TTL = 24 * 3600
+    OPTIONS_FLOW_MIN_VOLUME = 100
+    OPTIONS_FLOW_VOL_OI_RATIO = 1.0
+    OPTIONS_FLOW_BLOCK_CONTRACTS = 500
+    OPTIONS_FLOW_BLOCK_PREMIUM = 250_000
+    OPTIONS_FLOW_SKEW_MONEYNESS = 0.1  # OTM strikes within 10% of spot
+    OPTIONS_FLOW_TOP_CONTRACTS = 25
+
+    # Quote streaming: seconds between polls of the tickers clients subscribe to
+    QUOTE_STREAM_INTERVAL = int(os.getenv("QUOTE_STREAM_INTERVAL", "5"))
+
+    # Watchlist price alerts: seconds between threshold checks
+    PRICE_ALERT_INTERVAL = int(os.getenv("PRICE_ALERT_INTERVAL", "5"))
+
+    # Scheduler leader election: the lease must be renewed well within its TTL
+    SCHEDULER_LEASE_TTL = 15
+    SCHEDULER_HEARTBEAT_INTERVAL = 5
+
+    # Reminder dispatch: rows claimed per transaction and push sender threads
+    REMINDER_BATCH_SIZE = 500
+    REMINDER_DISPATCH_WORKERS = 4
 
     # Reddit
     REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID", "")
     REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET", "")
     REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT", "TradingAssistant/1.0")
+    REDDIT_FETCH_WORKERS = int(os.getenv("REDDIT_FETCH_WORKERS", "8"))
+    REDDIT_SOURCE_TIMEOUT = float(os.getenv("REDDIT_SOURCE_TIMEOUT", "6"))  # per subreddit
+
+    # Symbol listings (Alpha Vantage LISTING_STATUS CSV format) used to
+    # recognize tickers and company names in free text
+    SYMBOLS_PATH = os.getenv("SYMBOLS_PATH", os.path.join(os.path.dirname(__file__), "data", "symbols.csv"))
+
+    # Symbol search: full listings are re-downloaded daily and shared via Redis
+    SYMBOL_LISTING_REFRESH_INTERVAL = 24 * 3600
+    SYMBOL_INDEX_SYNC_INTERVAL = 300
+    SYMBOL_SEARCH_CACHE_TTL = 24 * 3600  # upstream answers for queries the index misses
+
+    # Trending tickers: new posts are ingested into time-bucketed mention counts
+    TRENDING_SUBREDDITS = ["wallstreetbets"]
+    TRENDING_INGEST_INTERVAL = 60
+    TRENDING_INGEST_LIMIT = 100
+    TRENDING_BUCKET_SECONDS = 300
+    TRENDING_WINDOWS = {"1h": 3600, "6h": 6 * 3600, "24h": 24 * 3600}
+    TRENDING_CACHE_TTL = 30
 
     # News
     NEWS_API_KEY = os.getenv("NEWS_API_KEY", "")
@@ -34,8 +120,58 @@ class Config:
     APNS_TEAM_ID = os.getenv("APNS_TEAM_ID", "")
     APNS_KEY_PATH = os.getenv("APNS_KEY_PATH", "./certs/apns_auth_key.p8")
     APNS_BUNDLE_ID = os.getenv("APNS_BUNDLE_ID", "com.tradingassistant.app")
+    APNS_URL = "https://api.push.apple.com"
+    APNS_CONCURRENCY = int(os.getenv("APNS_CONCURRENCY", "100"))  # concurrent HTTP/2 streams
+
+    # Outbound HTTP connection pools (keep-alive, per-host sizes, retries)
+    HTTP_CONNECT_TIMEOUT = 3.05
+    HTTP_READ_TIMEOUT = 10
+    HTTP_MAX_RETRIES = 2
+    HTTP_BACKOFF_BASE = 0.5
+    HTTP_BACKOFF_MAX = 8
+    HTTP_KEEPALIVE_EXPIRY = 300
+    HTTP_POOL_DEFAULT_SIZE = 10
+    HTTP_POOL_SIZES = {
+        "www.alphavantage.co": ALPHA_VANTAGE_MAX_CONCURRENCY,
+        "newsapi.org": 4,
+        "api.push.apple.com": 1,  # one multiplexed HTTP/2 connection
+    }
 
     # Cache TTLs (seconds)
     MARKET_DATA_CACHE_TTL = 60
     SENTIMENT_CACHE_TTL = 300
     NEWS_CACHE_TTL = 600
+
+    # Sentiment lexicon: optional JSON file of {"word": weight}; defaults to
+    # +1/-1 for the built-in bullish/bearish word lists
+    SENTIMENT_LEXICON_PATH = os.getenv("SENTIMENT_LEXICON_PATH", "")
+    SENTIMENT_NEGATION_WINDOW = int(os.getenv("SENTIMENT_NEGATION_WINDOW", "3"))
+
+    # In-process L1 cache in front of Redis (also the fallback when Redis is down)
+    LOCAL_CACHE_TTL = int(os.getenv("LOCAL_CACHE_TTL", "5"))
+    LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "5000"))
+    LOCAL_CACHE_MAX_BYTES = int(os.getenv("LOCAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Single-flight cache fills (seconds); the lock outlives the slowest upstream call
+    CACHE_FILL_LOCK_TTL = 30
+    CACHE_FILL_WAIT_TIMEOUT = 20
+    CACHE_FILL_POLL_INTERVAL = 0.05
+
+    # Stale-while-revalidate: how long past their TTL entries may still be
+    # served while a background refresh runs, and refresh-ahead for hot keys
+    MARKET_DATA_STALE_TTL = int(os.getenv("MARKET_DATA_STALE_TTL", "300"))
+    CACHE_REFRESH_WORKERS = 4
+    CACHE_REFRESH_AHEAD_FRACTION = 0.2  # refresh in the last 20% of the TTL
+    CACHE_HOT_KEY_READS = 10
+    CACHE_HOT_KEY_WINDOW = 60
+
+    # JSON encoder for API responses and cached values: "orjson" when installed, else "stdlib"
+    JSON_ENCODER = os.getenv("JSON_ENCODER", "orjson")
+
+    # Keyset-paginated list endpoints (ideas, reminders)
+    LIST_PAGE_SIZE = 100
+    LIST_MAX_PAGE_SIZE = 1000
+
+    # Bulk create/update/delete: items per request and rows per statement
+    MAX_BULK_ITEMS = 100_000
+    BULK_CHUNK_SIZE = 5000
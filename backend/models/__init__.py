@@ -7,5 +7,6 @@ from models.reminder import Reminder
 from models.user_preference import UserPreference
 from models.watchlist import Watchlist
 from models.feature import Feature
+from models.price_bar import PriceBar
 
-__all__ = ["db", "TradingIdea", "Reminder", "UserPreference", "Watchlist", "Feature"]
+__all__ = ["db", "TradingIdea", "Reminder", "UserPreference", "Watchlist", "Feature", "PriceBar"]
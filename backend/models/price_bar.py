@@ -0,0 +1,27 @@
+from models import db
+
+
+class PriceBar(db.Model):
+    """One OHLCV bar. Timestamps are exchange-local, as Alpha Vantage reports them."""
+
+    __tablename__ = "price_bars"
+
+    # The primary key doubles as the (symbol, interval, ts) range index
+    symbol = db.Column(db.String(30), primary_key=True)
+    interval = db.Column(db.String(10), primary_key=True)  # 1min, 5min, 15min, 30min, 60min
+    ts = db.Column(db.DateTime, primary_key=True)
+    open = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "timestamp": self.ts.strftime("%Y-%m-%d %H:%M:%S"),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        }
@@ -4,6 +4,14 @@ from models import db
 
 class Reminder(db.Model):
     __tablename__ = "reminders"
+    __table_args__ = (
+        # Serves the dispatcher's claim query for due, untriggered reminders
+        db.Index("idx_reminders_due", "reminder_time",
+                 postgresql_where=db.text("is_active AND NOT is_triggered")),
+        # Keyset pagination on (reminder_time, id), with and without active_only
+        db.Index("idx_reminders_time_id", "reminder_time", "id"),
+        db.Index("idx_reminders_active_time", "is_active", "reminder_time", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -4,6 +4,12 @@ from models import db
 
 class TradingIdea(db.Model):
     __tablename__ = "trading_ideas"
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), with and without the list filters
+        db.Index("idx_trading_ideas_created", "created_at", "id"),
+        db.Index("idx_trading_ideas_status_created", "status", "created_at", "id"),
+        db.Index("idx_trading_ideas_market_status_created", "market", "status", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     ticker = db.Column(db.String(20), nullable=False, index=True)
@@ -0,0 +1,261 @@
+import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from models.watchlist import Watchlist
+from services.cache import get_redis
+from services.market_data import MarketDataService
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = "alerts:dirty"
+DIRTY_INFO_KEY = "price_alert_dirty"  # Session.info key for uncommitted watchlist changes
+LAST_PRICE_KEY = "alerts:last_price"
+
+_INF = float("inf")
+
+
+class AlertIndex:
+    """In-memory index of watchlist price thresholds, sorted per ticker.
+
+    For each (market, ticker) the "above" and "below" thresholds are kept as
+    sorted (threshold, watchlist_id) lists, so finding every threshold a price
+    move crossed is a pair of bisects regardless of how many alerts exist.
+    """
+
+    def __init__(self):
+        self._above: dict[str, list[tuple[float, int]]] = {}
+        self._below: dict[str, list[tuple[float, int]]] = {}
+        self._rows: dict[int, tuple[str, float | None, float | None]] = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def keys(self) -> list[str]:
+        return list(set(self._above) | set(self._below))
+
+    def upsert(self, row_id: int, key: str, above: float | None, below: float | None):
+        self.remove(row_id)
+        if above is None and below is None:
+            return
+        if above is not None:
+            insort(self._above.setdefault(key, []), (above, row_id))
+        if below is not None:
+            insort(self._below.setdefault(key, []), (below, row_id))
+        self._rows[row_id] = (key, above, below)
+
+    def remove(self, row_id: int):
+        entry = self._rows.pop(row_id, None)
+        if entry is None:
+            return
+        key, above, below = entry
+        for index, threshold in ((self._above, above), (self._below, below)):
+            if threshold is None:
+                continue
+            levels = index[key]
+            levels.pop(bisect_left(levels, (threshold, row_id)))
+            if not levels:
+                del index[key]
+
+    def crossed(self, key: str, previous: float, price: float) -> list[tuple[int, str, float]]:
+        """Thresholds crossed moving from previous to price, as (id, direction, threshold)."""
+        hits = []
+        if price > previous:
+            levels = self._above.get(key, [])
+            lo = bisect_right(levels, (previous, _INF))
+            hi = bisect_right(levels, (price, _INF))
+            hits.extend((row_id, "above", t) for t, row_id in levels[lo:hi])
+        elif price < previous:
+            levels = self._below.get(key, [])
+            lo = bisect_left(levels, (price, -_INF))
+            hi = bisect_left(levels, (previous, -_INF))
+            hits.extend((row_id, "below", t) for t, row_id in levels[lo:hi])
+        return hits
+
+
+class PriceAlertEngine:
+    """Evaluates watchlist price alerts against batched quotes.
+
+    The index is loaded once and then kept current from the ids of watchlist
+    rows changed since the last tick (recorded by ORM listeners in a shared
+    Redis set). An alert fires when the price crosses its threshold between
+    two ticks; last prices are kept in Redis so a failover doesn't refire.
+    """
+
+    def __init__(self, market_service: MarketDataService | None = None):
+        self.market_service = market_service or MarketDataService()
+        self.index = AlertIndex()
+        self._loaded = False
+        self._pending_local: set[int] = set()
+        self._local_prices: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Force a full reload on the next tick."""
+        self._loaded = False
+
+    def mark_dirty(self, row_ids):
+        client = get_redis()
+        if client:
+            try:
+                client.sadd(DIRTY_KEY, *row_ids)
+                return
+            except Exception:
+                pass
+        with self._lock:
+            self._pending_local.update(row_ids)
+
+    def _drain_dirty(self) -> set[int] | None:
+        """Row ids changed since the last drain, or None if Redis couldn't be read."""
+        with self._lock:
+            ids, self._pending_local = self._pending_local, set()
+        client = get_redis()
+        if not client:
+            return None
+        try:
+            pipe = client.pipeline()
+            pipe.smembers(DIRTY_KEY)
+            pipe.delete(DIRTY_KEY)
+            members, _ = pipe.execute()
+        except Exception:
+            return None
+        ids.update(int(m) for m in members)
+        return ids
+
+    @staticmethod
+    def _apply(index: AlertIndex, row: Watchlist):
+        if not row.is_active:
+            index.remove(row.id)
+        else:
+            index.upsert(row.id, f"{row.market}:{row.ticker.upper()}",
+                         row.price_alert_above, row.price_alert_below)
+
+    def sync(self):
+        """Bring the index up to date; must run inside an app context.
+
+        Changes committed on any worker arrive through the Redis dirty set.
+        Without Redis, changes made on other workers can't be seen, so the
+        index is reloaded on every tick instead.
+        """
+        ids = self._drain_dirty()
+        if not self._loaded or ids is None:
+            index = AlertIndex()
+            rows = Watchlist.query.filter(
+                Watchlist.is_active.is_(True),
+                (Watchlist.price_alert_above.isnot(None)) | (Watchlist.price_alert_below.isnot(None)),
+            ).all()
+            for row in rows:
+                self._apply(index, row)
+            self.index = index
+            # Without Redis, stay unloaded so the next tick reloads too
+            self._loaded = ids is not None
+            if self._loaded:
+                logger.info(f"Loaded {len(index)} price alerts")
+            return
+
+        if not ids:
+            return
+        rows = {row.id: row for row in Watchlist.query.filter(Watchlist.id.in_(ids)).all()}
+        for row_id in ids:
+            if row_id in rows:
+                self._apply(self.index, rows[row_id])
+            else:
+                self.index.remove(row_id)
+
+    def _last_prices(self, keys: list[str]) -> dict[str, float]:
+        client = get_redis()
+        if client:
+            try:
+                values = client.hmget(LAST_PRICE_KEY, keys)
+                return {k: float(v) for k, v in zip(keys, values) if v is not None}
+            except Exception:
+                pass
+        return {k: self._local_prices[k] for k in keys if k in self._local_prices}
+
+    def _store_prices(self, prices: dict[str, float]):
+        self._local_prices.update(prices)
+        client = get_redis()
+        if client and prices:
+            try:
+                client.hset(LAST_PRICE_KEY, mapping=prices)
+            except Exception:
+                pass
+
+    def check(self) -> list[dict]:
+        """Run one evaluation tick; returns the alerts that fired."""
+        self.sync()
+        keys = self.index.keys()
+        if not keys:
+            return []
+
+        by_market: dict[str, list[str]] = {}
+        for key in keys:
+            market, ticker = key.split(":", 1)
+            by_market.setdefault(market, []).append(ticker)
+
+        prices = {}
+        for market, tickers in by_market.items():
+            for ticker, quote in self.market_service.get_quotes(tickers, market).items():
+                if quote and quote.get("price"):
+                    prices[f"{market}:{ticker}"] = quote["price"]
+
+        previous = self._last_prices(list(prices))
+        fired = []
+        for key, price in prices.items():
+            if key not in previous:
+                continue  # First sighting only establishes the baseline
+            for row_id, direction, threshold in self.index.crossed(key, previous[key], price):
+                market, ticker = key.split(":", 1)
+                fired.append({"watchlist_id": row_id, "ticker": ticker, "market": market,
+                              "direction": direction, "threshold": threshold, "price": price})
+        self._store_prices(prices)
+
+        if fired:
+            self._notify(fired)
+        return fired
+
+    def _notify(self, fired: list[dict]):
+        from services.notifications import apns_service, registered_device_tokens
+
+        tokens = registered_device_tokens()
+        for alert in fired:
+            logger.info(f"Price alert: {alert['ticker']} {alert['direction']} {alert['threshold']}")
+            title = f"{alert['ticker']} {alert['direction']} {alert['threshold']:g}"
+            body = (f"{alert['ticker']} is at {alert['price']:.2f}, "
+                    f"crossing your alert at {alert['threshold']:g}")
+            apns_service.send_many(tokens, title, body, data=alert)
+
+
+price_alert_engine = PriceAlertEngine()
+
+
+@event.listens_for(Watchlist, "after_insert")
+@event.listens_for(Watchlist, "after_update")
+@event.listens_for(Watchlist, "after_delete")
+def _watchlist_changed(mapper, connection, target):
+    # Flushed but not yet committed; published once the transaction commits
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(DIRTY_INFO_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_dirty(session):
+    row_ids = session.info.pop(DIRTY_INFO_KEY, None)
+    if row_ids:
+        price_alert_engine.mark_dirty(row_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty(session):
+    session.info.pop(DIRTY_INFO_KEY, None)
+
+
+def check_price_alerts(app):
+    """Scheduled job: evaluate watchlist price alerts."""
+    with app.app_context():
+        try:
+            price_alert_engine.check()
+        except Exception as e:
+            logger.error(f"Price alert check failed: {e}")
@@ -0,0 +1,265 @@
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Outcome codes returned by simulate()
+NO_ENTRY, TARGET, STOP, OPEN = 0, 1, 2, 3
+OUTCOMES = {NO_ENTRY: "no_entry", TARGET: "target", STOP: "stop", OPEN: "open"}
+
+_process_pool = None
+
+
+def _first(hit: np.ndarray, n: int) -> np.ndarray:
+    """Index of the first True per row, or n if there is none."""
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), n)
+
+
+def simulate(bars: dict, side: np.ndarray, entry: np.ndarray, target: np.ndarray, stop: np.ndarray,
+             target_pct: np.ndarray, stop_pct: np.ndarray, start: np.ndarray) -> dict:
+    """Replay OHLC bars for many ideas on one symbol at once.
+
+    Each idea enters from bar start[i] on: at the open when entry is NaN,
+    otherwise once price trades through the entry limit (filled at the limit,
+    or at the open if it gaps past it). It then exits at the first bar that
+    touches the target or stop; a NaN target or stop is taken as
+    target_pct/stop_pct away from the fill, and a NaN there means none. If
+    one bar touches both, the stop is assumed to have come first. Trades
+    still open at the last bar are marked to its close.
+
+    side is +1 for long and -1 for short ideas. Ideas are evaluated in
+    chunks as (ideas x bars) boolean matrices, with no per-bar Python loop.
+    Returns arrays of outcome codes, entry/exit bar indices and prices, and
+    returns as a fraction of the fill price.
+    """
+    o, h, lo, c = (np.asarray(bars[k], dtype=float) for k in ("open", "high", "low", "close"))
+    n, m = len(c), len(side)
+    result = {
+        "outcome": np.full(m, NO_ENTRY, dtype=np.int8),
+        "entry_index": np.full(m, -1, dtype=np.int64),
+        "exit_index": np.full(m, -1, dtype=np.int64),
+        "entry_price": np.full(m, np.nan),
+        "exit_price": np.full(m, np.nan),
+        "return": np.full(m, np.nan),
+    }
+    if not n or not m:
+        return result
+
+    bar = np.arange(n)
+    chunk = max(1, Config.BACKTEST_CHUNK_CELLS // n)
+    for i in range(0, m, chunk):
+        rows = slice(i, i + chunk)
+        s, e = side[rows], entry[rows]
+        is_long = s > 0
+        long_rows = is_long[:, None]
+
+        # Entry
+        market = np.isnan(e)
+        touched = np.where(long_rows, lo[None, :] <= e[:, None], h[None, :] >= e[:, None])
+        entry_idx = _first((bar[None, :] >= start[rows, None]) & (touched | market[:, None]), n)
+        entered = entry_idx < n
+        at = np.minimum(entry_idx, n - 1)
+        fill = np.where(market, o[at], np.where(is_long, np.minimum(o[at], e), np.maximum(o[at], e)))
+
+        # Exits
+        tgt = np.where(np.isnan(target[rows]), fill * (1 + s * target_pct[rows]), target[rows])
+        stp = np.where(np.isnan(stop[rows]), fill * (1 - s * stop_pct[rows]), stop[rows])
+        after = bar[None, :] >= entry_idx[:, None]
+        tgt_idx = _first(after & np.where(long_rows, h[None, :] >= tgt[:, None], lo[None, :] <= tgt[:, None]), n)
+        stp_idx = _first(after & np.where(long_rows, lo[None, :] <= stp[:, None], h[None, :] >= stp[:, None]), n)
+
+        stopped = entered & (stp_idx < n) & (stp_idx <= tgt_idx)
+        hit_target = entered & (tgt_idx < n) & ~stopped
+        exit_idx = np.where(stopped, stp_idx, np.where(hit_target, tgt_idx, n - 1))
+        # Past the entry bar, a gap through the level fills at the open
+        gapped = exit_idx > entry_idx
+        exit_open = o[exit_idx]
+        stop_fill = np.where(gapped, np.where(is_long, np.minimum(exit_open, stp), np.maximum(exit_open, stp)), stp)
+        target_fill = np.where(gapped, np.where(is_long, np.maximum(exit_open, tgt), np.minimum(exit_open, tgt)), tgt)
+        exit_price = np.where(stopped, stop_fill, np.where(hit_target, target_fill, c[exit_idx]))
+
+        result["outcome"][rows] = np.where(~entered, NO_ENTRY, np.where(stopped, STOP, np.where(hit_target, TARGET, OPEN)))
+        result["entry_index"][rows] = np.where(entered, entry_idx, -1)
+        result["exit_index"][rows] = np.where(entered, exit_idx, -1)
+        result["entry_price"][rows] = np.where(entered, fill, np.nan)
+        result["exit_price"][rows] = np.where(entered, exit_price, np.nan)
+        result["return"][rows] = np.where(entered, s * (exit_price - fill) / fill, np.nan)
+    return result
+
+
+def summarize(returns: np.ndarray, exit_order: np.ndarray | None = None) -> dict:
+    """Win rate, expectancy and drawdown of a set of trade returns.
+
+    Drawdown is measured on the equity curve of compounding the trades in
+    exit_order (e.g. exit times), or in the given order.
+    """
+    returns = np.asarray(returns, dtype=float)
+    traded = ~np.isnan(returns)
+    r = returns[traded]
+    if exit_order is not None:
+        r = r[np.argsort(np.asarray(exit_order)[traded], kind="stable")]
+    stats = {"ideas": int(len(returns)), "trades": int(len(r))}
+    if not len(r):
+        return {**stats, "win_rate": None, "expectancy": None, "avg_win": None, "avg_loss": None,
+                "profit_factor": None, "total_return": None, "max_drawdown": None}
+
+    wins, losses = r[r > 0], r[r <= 0]
+    equity = np.cumprod(1 + r)
+    peak = np.maximum.accumulate(np.concatenate(([1.0], equity)))[1:]
+    return {
+        **stats,
+        "win_rate": round(len(wins) / len(r), 4),
+        "expectancy": round(float(r.mean()), 6),
+        "avg_win": round(float(wins.mean()), 6) if len(wins) else None,
+        "avg_loss": round(float(losses.mean()), 6) if len(losses) else None,
+        "profit_factor": round(float(wins.sum() / -losses.sum()), 4) if losses.sum() < 0 else None,
+        "total_return": round(float(equity[-1] - 1), 6),
+        "max_drawdown": round(float(np.max(1 - equity / peak)), 6),
+    }
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: workers shouldn't inherit Redis, database or socket state
+        _process_pool = ProcessPoolExecutor(max_workers=Config.BACKTEST_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+
+def _simulate_task(args: tuple) -> dict:
+    return simulate(*args)
+
+
+def _nan(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def _bar_time(created_at: str | None, market: str) -> float | None:
+    """An ISO timestamp on the bar clock: exchange-local time read as UTC epoch seconds.
+
+    Naive timestamps are taken as UTC, as created_at is stored.
+    """
+    if not created_at:
+        return None
+    moment = datetime.fromisoformat(created_at)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    local = moment.astimezone(ZoneInfo(Config.BACKTEST_MARKET_TIMEZONES.get(market, "UTC")))
+    return local.replace(tzinfo=timezone.utc).timestamp()
+
+
+def idea_rule(idea: dict) -> dict:
+    """Backtest rule for a trading idea dict (TradingIdea.to_dict() fields).
+
+    Raises ValueError (or TypeError) for a created_at that isn't an ISO timestamp.
+    """
+    from services.market_data import MarketDataService
+
+    market = idea.get("market") or "US"
+    return {
+        "id": idea.get("id"),
+        "symbol": MarketDataService()._resolve_symbol(idea["ticker"].upper(), market),
+        "since": _bar_time(idea.get("created_at"), market),
+        "side": -1 if idea.get("idea_type") == "sell" else 1,
+        "entry": idea.get("entry_price"),
+        "target": idea.get("target_price"),
+        "stop": idea.get("stop_loss"),
+    }
+
+
+def run_backtest(ideas: list[dict], interval: str = "5min", start: datetime | None = None,
+                 end: datetime | None = None, sweep: dict | None = None) -> dict:
+    """Backtest idea rules against the bars stored in price_bars.
+
+    Each idea is a dict with id, symbol, side (+1/-1), entry, target, stop
+    (None for market entry / no level) and since, the bar time it was
+    created (None for no limit). Unless start is given, an idea can only
+    enter from the first bar at or after since. With a sweep of target_pct and
+    stop_pct lists, every idea is run once per combination with those
+    offsets in place of its own target and stop. Only local bars are read,
+    so this runs fully offline. Large runs are split per symbol into
+    BACKTEST_TASK_IDEAS-sized tasks over a process pool.
+    """
+    from services.bar_store import bar_store
+
+    combos = [(None, None)]
+    if sweep:
+        combos = list(itertools.product(sweep.get("target_pct") or [None], sweep.get("stop_pct") or [None]))
+
+    by_symbol: dict[str, list[dict]] = {}
+    for idea in ideas:
+        by_symbol.setdefault(idea["symbol"], []).append(idea)
+
+    tasks, meta, missing = [], [], []
+    for symbol, symbol_ideas in by_symbol.items():
+        series = bar_store.get_series(symbol, interval, start, end)
+        if not len(series):
+            missing.append(symbol)
+            continue
+        bars = {k: np.asarray(getattr(series, k)) for k in ("open", "high", "low", "close")}
+        rows = [(idea, combo_no, tp, sp) for combo_no, (tp, sp) in enumerate(combos) for idea in symbol_ideas]
+        for i in range(0, len(rows), Config.BACKTEST_TASK_IDEAS):
+            part = rows[i:i + Config.BACKTEST_TASK_IDEAS]
+            since = np.array([_nan(idea.get("since")) for idea, _, _, _ in part])
+            first_bar = np.where(np.isnan(since) | (start is not None), 0, np.searchsorted(series.ts, since))
+            tasks.append((
+                bars,
+                np.array([idea["side"] for idea, _, _, _ in part], dtype=float),
+                np.array([_nan(idea["entry"]) for idea, _, _, _ in part]),
+                np.array([_nan(idea["target"] if tp is None else None) for idea, _, tp, _ in part]),
+                np.array([_nan(idea["stop"] if sp is None else None) for idea, _, _, sp in part]),
+                np.array([_nan(tp) for _, _, tp, _ in part]),
+                np.array([_nan(sp) for _, _, _, sp in part]),
+                first_bar.astype(np.int64),
+            ))
+            meta.append((series, part))
+
+    total = sum(len(part) for _, part in meta)
+    if len(tasks) > 1 and total >= Config.BACKTEST_PARALLEL_MIN_IDEAS:
+        results = list(_get_pool().map(_simulate_task, tasks))
+    else:
+        results = [_simulate_task(t) for t in tasks]
+
+    # Gather returns and exit times per sweep combination
+    per_combo = {n: ([], []) for n in range(len(combos))}
+    trades = []
+    for (series, part), res in zip(meta, results):
+        stamps = series.timestamps() if not sweep else None
+        for j, (idea, combo_no, _, _) in enumerate(part):
+            exit_idx = int(res["exit_index"][j])
+            per_combo[combo_no][0].append(res["return"][j])
+            per_combo[combo_no][1].append(series.ts[exit_idx] if exit_idx >= 0 else 0)
+            if not sweep:
+                trades.append(_trade(idea, stamps, res, j))
+
+    summaries = [summarize(np.array(rets), np.array(exits)) for rets, exits in per_combo.values()]
+    result = {"interval": interval, "missing_data": missing}
+    if sweep:
+        result["results"] = [{"target_pct": tp, "stop_pct": sp, "stats": stats}
+                             for (tp, sp), stats in zip(combos, summaries)]
+    else:
+        result["stats"] = summaries[0]
+        result["trades"] = trades
+    return result
+
+
+def _trade(idea: dict, stamps: list[str], res: dict, j: int) -> dict:
+    entry_idx, exit_idx = int(res["entry_index"][j]), int(res["exit_index"][j])
+    entered = entry_idx >= 0
+    return {
+        "idea_id": idea.get("id"),
+        "symbol": idea["symbol"],
+        "outcome": OUTCOMES[int(res["outcome"][j])],
+        "entry_time": stamps[entry_idx] if entered else None,
+        "entry_price": round(float(res["entry_price"][j]), 4) if entered else None,
+        "exit_time": stamps[exit_idx] if entered else None,
+        "exit_price": round(float(res["exit_price"][j]), 4) if entered else None,
+        "return": round(float(res["return"][j]), 6) if entered else None,
+    }
@@ -0,0 +1,209 @@
+import logging
+import struct
+from contextlib import nullcontext
+from datetime import datetime
+import numpy as np
+from flask import has_app_context
+from sqlalchemy import delete, func, insert, select
+from config import Config
+from services.cache import cache_fetch
+
+logger = logging.getLogger(__name__)
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class BarSeries:
+    """OHLCV bars as parallel NumPy arrays, oldest first.
+
+    ts holds the exchange-local bar timestamps as epoch seconds (the naive
+    timestamp read as UTC). pack() gives the wire and cache format: an 8-byte
+    header (b"OHLC", uint32 bar count) followed by the ts, open, high, low,
+    close and volume columns, each little-endian int64 or float64.
+    """
+
+    MAGIC = b"OHLC"
+    _HEADER = struct.Struct("<4sI")
+    _DTYPES = (("ts", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+               ("close", "<f8"), ("volume", "<i8"))
+
+    def __init__(self, ts, open, high, low, close, volume):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self):
+        return len(self.ts)
+
+    @classmethod
+    def from_rows(cls, rows) -> "BarSeries":
+        """Build from (ts datetime, open, high, low, close, volume) rows, oldest first."""
+        columns = list(zip(*rows)) or [()] * 6
+        ts = np.array(columns[0], dtype="datetime64[s]").astype(np.int64)
+        return cls(ts, *(np.array(c, dtype=dtype) for c, (_, dtype) in zip(columns[1:], cls._DTYPES[1:])))
+
+    def tail(self, n: int) -> "BarSeries":
+        return BarSeries(*(getattr(self, name)[-n:] for name, _ in self._DTYPES))
+
+    def pack(self) -> bytes:
+        parts = [self._HEADER.pack(self.MAGIC, len(self))]
+        parts += [np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes()
+                  for name, dtype in self._DTYPES]
+        return b"".join(parts)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "BarSeries":
+        magic, n = cls._HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError("Not a packed bar series")
+        columns, offset = [], cls._HEADER.size
+        for _, dtype in cls._DTYPES:
+            columns.append(np.frombuffer(data, dtype=dtype, count=n, offset=offset))
+            offset += 8 * n
+        return cls(*columns)
+
+    def timestamps(self) -> list[str]:
+        return np.char.replace(np.datetime_as_string(self.ts.astype("datetime64[s]")), "T", " ").tolist()
+
+    def to_points(self) -> list[dict]:
+        """One dict per bar, newest first (the original intraday layout)."""
+        columns = [self.timestamps()] + [getattr(self, name).tolist() for name, _ in self._DTYPES[1:]]
+        return [{"timestamp": ts, "open": o, "high": h, "low": lo, "close": c, "volume": v}
+                for ts, o, h, lo, c, v in zip(*(c[::-1] for c in columns))]
+
+    def to_columns(self) -> dict:
+        """Parallel arrays, oldest first; timestamps as epoch seconds.
+
+        Values stay NumPy arrays, which the JSON encoder writes directly.
+        """
+        return {"timestamp": self.ts, **{name: getattr(self, name) for name, _ in self._DTYPES[1:]}}
+
+
+class BarStore:
+    """Persistent OHLCV history in the price_bars table.
+
+    Bars are fetched incrementally: a symbol seen for the first time gets the
+    full intraday series, after that only the compact series (the latest 100
+    bars) is requested and bars from the last stored timestamp on are
+    upserted, so the still-forming last bar is corrected and nothing already
+    stored is downloaded twice. If the compact series doesn't reach back to
+    the last stored bar (e.g. after a weekend), the full series fills the gap.
+    Reads are range scans on the (symbol, interval, ts) primary key, and the
+    latest bars are cached as a packed BarSeries rather than JSON.
+    """
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def _context(self):
+        # Syncs also run on background cache refresh threads with no app context
+        if has_app_context() or self.app is None:
+            return nullcontext()
+        return self.app.app_context()
+
+    def recent(self, symbol: str, interval: str) -> BarSeries | None:
+        """The latest INTRADAY_DEFAULT_BARS bars, syncing first if they're out of date.
+
+        The packed series is cached for MARKET_DATA_CACHE_TTL, which also
+        limits syncing to once per TTL across workers; past that it is served
+        while a background refresh syncs, for up to MARKET_DATA_STALE_TTL.
+        None if nothing is stored and upstream failed.
+        """
+        # v2: packed BarSeries bytes (v1 entries held JSON bar lists)
+        packed = cache_fetch(f"intraday:v2:{symbol}:{interval}",
+                             lambda: self._sync_recent(symbol, interval),
+                             ttl=Config.MARKET_DATA_CACHE_TTL,
+                             stale_ttl=Config.MARKET_DATA_STALE_TTL)
+        return BarSeries.unpack(packed) if packed is not None else None
+
+    def _sync_recent(self, symbol: str, interval: str) -> bytes | None:
+        synced = self.sync(symbol, interval)
+        series = self.get_series(symbol, interval, limit=Config.INTRADAY_DEFAULT_BARS)
+        if synced is None and not len(series):
+            return None
+        return series.pack()
+
+    def sync(self, symbol: str, interval: str) -> dict | None:
+        """Fetch bars missing since the last stored one; None if upstream failed."""
+        from services.market_data import MarketDataService
+
+        market_service = MarketDataService()
+        with self._context():
+            latest = self.latest_ts(symbol, interval)
+            bars = market_service.fetch_intraday_series(symbol, interval, "compact" if latest else "full")
+            if bars and latest and min(b["ts"] for b in bars) > latest:
+                bars = market_service.fetch_intraday_series(symbol, interval, "full") or bars
+            if bars is None:
+                return None
+
+            rows = [{"symbol": symbol, "interval": interval, **b}
+                    for b in bars if latest is None or b["ts"] >= latest]
+            if rows:
+                self._upsert(rows)
+                latest = max(r["ts"] for r in rows)
+        return {"latest": latest.isoformat() if latest else None, "stored": len(rows)}
+
+    def latest_ts(self, symbol: str, interval: str) -> datetime | None:
+        from models import db, PriceBar
+
+        with self._context():
+            return db.session.execute(
+                select(func.max(PriceBar.ts))
+                .where(PriceBar.symbol == symbol, PriceBar.interval == interval)
+            ).scalar()
+
+    def get_series(self, symbol: str, interval: str, start: datetime | None = None,
+                   end: datetime | None = None, limit: int | None = None) -> BarSeries:
+        """Stored bars in [start, end]; with limit, the latest limit of them."""
+        from models import db, PriceBar
+
+        query = (select(PriceBar.ts, PriceBar.open, PriceBar.high, PriceBar.low,
+                        PriceBar.close, PriceBar.volume)
+                 .where(PriceBar.symbol == symbol, PriceBar.interval == interval)
+                 .order_by(PriceBar.ts.desc()))
+        if start:
+            query = query.where(PriceBar.ts >= start)
+        if end:
+            query = query.where(PriceBar.ts <= end)
+        if limit:
+            query = query.limit(limit)
+        with self._context():
+            rows = db.session.execute(query).all()
+        return BarSeries.from_rows(rows[::-1])
+
+    def _upsert(self, rows: list[dict]):
+        from models import db, PriceBar
+
+        dialect = db.engine.dialect.name
+        try:
+            if dialect in ("postgresql", "sqlite"):
+                if dialect == "postgresql":
+                    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+                stmt = dialect_insert(PriceBar)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["symbol", "interval", "ts"],
+                    set_={field: stmt.excluded[field] for field in BAR_FIELDS},
+                )
+                db.session.execute(stmt, rows)
+            else:
+                first = min(r["ts"] for r in rows)
+                db.session.execute(
+                    delete(PriceBar).where(PriceBar.symbol == rows[0]["symbol"],
+                                           PriceBar.interval == rows[0]["interval"],
+                                           PriceBar.ts >= first))
+                db.session.execute(insert(PriceBar), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+bar_store = BarStore()
@@ -1,68 +1,537 @@
-import json
 import logging
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
+from utils.serialization import dumps, loads
 
 logger = logging.getLogger(__name__)
 
+# Published on every write/delete so other workers drop their L1 copy
+INVALIDATION_CHANNEL = "cache:invalidate"
+
 _redis_client = None
-_memory_cache: dict[str, tuple[float, object]] = {}
+_release_lock_script = None
+_instance_id = uuid.uuid4().hex
+
+_FRAME_RE = re.compile(rb"~([0-9.]+)([|#])")
+
+# Only delete a fill lock if we still own it (it may have expired and been
+# taken by another worker while our loader was running).
+_RELEASE_LOCK_LUA = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class _LocalCache:
+    """Bounded in-process LRU with per-entry expiry and a byte budget.
+
+    Sits in front of Redis as an L1 (short TTL, invalidated via pub/sub) and
+    doubles as the fallback store when Redis is unavailable. Values are shared
+    between callers, so they must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, int, object]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped on every remote invalidation so in-flight Redis reads that
+        # started before it don't repopulate the L1 with a deleted value.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expiry, size, value = entry
+            if time.time() >= expiry:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, ttl: float, size: int, generation: int | None = None):
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self.generation += 1
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
 
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
 
-def _get_redis():
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+_local_cache = _LocalCache(Config.LOCAL_CACHE_MAX_ENTRIES, Config.LOCAL_CACHE_MAX_BYTES)
+
+
+def get_redis():
+    """Return the shared Redis client, or None if Redis is unavailable."""
     global _redis_client
     if _redis_client is None:
         try:
             import redis
-            _redis_client = redis.from_url(Config.REDIS_URL, decode_responses=True)
+            _redis_client = redis.from_url(Config.REDIS_URL)
             _redis_client.ping()
+            _start_invalidation_listener(_redis_client)
         except Exception:
             logger.warning("Redis unavailable, falling back to in-memory cache")
             _redis_client = False  # Mark as unavailable
     return _redis_client if _redis_client else None
 
 
-def cache_get(key: str):
-    """Get a value from cache (Redis or in-memory fallback)."""
-    client = _get_redis()
+def _start_invalidation_listener(client):
+    """Subscribe to invalidation messages from other workers in a daemon thread."""
+
+    def on_message(message):
+        origin, _, key = message["data"].decode().partition(":")
+        if origin != _instance_id:
+            _local_cache.delete(key)
+
+    def on_error(exc, pubsub, thread):
+        # While disconnected we can't see invalidations, so nothing in the L1
+        # can be trusted; drop it and let reads go to Redis until we're back.
+        logger.warning(f"Cache invalidation listener error: {exc}")
+        _local_cache.clear()
+        time.sleep(1)
+
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{INVALIDATION_CHANNEL: on_message})
+    pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=on_error)
+
+
+def _publish_invalidation(pipe, key: str):
+    pipe.publish(INVALIDATION_CHANNEL, f"{_instance_id}:{key}")
+
+
+def _encode(value, soft_expiry: float) -> bytes:
+    """Frame a value as b"~<soft expiry>|<json>" for storage in Redis.
+
+    Bytes values (e.g. packed arrays) are stored as-is behind a "#" separator.
+    """
+    if isinstance(value, bytes):
+        return b"~%.3f#" % soft_expiry + value
+    return b"~%.3f|" % soft_expiry + dumps(value)
+
+
+def _decode(raw: bytes) -> tuple[object, float]:
+    if raw[:1] == b"~":
+        framed = _FRAME_RE.match(raw)
+        payload = raw[framed.end():]
+        if framed.group(2) == b"#":
+            return payload, float(framed.group(1))
+        return loads(payload), float(framed.group(1))
+    # Unframed entries carry no soft TTL and are fresh until Redis expires them
+    return loads(raw), float("inf")
+
+
+def _local_ttl(pttl: int) -> float:
+    """L1 TTL for a value read from Redis: never longer than Redis keeps it."""
+    if pttl < 0:
+        return Config.LOCAL_CACHE_TTL if pttl == -1 else 0  # -1: no expiry, -2: gone
+    return min(Config.LOCAL_CACHE_TTL, pttl / 1000)
+
+
+def _get_entry(key: str) -> tuple[object, float]:
+    """Return (value, soft_expiry) for key, or (None, 0.0) on a miss."""
+    entry = _local_cache.get(key)
+    if entry is not None:
+        return entry
+
+    client = get_redis()
     if client:
         try:
-            val = client.get(key)
-            return json.loads(val) if val else None
+            generation = _local_cache.generation
+            pipe = client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            raw, pttl = pipe.execute()
+            if not raw:
+                return None, 0.0
+            entry = _decode(raw)
+            _local_cache.set(key, entry, _local_ttl(pttl), len(raw), generation)
+            return entry
         except Exception:
             pass
+    return None, 0.0
 
-    # In-memory fallback
-    import time
-    if key in _memory_cache:
-        expiry, value = _memory_cache[key]
-        if time.time() < expiry:
-            return value
-        del _memory_cache[key]
-    return None
 
+def _get_entries(keys: list[str]) -> dict[str, tuple[object, float]]:
+    """Batch form of _get_entry; L1 misses are read with one MGET (and their PTTLs) per round trip."""
+    entries = {}
+    missing = []
+    for key in keys:
+        entry = _local_cache.get(key)
+        if entry is not None:
+            entries[key] = entry
+        else:
+            missing.append(key)
 
-def cache_set(key: str, value, ttl: int = 60):
-    """Set a value in cache with TTL."""
-    client = _get_redis()
+    client = get_redis()
+    if missing and client:
+        try:
+            generation = _local_cache.generation
+            pipe = client.pipeline(transaction=False)
+            pipe.mget(missing)
+            for key in missing:
+                pipe.pttl(key)
+            values, *pttls = pipe.execute()
+            for key, raw, pttl in zip(missing, values, pttls):
+                if raw:
+                    entries[key] = _decode(raw)
+                    _local_cache.set(key, entries[key], _local_ttl(pttl), len(raw), generation)
+        except Exception:
+            pass
+    return entries
+
+
+def cache_get(key: str):
+    """Get a value from cache (L1, then Redis, or in-memory fallback).
+
+    Values past their soft TTL but within their hard TTL are still returned;
+    use cache_fetch to have them refreshed.
+    """
+    value, _ = _get_entry(key)
+    return value
+
+
+def cache_get_many(keys: list[str]) -> dict:
+    """Get several values in one round trip; missing keys are omitted."""
+    return {key: value for key, (value, _) in _get_entries(keys).items()}
+
+
+def cache_set(key: str, value, ttl: int = 60, stale_ttl: int = 0):
+    """Set a value in cache with TTL.
+
+    With stale_ttl, the value is kept for another stale_ttl seconds after it
+    goes stale so that cache_fetch can serve it while refreshing.
+    """
+    soft_expiry = time.time() + ttl
+    hard_ttl = ttl + stale_ttl
+    payload = _encode(value, soft_expiry)
+    entry = (value, soft_expiry)
+    client = get_redis()
     if client:
         try:
-            client.setex(key, ttl, json.dumps(value))
+            pipe = client.pipeline(transaction=False)
+            pipe.setex(key, hard_ttl, payload)
+            _publish_invalidation(pipe, key)
+            pipe.execute()
+            _local_cache.set(key, entry, min(hard_ttl, Config.LOCAL_CACHE_TTL), len(payload))
             return
         except Exception:
             pass
 
     # In-memory fallback
-    import time
-    _memory_cache[key] = (time.time() + ttl, value)
+    _local_cache.set(key, entry, hard_ttl, len(payload))
 
 
 def cache_delete(key: str):
     """Delete a value from cache."""
-    client = _get_redis()
+    _local_cache.delete(key)
+    client = get_redis()
     if client:
         try:
-            client.delete(key)
-            return
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(key)
+            _publish_invalidation(pipe, key)
+            pipe.execute()
         except Exception:
             pass
-    _memory_cache.pop(key, None)
+
+
+class _Flight:
+    """An in-progress cache fill that other callers in this process can wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class _ReadCounter:
+    """Per-key read counts over the current and previous fixed window."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._current: dict[str, int] = {}
+        self._previous: dict[str, int] = {}
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str) -> int:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._started >= self.window:
+                expired = now - self._started >= 2 * self.window
+                self._previous = {} if expired else self._current
+                self._current = {}
+                self._started = now
+            count = self._current.get(key, 0) + 1
+            self._current[key] = count
+            return count + self._previous.get(key, 0)
+
+
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+_refreshing: set[str] = set()
+_refresh_context = threading.local()
+_refresh_executor = ThreadPoolExecutor(max_workers=Config.CACHE_REFRESH_WORKERS,
+                                       thread_name_prefix="cache-refresh")
+_read_counter = _ReadCounter(Config.CACHE_HOT_KEY_WINDOW)
+_refresh_stats = {"stale_hits": 0, "refresh_ahead": 0, "refreshes": 0, "refresh_errors": 0}
+_refresh_stats_lock = threading.Lock()
+
+
+def _count(stat: str):
+    with _refresh_stats_lock:
+        _refresh_stats[stat] += 1
+
+
+def cache_fetch(key: str, loader, ttl: int = 60, stale_ttl: int = 0):
+    """Get a value from cache, calling loader() to fill it on a miss.
+
+    Concurrent misses for the same key are coalesced: within a process only
+    one caller runs the fill and the others wait for its result, and across
+    workers the fill is guarded by a Redis lock so that only one upstream
+    call is in flight per key. A loader result of None is not cached.
+
+    With stale_ttl, a value past its ttl is served immediately while a
+    background refresh runs, and keys read at least CACHE_HOT_KEY_READS
+    times per window are refreshed shortly before they go stale.
+    """
+    entry = _get_entry(key)
+    if entry[0] is None:
+        return _single_flight(key, lambda: _locked_fill(key, loader, ttl, stale_ttl))
+    return _serve(key, entry, loader, ttl, stale_ttl)
+
+
+def cache_fetch_many(loaders: dict, ttl: int = 60, stale_ttl: int = 0, executor=None) -> dict:
+    """Batch form of cache_fetch for a {key: loader} mapping.
+
+    All cached keys are read with a single Redis MGET. Misses are filled
+    through the same single-flight path as cache_fetch, concurrently on
+    executor when one is given. Returns {key: value}, with None for keys
+    whose loader failed or returned nothing.
+    """
+    entries = _get_entries(list(loaders))
+    results = {}
+    misses = []
+    for key, loader in loaders.items():
+        if key in entries:
+            results[key] = _serve(key, entries[key], loader, ttl, stale_ttl)
+        else:
+            misses.append(key)
+
+    def fill(key):
+        return _single_flight(key, lambda: _locked_fill(key, loaders[key], ttl, stale_ttl))
+
+    if executor is not None and len(misses) > 1:
+        futures = {key: executor.submit(fill, key) for key in misses}
+    else:
+        futures = {key: None for key in misses}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result() if future else fill(key)
+        except Exception as e:
+            logger.warning(f"Cache fill failed for {key}: {e}")
+            results[key] = None
+    return results
+
+
+def _serve(key: str, entry: tuple[object, float], loader, ttl: int, stale_ttl: int):
+    """Return a cached value, queueing a refresh if it is stale or hot."""
+    value, soft_expiry = entry
+    if stale_ttl:
+        reads = _read_counter.hit(key)
+        remaining = soft_expiry - time.time()
+        if remaining <= 0:
+            _count("stale_hits")
+            _schedule_refresh(key, loader, ttl, stale_ttl)
+        elif (remaining < ttl * Config.CACHE_REFRESH_AHEAD_FRACTION
+              and reads >= Config.CACHE_HOT_KEY_READS):
+            _count("refresh_ahead")
+            _schedule_refresh(key, loader, ttl, stale_ttl)
+    return value
+
+
+def _single_flight(key: str, fn):
+    with _flights_lock:
+        flight = _flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _flights[key] = _Flight()
+
+    if not is_leader:
+        flight.event.wait(Config.CACHE_FILL_WAIT_TIMEOUT)
+        return flight.result
+
+    try:
+        flight.result = fn()
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.event.set()
+    return flight.result
+
+
+def _acquire_fill_lock(client, key: str) -> str | None:
+    token = uuid.uuid4().hex
+    if client.set(f"lock:{key}", token, nx=True, px=Config.CACHE_FILL_LOCK_TTL * 1000):
+        return token
+    return None
+
+
+def _release_fill_lock(client, key: str, token: str):
+    global _release_lock_script
+    try:
+        if _release_lock_script is None:
+            _release_lock_script = client.register_script(_RELEASE_LOCK_LUA)
+        _release_lock_script(keys=[f"lock:{key}"], args=[token])
+    except Exception:
+        pass
+
+
+def _locked_fill(key: str, loader, ttl: int, stale_ttl: int):
+    client = get_redis()
+    if not client:
+        return _load(key, loader, ttl, stale_ttl)
+
+    try:
+        token = _acquire_fill_lock(client, key)
+    except Exception:
+        return _load(key, loader, ttl, stale_ttl)
+
+    if token:
+        try:
+            # Another worker may have finished a fill between our miss and the lock
+            value = cache_get(key)
+            return value if value is not None else _load(key, loader, ttl, stale_ttl)
+        finally:
+            _release_fill_lock(client, key, token)
+
+    # Another worker is filling this key; wait for its result
+    deadline = time.monotonic() + Config.CACHE_FILL_WAIT_TIMEOUT
+    try:
+        while time.monotonic() < deadline:
+            time.sleep(Config.CACHE_FILL_POLL_INTERVAL)
+            value = cache_get(key)
+            if value is not None:
+                return value
+            if not client.exists(f"lock:{key}"):
+                # Lock released without a value: the fill failed upstream
+                return cache_get(key)
+    except Exception:
+        pass
+    return None
+
+
+def _load(key: str, loader, ttl: int, stale_ttl: int = 0):
+    value = loader()
+    if value is not None:
+        cache_set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+    return value
+
+
+def _schedule_refresh(key: str, loader, ttl: int, stale_ttl: int):
+    with _flights_lock:
+        if key in _refreshing or key in _flights:
+            return
+        _refreshing.add(key)
+    try:
+        _refresh_executor.submit(_refresh, key, loader, ttl, stale_ttl)
+    except RuntimeError:
+        # Executor is shut down during interpreter exit
+        with _flights_lock:
+            _refreshing.discard(key)
+
+
+def is_background_refresh() -> bool:
+    """True while running a loader for a background (stale/refresh-ahead) refresh."""
+    return getattr(_refresh_context, "active", False)
+
+
+def _refresh(key: str, loader, ttl: int, stale_ttl: int):
+    client = get_redis()
+    token = None
+    _refresh_context.active = True
+    try:
+        if client:
+            token = _acquire_fill_lock(client, key)
+            if not token:
+                return  # Another worker is already refreshing this key
+        _load(key, loader, ttl, stale_ttl)
+        _count("refreshes")
+    except Exception as e:
+        _count("refresh_errors")
+        logger.warning(f"Background refresh failed for {key}: {e}")
+    finally:
+        _refresh_context.active = False
+        if token:
+            _release_fill_lock(client, key, token)
+        with _flights_lock:
+            _refreshing.discard(key)
+
+
+def cache_stats() -> dict:
+    """Return L1, fill and refresh counters for this worker."""
+    with _refresh_stats_lock:
+        refresh_stats = dict(_refresh_stats)
+    return {
+        "backend": "redis" if get_redis() else "memory",
+        "local": _local_cache.stats(),
+        "fills_in_flight": len(_flights),
+        "refreshes_in_flight": len(_refreshing),
+        **refresh_stats,
+    }
@@ -0,0 +1,151 @@
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# REST session retries leave out 429: rate-limited callers requeue through
+# their own limiter instead of sleeping on a pooled connection
+SESSION_RETRY_STATUSES = (500, 502, 503, 504)
+
+_session = None
+_h2_client = None
+_init_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_host_stats: dict[str, dict] = {}
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    cap = min(Config.HTTP_BACKOFF_MAX, Config.HTTP_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+def _pool_size(host: str) -> int:
+    return Config.HTTP_POOL_SIZES.get(host, Config.HTTP_POOL_DEFAULT_SIZE)
+
+
+def _timeout() -> tuple[float, float]:
+    return (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+
+
+def _record(host: str, elapsed: float, error: bool = False, retries: int = 0):
+    with _stats_lock:
+        stats = _host_stats.setdefault(
+            host, {"requests": 0, "errors": 0, "retries": 0, "total_time": 0.0})
+        stats["requests"] += 1
+        stats["errors"] += int(error)
+        stats["retries"] += retries
+        stats["total_time"] += elapsed
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide keep-alive session used for upstream REST APIs."""
+    global _session
+    if _session is None:
+        with _init_lock:
+            if _session is None:
+                session = requests.Session()
+                retry = Retry(
+                    total=Config.HTTP_MAX_RETRIES,
+                    backoff_factor=Config.HTTP_BACKOFF_BASE,
+                    backoff_max=Config.HTTP_BACKOFF_MAX,
+                    backoff_jitter=Config.HTTP_BACKOFF_BASE,
+                    status_forcelist=SESSION_RETRY_STATUSES,
+                    allowed_methods=frozenset({"GET", "HEAD"}),
+                    raise_on_status=False,
+                )
+                for host, size in Config.HTTP_POOL_SIZES.items():
+                    session.mount(f"https://{host}/", HTTPAdapter(
+                        pool_connections=1, pool_maxsize=size, pool_block=True, max_retries=retry))
+                default_size = Config.HTTP_POOL_DEFAULT_SIZE
+                session.mount("https://", HTTPAdapter(
+                    pool_connections=10, pool_maxsize=default_size, max_retries=retry))
+                _session = session
+    return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared session with pooled connections, retries and timeouts."""
+    kwargs.setdefault("timeout", _timeout())
+    host = urlsplit(url).hostname or ""
+    start = time.monotonic()
+    try:
+        resp = get_session().get(url, **kwargs)
+    except requests.RequestException:
+        _record(host, time.monotonic() - start, error=True)
+        raise
+    retries = resp.raw.retries.history if resp.raw is not None and resp.raw.retries else ()
+    _record(host, time.monotonic() - start, error=resp.status_code >= 400, retries=len(retries))
+    return resp
+
+
+def h2_client() -> httpx.Client:
+    """Return the process-wide HTTP/2 client (used for APNs)."""
+    global _h2_client
+    if _h2_client is None:
+        with _init_lock:
+            if _h2_client is None:
+                transport = httpx.HTTPTransport(
+                    http2=True,
+                    retries=Config.HTTP_MAX_RETRIES,  # connection errors only
+                    limits=httpx.Limits(
+                        max_connections=_pool_size(urlsplit(Config.APNS_URL).hostname),
+                        keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                _h2_client = httpx.Client(
+                    transport=transport,
+                    timeout=httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT),
+                )
+    return _h2_client
+
+
+def h2_post(url: str, **kwargs) -> httpx.Response:
+    """POST over the shared HTTP/2 client, retrying 429/5xx with jittered backoff."""
+    host = urlsplit(url).hostname or ""
+    start = time.monotonic()
+    for attempt in range(Config.HTTP_MAX_RETRIES + 1):
+        last_attempt = attempt == Config.HTTP_MAX_RETRIES
+        try:
+            resp = h2_client().post(url, **kwargs)
+        except httpx.TransportError:
+            if last_attempt:
+                _record(host, time.monotonic() - start, error=True, retries=attempt)
+                raise
+        else:
+            if resp.status_code not in RETRY_STATUSES or last_attempt:
+                _record(host, time.monotonic() - start,
+                        error=resp.status_code >= 400, retries=attempt)
+                return resp
+        time.sleep(backoff_delay(attempt))
+
+
+def pool_stats() -> dict:
+    """Per-host request/error/retry counters and connection pool occupancy."""
+    with _stats_lock:
+        stats = {
+            host: {**s, "avg_time": round(s["total_time"] / s["requests"], 4) if s["requests"] else 0.0}
+            for host, s in _host_stats.items()
+        }
+
+    if _session is not None:
+        for adapter in _session.adapters.values():
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                stats.setdefault(pool.host, {}).update({
+                    "pool_size": pool.pool.maxsize if pool.pool else 0,
+                    "idle_connections": pool.pool.qsize() if pool.pool else 0,
+                    "connections_opened": pool.num_connections,
+                })
+    return stats
@@ -0,0 +1,270 @@
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from config import Config
+from services.bar_store import bar_store
+from services.cache import cache_get, cache_set
+
+logger = logging.getLogger(__name__)
+
+# Each EMA block keeps decay**-n within this range so cumsum stays precise
+_EMA_BLOCK_RANGE = 1e6
+
+
+def _ema(x: np.ndarray, alpha: float, last: float) -> tuple[np.ndarray, float]:
+    """EMA of x continuing from the previous value last, without a Python loop per element.
+
+    y[t] = decay**(t+1) * (last + alpha * sum(x[j] / decay**(j+1) for j <= t)),
+    evaluated in blocks short enough that the scaling doesn't lose precision.
+    """
+    decay = 1.0 - alpha
+    if decay <= 0:
+        return x.astype(float), float(x[-1]) if len(x) else last
+    out = np.empty(len(x))
+    block = max(1, int(np.log(_EMA_BLOCK_RANGE) / -np.log(decay)))
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[start:start + len(chunk)] = powers * (last + alpha * np.cumsum(chunk / powers))
+        last = out[start + len(chunk) - 1]
+    return out, float(last)
+
+
+def _seeded_ema(x: np.ndarray, period: int, alpha: float, state: dict) -> tuple[np.ndarray, dict]:
+    """EMA seeded with the mean of its first `period` inputs; NaN until then.
+
+    NaN inputs are skipped and leave the state unchanged.
+    """
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    values = x[valid]
+    value, seed = state["value"], list(state["seed"])
+    start = 0
+    if value is None:
+        start = min(period - len(seed), len(values))
+        seed += values[:start].tolist()
+        if len(seed) < period:
+            return out, {"value": None, "seed": seed}
+        value = float(np.mean(seed))
+        out[valid[start - 1]] = value
+    if start < len(values):
+        out[valid[start:]], value = _ema(values[start:], alpha, value)
+    return out, {"value": value, "seed": []}
+
+
+def _ema_state() -> dict:
+    return {"value": None, "seed": []}
+
+
+class Indicator(ABC):
+    """A technical indicator over close prices with resumable state.
+
+    update(state, close) continues the series from state over new closes and
+    returns ({output: values}, new state), so computing from scratch and
+    catching up on new bars are the same call. State is JSON-serializable and
+    O(1) in the series length (O(period) for windowed indicators).
+    """
+
+    name = ""
+    defaults: tuple = ()
+    outputs: tuple = ()
+
+    def __init__(self, *params):
+        self.params = params or self.defaults
+
+    @property
+    def key(self) -> str:
+        return ":".join([self.name, *(f"{p:g}" for p in self.params)])
+
+    @abstractmethod
+    def initial_state(self) -> dict:
+        """State before the first close."""
+
+    @abstractmethod
+    def update(self, state: dict, close: np.ndarray) -> tuple[dict, dict]:
+        """Outputs for the new closes and the state after them."""
+
+
+class _Windowed(Indicator):
+    """Indicators over the trailing `period` closes; state keeps the last period - 1."""
+
+    def initial_state(self) -> dict:
+        return {"window": []}
+
+    def _windows(self, state: dict, close: np.ndarray) -> tuple[np.ndarray, int, dict]:
+        period = int(self.params[0])
+        buf = np.concatenate((np.asarray(state["window"], dtype=float), close))
+        first = period - 1 - len(state["window"])  # first index of close with a full window
+        windows = sliding_window_view(buf, period) if len(buf) >= period else np.empty((0, period))
+        return windows, first, {"window": buf[max(0, len(buf) - period + 1):].tolist() if period > 1 else []}
+
+
+class SMA(_Windowed):
+    name = "sma"
+    defaults = (20,)
+    outputs = ("sma",)
+
+    def update(self, state, close):
+        windows, first, state = self._windows(state, close)
+        sma = np.full(len(close), np.nan)
+        sma[first:] = windows.mean(axis=1)
+        return {"sma": sma}, state
+
+
+class BollingerBands(_Windowed):
+    name = "bbands"
+    defaults = (20, 2)
+    outputs = ("middle", "upper", "lower")
+
+    def update(self, state, close):
+        windows, first, state = self._windows(state, close)
+        middle, upper, lower = (np.full(len(close), np.nan) for _ in range(3))
+        mean, std = windows.mean(axis=1), windows.std(axis=1)
+        middle[first:] = mean
+        upper[first:] = mean + self.params[1] * std
+        lower[first:] = mean - self.params[1] * std
+        return {"middle": middle, "upper": upper, "lower": lower}, state
+
+
+class EMA(Indicator):
+    name = "ema"
+    defaults = (20,)
+    outputs = ("ema",)
+
+    def initial_state(self):
+        return _ema_state()
+
+    def update(self, state, close):
+        period = int(self.params[0])
+        ema, state = _seeded_ema(close, period, 2 / (period + 1), state)
+        return {"ema": ema}, state
+
+
+class RSI(Indicator):
+    """Wilder's RSI: smoothed average gain over average loss."""
+
+    name = "rsi"
+    defaults = (14,)
+    outputs = ("rsi",)
+
+    def initial_state(self):
+        return {"prev": None, "gain": _ema_state(), "loss": _ema_state()}
+
+    def update(self, state, close):
+        period = int(self.params[0])
+        if state["prev"] is None:
+            change = np.concatenate(([np.nan], np.diff(close)))
+        else:
+            change = np.diff(np.concatenate(([state["prev"]], close)))
+        # clip keeps the leading NaN, so the first close isn't counted as a change
+        gain, gain_state = _seeded_ema(np.clip(change, 0, None), period, 1 / period, state["gain"])
+        loss, loss_state = _seeded_ema(np.clip(-change, 0, None), period, 1 / period, state["loss"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100 - 100 / (1 + gain / loss))
+        rsi[np.isnan(gain)] = np.nan
+        prev = float(close[-1]) if len(close) else state["prev"]
+        return {"rsi": rsi}, {"prev": prev, "gain": gain_state, "loss": loss_state}
+
+
+class MACD(Indicator):
+    name = "macd"
+    defaults = (12, 26, 9)
+    outputs = ("macd", "signal", "histogram")
+
+    def initial_state(self):
+        return {"fast": _ema_state(), "slow": _ema_state(), "signal": _ema_state()}
+
+    def update(self, state, close):
+        fast, slow, signal = (int(p) for p in self.params)
+        fast_ema, fast_state = _seeded_ema(close, fast, 2 / (fast + 1), state["fast"])
+        slow_ema, slow_state = _seeded_ema(close, slow, 2 / (slow + 1), state["slow"])
+        macd = fast_ema - slow_ema
+        signal_ema, signal_state = _seeded_ema(macd, signal, 2 / (signal + 1), state["signal"])
+        return ({"macd": macd, "signal": signal_ema, "histogram": macd - signal_ema},
+                {"fast": fast_state, "slow": slow_state, "signal": signal_state})
+
+
+INDICATORS = {cls.name: cls for cls in (SMA, EMA, RSI, MACD, BollingerBands)}
+
+
+def parse_indicator(spec: str) -> Indicator:
+    """Parse "name[:param...]" such as "rsi", "sma:50" or "macd:12:26:9"."""
+    name, *params = spec.strip().lower().split(":")
+    cls = INDICATORS.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown indicator '{name}' (expected one of {', '.join(INDICATORS)})")
+    if params and len(params) != len(cls.defaults):
+        raise ValueError(f"{name} takes {len(cls.defaults)} parameters")
+    try:
+        values = tuple(float(p) for p in params)
+    except ValueError:
+        raise ValueError(f"Invalid parameters for {name}: {':'.join(params)}")
+    # The first parameters are periods; Bollinger's band width may be fractional
+    periods = values[:len(values) - 1] if cls is BollingerBands else values
+    if any(p != int(p) or not 1 <= p <= Config.INDICATOR_MAX_PERIOD for p in periods):
+        raise ValueError(f"{name} periods must be integers from 1 to {Config.INDICATOR_MAX_PERIOD}")
+    if any(v <= 0 for v in values):
+        raise ValueError(f"{name} parameters must be positive")
+    return cls(*values)
+
+
+def _from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+def indicator_series(symbol: str, interval: str, indicator: Indicator) -> dict:
+    """Indicator values over the stored bars, updated incrementally.
+
+    The cached entry holds the indicator state as of the second-to-last bar,
+    plus values for up to INDICATOR_HISTORY_BARS bars. Only bars after that
+    state are read and run through update(); the last bar may still be
+    forming, so it is recomputed on every update rather than folded into
+    the state.
+    """
+    key = f"indicator:{symbol}:{interval}:{indicator.key}"
+    entry = cache_get(key)
+    if entry and entry["state_ts"] is not None:
+        bars = bar_store.get_series(symbol, interval, start=_from_epoch(entry["state_ts"]) + timedelta(seconds=1))
+        if len(bars) > Config.INDICATOR_HISTORY_BARS:
+            entry = None
+    else:
+        entry = None
+    if entry is None:
+        bars = bar_store.get_series(symbol, interval, limit=Config.INDICATOR_HISTORY_BARS)
+        entry = {"state_ts": None, "state": indicator.initial_state(), "ts": [],
+                 "values": {name: [] for name in indicator.outputs}}
+    if not len(bars):
+        return entry
+
+    # Drop the previous provisional bar; it is included in bars again
+    keep = len(entry["ts"]) - 1 if entry["state_ts"] is not None else 0
+    committed, state = indicator.update(entry["state"], bars.close[:-1])
+    provisional, _ = indicator.update(state, bars.close[-1:])
+
+    history = Config.INDICATOR_HISTORY_BARS
+    entry = {
+        "state_ts": int(bars.ts[-2]) if len(bars) > 1 else entry["state_ts"],
+        "state": state,
+        "ts": (entry["ts"][:keep] + bars.ts.tolist())[-history:],
+        "values": {name: (entry["values"][name][:keep] + committed[name].tolist()
+                          + provisional[name].tolist())[-history:]
+                   for name in indicator.outputs},
+    }
+    cache_set(key, entry, ttl=Config.INDICATOR_CACHE_TTL)
+    return entry
+
+
+def compute_indicators(symbol: str, interval: str, indicators: list[Indicator], limit: int) -> dict:
+    """The last `limit` values of each indicator, aligned on shared timestamps."""
+    entries = {ind.key: indicator_series(symbol, interval, ind) for ind in indicators}
+    timestamps = max((e["ts"][-limit:] for e in entries.values()), key=len, default=[])
+    result = {}
+    for name, entry in entries.items():
+        pad = len(timestamps) - len(entry["ts"][-limit:])
+        result[name] = {
+            output: [None] * pad + [None if v != v else round(v, 6) for v in values[-limit:]]
+            for output, values in entry["values"].items()
+        }
+    return {"timestamp": timestamps, "indicators": result}
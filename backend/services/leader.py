@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import uuid
+from sqlalchemy import text
+from services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Renew the lease if we hold it, otherwise take it if it's free.
+_HEARTBEAT_LUA = """
+local holder = redis.call("GET", KEYS[1])
+if holder == ARGV[1] then
+    redis.call("PEXPIRE", KEYS[1], ARGV[2])
+    return 1
+end
+if not holder then
+    redis.call("SET", KEYS[1], ARGV[1], "PX", ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RELEASE_LUA = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    """An expiring Redis lease that elects one process to run a singleton task.
+
+    Call heartbeat() more often than ttl; if the holder dies its lease
+    expires and the next heartbeat from another process takes over. Without
+    Redis, a lease created with pg_fallback holds a Postgres session-level
+    advisory lock instead (released when the holder's connection dies, and
+    heartbeat() must then run inside an app context); otherwise every
+    process considers itself the leader.
+    """
+
+    def __init__(self, name: str, ttl: float, pg_fallback: bool = False):
+        self.key = f"leader:{name}"
+        self.ttl_ms = int(ttl * 1000)
+        self.token = uuid.uuid4().hex
+        self.is_leader = False
+        self.pg_fallback = pg_fallback
+        self._pg_key = int.from_bytes(hashlib.sha1(self.key.encode()).digest()[:8], "big", signed=True)
+        self._pg_conn = None
+        self._pg_locked = False
+        self._heartbeat_script = None
+        self._release_script = None
+
+    def heartbeat(self) -> bool:
+        client = get_redis()
+        was_leader = self.is_leader
+        if not client:
+            self.is_leader = self._pg_heartbeat() if self.pg_fallback else True
+        else:
+            try:
+                if self._heartbeat_script is None:
+                    self._heartbeat_script = client.register_script(_HEARTBEAT_LUA)
+                self.is_leader = bool(self._heartbeat_script(keys=[self.key], args=[self.token, self.ttl_ms]))
+            except Exception as e:
+                logger.warning(f"Lease heartbeat failed for {self.key}: {e}")
+                self.is_leader = False
+        if self.is_leader != was_leader:
+            logger.info(f"{'Acquired' if self.is_leader else 'Lost'} lease {self.key}")
+        return self.is_leader
+
+    def _pg_heartbeat(self) -> bool:
+        from models import db
+
+        if db.engine.dialect.name != "postgresql":
+            return True  # No advisory locks (e.g. SQLite in development)
+        try:
+            if self._pg_conn is None:
+                # Dedicated autocommit connection: the lock lives as long as it does
+                self._pg_conn = db.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            if self._pg_locked:
+                self._pg_conn.execute(text("SELECT 1"))
+            else:
+                self._pg_locked = bool(self._pg_conn.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": self._pg_key}).scalar())
+            return self._pg_locked
+        except Exception as e:
+            logger.warning(f"Advisory lock heartbeat failed for {self.key}: {e}")
+            self._close_pg()
+            return False
+
+    def _close_pg(self):
+        if self._pg_conn is not None:
+            try:
+                self._pg_conn.close()
+            except Exception:
+                pass
+        self._pg_conn = None
+        self._pg_locked = False
+
+    def release(self):
+        client = get_redis()
+        if client and self.is_leader:
+            try:
+                if self._release_script is None:
+                    self._release_script = client.register_script(_RELEASE_LUA)
+                self._release_script(keys=[self.key], args=[self.token])
+            except Exception:
+                pass
+        self._close_pg()
+        self.is_leader = False
@@ -1,7 +1,24 @@
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import requests
 from config import Config
-from services.cache import cache_get, cache_set
+from services import http_pool, rate_limit
+from services.bar_store import BarSeries, bar_store
+from services.cache import cache_fetch, cache_fetch_many, cache_get, cache_set, is_background_refresh
+from services.indicators import compute_indicators
+from services.options_chain import OptionsChain
+
+logger = logging.getLogger(__name__)
+
+# v2: packed OptionsChain bytes (v1 entries held the JSON chain)
+OPTIONS_KEY_PREFIX = "options:v2:"
+
+# Shared across requests so batch fan-out never exceeds the upstream concurrency budget
+_upstream_pool = ThreadPoolExecutor(max_workers=Config.ALPHA_VANTAGE_MAX_CONCURRENCY,
+                                    thread_name_prefix="alpha-vantage")
 
 
 class MarketDataService:
@@ -11,26 +28,62 @@ class MarketDataService:
         self.api_key = Config.ALPHA_VANTAGE_API_KEY
         self.base_url = Config.ALPHA_VANTAGE_BASE_URL
 
-    def _request(self, params: dict) -> dict | None:
+    def _request(self, params: dict, priority: str | None = None, raw: bool = False) -> dict | str | None:
+        if priority is None:
+            priority = rate_limit.REFRESH if is_background_refresh() else rate_limit.INTERACTIVE
         params["apikey"] = self.api_key
-        try:
-            resp = requests.get(self.base_url, params=params, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            if "Error Message" in data or "Note" in data:
+        deadline = time.monotonic() + Config.ALPHA_VANTAGE_PRIORITY_DEADLINES[priority]
+        while rate_limit.alpha_vantage_limiter.acquire(priority, deadline):
+            try:
+                resp = http_pool.get(self.base_url, params=params)
+                if resp.status_code == 429:
+                    logger.warning(f"Alpha Vantage returned 429 for {params.get('function')}")
+                    rate_limit.alpha_vantage_limiter.penalize()
+                    continue
+                resp.raise_for_status()
+                if raw and not resp.text.lstrip().startswith("{"):
+                    return resp.text  # CSV endpoints answer errors in JSON
+                data = resp.json()
+            except (requests.RequestException, ValueError):
+                return None
+            if "Note" in data:
+                # Over quota despite the limiter (e.g. key shared elsewhere):
+                # drain the shared bucket and wait again within our deadline
+                logger.warning(f"Alpha Vantage throttled {params.get('function')}: {data['Note']}")
+                rate_limit.alpha_vantage_limiter.penalize()
+                continue
+            if "Error Message" in data:
                 return None
             return data
-        except requests.RequestException:
-            return None
+        logger.warning(f"Alpha Vantage rate limit deadline exceeded for {params.get('function')} ({priority})")
+        return None
 
     def get_quote(self, ticker: str, market: str = "US") -> dict | None:
         """Get real-time quote for a ticker."""
         symbol = self._resolve_symbol(ticker, market)
-        cache_key = f"quote:{symbol}"
-        cached = cache_get(cache_key)
-        if cached:
-            return cached
+        return cache_fetch(f"quote:{symbol}",
+                           lambda: self._fetch_quote(ticker, symbol, market),
+                           ttl=Config.MARKET_DATA_CACHE_TTL,
+                           stale_ttl=Config.MARKET_DATA_STALE_TTL)
 
+    def get_quotes(self, tickers: list[str], market: str = "US") -> dict:
+        """Get quotes for many tickers at once.
+
+        Cached quotes are read in one round trip and misses are fetched
+        concurrently. Returns {ticker: quote or None}.
+        """
+        loaders = {}
+        keys = {}
+        for ticker in dict.fromkeys(tickers):
+            symbol = self._resolve_symbol(ticker, market)
+            keys[ticker] = f"quote:{symbol}"
+            loaders[keys[ticker]] = (lambda t=ticker, s=symbol: self._fetch_quote(t, s, market))
+        results = cache_fetch_many(loaders, ttl=Config.MARKET_DATA_CACHE_TTL,
+                                   stale_ttl=Config.MARKET_DATA_STALE_TTL,
+                                   executor=_upstream_pool)
+        return {ticker: results.get(key) for ticker, key in keys.items()}
+
+    def _fetch_quote(self, ticker: str, symbol: str, market: str) -> dict | None:
         data = self._request({
             "function": "GLOBAL_QUOTE",
             "symbol": symbol,
@@ -53,61 +106,137 @@ class MarketDataService:
             "previous_close": float(quote.get("08. previous close", 0)),
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        cache_set(cache_key, result, ttl=Config.MARKET_DATA_CACHE_TTL)
         return result
 
-    def get_intraday(self, ticker: str, interval: str = "5min", market: str = "US") -> dict | None:
-        """Get intraday time series data."""
+    def get_intraday(self, ticker: str, interval: str = "5min", market: str = "US",
+                     start: datetime | None = None, end: datetime | None = None,
+                     limit: int | None = None, columnar: bool = False) -> dict | None:
+        """Get intraday bars from the local store.
+
+        Bars come as a list of points, newest first, or with columnar=True as
+        parallel arrays, oldest first.
+        """
+        symbol = self._resolve_symbol(ticker, market)
+        series = self.get_intraday_series(ticker, interval, market, start, end, limit)
+        if series is None:
+            return None
+
+        result = {"ticker": ticker, "symbol": symbol, "market": market, "interval": interval}
+        if columnar:
+            result["columns"] = series.to_columns()
+        else:
+            result["data"] = series.to_points()
+        return result
+
+    def get_intraday_series(self, ticker: str, interval: str = "5min", market: str = "US",
+                            start: datetime | None = None, end: datetime | None = None,
+                            limit: int | None = None) -> BarSeries | None:
+        """Intraday bars as a BarSeries, oldest first.
+
+        The store is synced with only the bars missing since the last stored
+        one; start/end select any stored range, beyond the compact window.
+        """
+        symbol = self._resolve_symbol(ticker, market)
+        limit = limit or Config.INTRADAY_DEFAULT_BARS
+        recent = bar_store.recent(symbol, interval)
+        if start is None and end is None and limit <= Config.INTRADAY_DEFAULT_BARS:
+            return recent.tail(limit) if recent is not None else None
+        series = bar_store.get_series(symbol, interval, start, end, limit)
+        if recent is None and not len(series):
+            return None
+        return series
+
+    def get_indicators(self, ticker: str, interval: str, market: str,
+                       indicators: list, limit: int) -> dict | None:
+        """Technical indicators over the stored intraday bars, oldest first."""
         symbol = self._resolve_symbol(ticker, market)
-        cache_key = f"intraday:{symbol}:{interval}"
-        cached = cache_get(cache_key)
-        if cached:
-            return cached
+        if bar_store.recent(symbol, interval) is None:  # syncs new bars first
+            return None
+        result = {"ticker": ticker, "symbol": symbol, "market": market, "interval": interval,
+                  **compute_indicators(symbol, interval, indicators, limit)}
+        return result
 
+    def fetch_intraday_series(self, symbol: str, interval: str, outputsize: str = "compact") -> list | None:
+        """Fetch raw intraday bars ({ts, open, high, low, close, volume}) from Alpha Vantage."""
         data = self._request({
             "function": "TIME_SERIES_INTRADAY",
             "symbol": symbol,
             "interval": interval,
-            "outputsize": "compact",
+            "outputsize": outputsize,
         })
         series_key = f"Time Series ({interval})"
         if not data or series_key not in data:
             return None
 
-        points = []
+        bars = []
         for timestamp, values in data[series_key].items():
-            points.append({
-                "timestamp": timestamp,
+            bars.append({
+                "ts": datetime.fromisoformat(timestamp),
                 "open": float(values["1. open"]),
                 "high": float(values["2. high"]),
                 "low": float(values["3. low"]),
                 "close": float(values["4. close"]),
                 "volume": int(values["5. volume"]),
             })
+        return bars
+
+    def get_options_chain(self, ticker: str, strike_window: float | None = None, columnar: bool = False,
+                          **filters) -> dict | None:
+        """Get options chain data (realtime options from Alpha Vantage), filtered server-side.
+
+        filters are OptionsChain.select() arguments; strike_window keeps
+        strikes within that fraction of spot (the cached quote price, else the
+        put-call parity estimate). Totals cover the whole chain.
+        """
+        chain = self.get_options_chain_arrays(ticker)
+        if chain is None:
+            return None
+        quote = cache_get(f"quote:{ticker}")
+        spot = (quote or {}).get("price") or (None if math.isnan(chain.spot) else chain.spot)
+        if strike_window is not None and spot:
+            low, high = spot * (1 - strike_window), spot * (1 + strike_window)
+            filters["min_strike"] = max(filters.get("min_strike") or low, low)
+            filters["max_strike"] = min(filters.get("max_strike") or high, high)
 
-        result = {"ticker": ticker, "symbol": symbol, "market": market,
-                  "interval": interval, "data": points}
-        cache_set(cache_key, result, ttl=Config.MARKET_DATA_CACHE_TTL)
+        index = chain.select(**filters)
+        result = {"ticker": ticker, "spot": round(spot, 4) if spot else None,
+                  "expirations": chain.expirations.tolist(), "count": len(index),
+                  "total_call_volume": int(chain.volume[chain.is_call].sum()),
+                  "total_put_volume": int(chain.volume[~chain.is_call].sum())}
+        if columnar:
+            result["columns"] = chain.to_columns(index)
+        else:
+            result["calls"], result["puts"] = chain.to_entries(index)
         return result
 
-    def get_options_chain(self, ticker: str) -> dict | None:
-        """Get options chain data (realtime options from Alpha Vantage)."""
-        cache_key = f"options:{ticker}"
-        cached = cache_get(cache_key)
-        if cached:
-            return cached
+    def get_options_chain_arrays(self, ticker: str) -> OptionsChain | None:
+        """The options chain in its cached columnar layout."""
+        packed = cache_fetch(f"{OPTIONS_KEY_PREFIX}{ticker}", lambda: self._fetch_options_chain(ticker),
+                             ttl=Config.MARKET_DATA_CACHE_TTL,
+                             stale_ttl=Config.MARKET_DATA_STALE_TTL)
+        return OptionsChain.unpack(packed) if packed is not None else None
 
+    def refresh_options_chain(self, ticker: str) -> OptionsChain | None:
+        """Fetch the options chain at background priority and re-cache it."""
+        packed = self._fetch_options_chain(ticker, priority=rate_limit.REFRESH)
+        if packed is None:
+            return None
+        cache_set(f"{OPTIONS_KEY_PREFIX}{ticker}", packed, ttl=Config.MARKET_DATA_CACHE_TTL,
+                  stale_ttl=Config.MARKET_DATA_STALE_TTL)
+        return OptionsChain.unpack(packed)
+
+    def _fetch_options_chain(self, ticker: str, priority: str | None = None) -> bytes | None:
         data = self._request({
             "function": "REALTIME_OPTIONS",
             "symbol": ticker,
-        })
+        }, priority=priority)
         if not data or "data" not in data:
             return None
 
-        calls = []
-        puts = []
-        for option in data["data"]:
-            entry = {
+        contracts = [
+            {
+                "contract_id": option.get("contractID"),
+                "is_call": option.get("type", "").lower() == "call",
                 "strike": float(option.get("strike", 0)),
                 "expiration": option.get("expiration"),
                 "last_price": float(option.get("last", 0)),
@@ -117,25 +246,32 @@ class MarketDataService:
                 "open_interest": int(option.get("open_interest", 0)),
                 "implied_volatility": float(option.get("implied_volatility", 0)),
             }
-            if option.get("type", "").lower() == "call":
-                calls.append(entry)
-            else:
-                puts.append(entry)
-
-        result = {"ticker": ticker, "calls": calls, "puts": puts,
-                  "total_call_volume": sum(c["volume"] for c in calls),
-                  "total_put_volume": sum(p["volume"] for p in puts)}
-        cache_set(cache_key, result, ttl=Config.MARKET_DATA_CACHE_TTL)
-        return result
+            for option in data["data"]
+        ]
+        return OptionsChain.from_contracts(ticker, contracts).pack()
+
+    def search(self, query: str, market: str | None = None) -> list:
+        """Search for stock tickers.
+
+        Answered from the local symbol index; Alpha Vantage is only asked
+        (and the answer cached) when the index has no match.
+        """
+        from services.symbol_search import symbol_search
 
-    def search(self, query: str) -> list:
-        """Search for stock tickers."""
+        results = symbol_search.search(query, market=market)
+        if results:
+            return results
+        key = f"symbol_search:{' '.join(query.lower().split())}"
+        return cache_fetch(key, lambda: self._search_upstream(query),
+                           ttl=Config.SYMBOL_SEARCH_CACHE_TTL) or []
+
+    def _search_upstream(self, query: str) -> list | None:
         data = self._request({
             "function": "SYMBOL_SEARCH",
             "keywords": query,
-        })
+        }, priority=rate_limit.SEARCH)
         if not data or "bestMatches" not in data:
-            return []
+            return None
         return [
             {
                 "symbol": m["1. symbol"],
@@ -146,6 +282,11 @@ class MarketDataService:
             for m in data["bestMatches"]
         ]
 
+    def fetch_listings(self) -> str | None:
+        """Download the active US listings as LISTING_STATUS CSV."""
+        return self._request({"function": "LISTING_STATUS", "state": "active"},
+                             priority=rate_limit.REFRESH, raw=True)
+
     def get_market_status(self) -> dict:
         """Get market open/close status for US and Indian markets."""
         now = datetime.now(timezone.utc)
@@ -1,11 +1,18 @@
+import json
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import jwt
-import httpx
 from config import Config
+from services import http_pool
 
 logger = logging.getLogger(__name__)
 
+# Registered iPhones are stored as user preferences, one row per device:
+# key "apns_device_token:<token>", value the token, category "notifications"
+DEVICE_TOKEN_KEY_PREFIX = "apns_device_token:"
+
 
 class APNsService:
     """Apple Push Notification service for iPhone alerts."""
@@ -15,46 +22,64 @@ class APNsService:
         self.team_id = Config.APNS_TEAM_ID
         self.bundle_id = Config.APNS_BUNDLE_ID
         self.key_path = Config.APNS_KEY_PATH
+        self._key = None
         self._token = None
         self._token_time = 0
+        self._lock = threading.Lock()
+        # Each thread drives one HTTP/2 stream on the shared connection
+        self._pool = ThreadPoolExecutor(max_workers=Config.APNS_CONCURRENCY,
+                                        thread_name_prefix="apns")
 
-    def _get_auth_token(self) -> str:
-        """Generate or return cached JWT for APNs authentication."""
-        now = time.time()
-        if self._token and (now - self._token_time) < 3000:
-            return self._token
+    def _get_auth_token(self, expired: str | None = None) -> str:
+        """Generate or return cached JWT for APNs authentication.
 
-        try:
-            with open(self.key_path, "r") as f:
-                key = f.read()
-        except FileNotFoundError:
-            logger.error(f"APNs key not found at {self.key_path}")
-            return ""
+        expired is a token APNs rejected; it is re-signed only if it is still
+        the cached one, so concurrent senders that hit the same rejection
+        share a single refresh.
+        """
+        with self._lock:
+            now = time.time()
+            stale = expired is not None and self._token == expired
+            if self._token and not stale and (now - self._token_time) < 3000:
+                return self._token
 
-        payload = {"iss": self.team_id, "iat": int(now)}
-        self._token = jwt.encode(payload, key, algorithm="ES256",
-                                 headers={"kid": self.key_id})
-        self._token_time = now
-        return self._token
+            if self._key is None:
+                try:
+                    with open(self.key_path, "r") as f:
+                        self._key = f.read()
+                except FileNotFoundError:
+                    logger.error(f"APNs key not found at {self.key_path}")
+                    return ""
+
+            payload = {"iss": self.team_id, "iat": int(now)}
+            self._token = jwt.encode(payload, self._key, algorithm="ES256",
+                                     headers={"kid": self.key_id})
+            self._token_time = now
+            return self._token
 
     def send_notification(self, device_token: str, title: str, body: str,
                           data: dict | None = None) -> bool:
         """Send a push notification to an iOS device."""
-        if not all([self.key_id, self.team_id, device_token]):
+        result = self.send_many([device_token], title, body, data).get(device_token)
+        return bool(result and result["ok"])
+
+    def send_many(self, device_tokens: list[str], title: str, body: str,
+                  data: dict | None = None) -> dict[str, dict]:
+        """Send the same notification to many devices concurrently.
+
+        Pushes are multiplexed as concurrent streams over the shared HTTP/2
+        connection; 429/5xx responses are retried per device with backoff.
+        Returns {device_token: {"ok", "status", "reason"}}.
+        """
+        device_tokens = [t for t in dict.fromkeys(device_tokens) if t]
+        if not device_tokens:
+            return {}
+        if not all([self.key_id, self.team_id]):
             logger.warning("APNs not configured, skipping notification")
-            return False
+            return {t: {"ok": False, "status": None, "reason": "NotConfigured"} for t in device_tokens}
+        if not self._get_auth_token():
+            return {t: {"ok": False, "status": None, "reason": "MissingKey"} for t in device_tokens}
 
-        token = self._get_auth_token()
-        if not token:
-            return False
-
-        url = f"https://api.push.apple.com/3/device/{device_token}"
-        headers = {
-            "authorization": f"bearer {token}",
-            "apns-topic": self.bundle_id,
-            "apns-push-type": "alert",
-            "apns-priority": "10",
-        }
         payload = {
             "aps": {
                 "alert": {"title": title, "body": body},
@@ -64,18 +89,55 @@ class APNsService:
         }
         if data:
             payload["data"] = data
+        content = json.dumps(payload).encode()
+
+        futures = {t: self._pool.submit(self._send_one, t, content) for t in device_tokens}
+        results = {t: f.result() for t, f in futures.items()}
+        sent = sum(r["ok"] for r in results.values())
+        logger.info(f"Push sent to {sent}/{len(results)} devices")
+        return results
+
+    def _send_one(self, device_token: str, content: bytes) -> dict:
+        url = f"{Config.APNS_URL}/3/device/{device_token}"
+        token = self._get_auth_token()
+        for attempt in range(2):
+            headers = {
+                "authorization": f"bearer {token}",
+                "apns-topic": self.bundle_id,
+                "apns-push-type": "alert",
+                "apns-priority": "10",
+                "content-type": "application/json",
+            }
+            try:
+                resp = http_pool.h2_post(url, content=content, headers=headers)
+            except Exception as e:
+                logger.error(f"APNs send error for {device_token[:8]}...: {e}")
+                return {"ok": False, "status": None, "reason": str(e)}
+            if resp.status_code == 200:
+                return {"ok": True, "status": 200, "reason": None}
+
+            try:
+                reason = resp.json().get("reason")
+            except ValueError:
+                reason = resp.text
+            if resp.status_code == 403 and reason == "ExpiredProviderToken" and attempt == 0:
+                token = self._get_auth_token(expired=token)
+                continue  # Retry once with a freshly signed token
+            logger.error(f"APNs error {resp.status_code} for {device_token[:8]}...: {reason}")
+            return {"ok": False, "status": resp.status_code, "reason": reason}
+
+
+def device_token_key(device_token: str) -> str:
+    return f"{DEVICE_TOKEN_KEY_PREFIX}{device_token}"
+
+
+def registered_device_tokens() -> list[str]:
+    """Device tokens registered through POST /api/notifications/devices."""
+    from models.user_preference import UserPreference
 
-        try:
-            with httpx.Client(http2=True) as client:
-                resp = client.post(url, json=payload, headers=headers, timeout=10)
-                if resp.status_code == 200:
-                    logger.info(f"Push sent to {device_token[:8]}...")
-                    return True
-                logger.error(f"APNs error {resp.status_code}: {resp.text}")
-                return False
-        except Exception as e:
-            logger.error(f"APNs send error: {e}")
-            return False
+    rows = UserPreference.query.filter(
+        UserPreference.key.startswith(DEVICE_TOKEN_KEY_PREFIX, autoescape=True)).all()
+    return [row.value for row in rows if row.value]
 
 
 # Singleton
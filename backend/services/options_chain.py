@@ -0,0 +1,170 @@
+import struct
+import numpy as np
+
+
+class OptionsChain:
+    """An options chain as parallel NumPy arrays, grouped by expiration.
+
+    Contracts are sorted by expiration, then strike (calls before puts at
+    the same strike), so each expiration is the contiguous slice
+    offsets[i]:offsets[i + 1] and a strike range within it is two binary
+    searches. spot is the put-call parity estimate of the underlying (NaN if
+    there is none). pack() gives the cache format: a header (b"OPTC",
+    contract count, expiration count, contract id width, spot), the
+    expirations, offsets and contract ids, then the remaining columns.
+    """
+
+    MAGIC = b"OPTC"
+    _HEADER = struct.Struct("<4sIIId")
+    _DTYPES = (("is_call", "|b1"), ("strike", "<f8"), ("last_price", "<f8"), ("bid", "<f8"),
+               ("ask", "<f8"), ("volume", "<i8"), ("open_interest", "<i8"),
+               ("implied_volatility", "<f8"))
+
+    def __init__(self, expirations, offsets, contract_id, is_call, strike, last_price, bid, ask,
+                 volume, open_interest, implied_volatility, spot: float = float("nan")):
+        self.expirations = expirations
+        self.offsets = offsets
+        self.contract_id = contract_id
+        self.is_call = is_call
+        self.strike = strike
+        self.last_price = last_price
+        self.bid = bid
+        self.ask = ask
+        self.volume = volume
+        self.open_interest = open_interest
+        self.implied_volatility = implied_volatility
+        self.spot = spot
+
+    def __len__(self):
+        return len(self.strike)
+
+    @property
+    def expiration(self) -> np.ndarray:
+        """Expiration of each contract."""
+        return np.repeat(self.expirations, np.diff(self.offsets))
+
+    @property
+    def mid(self) -> np.ndarray:
+        """Bid/ask midpoint, or the last price when either side is missing."""
+        quoted = (self.bid > 0) & (self.ask > 0)
+        return np.where(quoted, (self.bid + self.ask) / 2, self.last_price)
+
+    @classmethod
+    def from_contracts(cls, ticker: str, contracts: list[dict]) -> "OptionsChain":
+        """Build from contract dicts with the fields of _DTYPES plus expiration and contract_id.
+
+        Contracts without an upstream id get one from ticker, expiration,
+        side and strike.
+        """
+        expiration = np.array([c["expiration"] or "" for c in contracts], dtype=str)
+        columns = {name: np.array([c[name] for c in contracts], dtype=dtype) for name, dtype in cls._DTYPES}
+        ids = np.array([c.get("contract_id") or f"{ticker}{e}{'C' if c['is_call'] else 'P'}{c['strike']:g}"
+                        for c, e in zip(contracts, expiration)], dtype=str)
+
+        order = np.lexsort((~columns["is_call"], columns["strike"], expiration))
+        expiration, ids = expiration[order], ids[order]
+        columns = {name: values[order] for name, values in columns.items()}
+        expirations, starts = np.unique(expiration, return_index=True)
+        offsets = np.append(starts, len(expiration)).astype(np.int64)
+        chain = cls(expirations, offsets, ids, **columns)
+        chain.spot = chain._parity_spot()
+        return chain
+
+    def _parity_spot(self) -> float:
+        """Underlying implied by put-call parity at the nearest expiration.
+
+        Uses the strike where call and put mids are closest (spot ~ K + C - P,
+        ignoring carry), which is about the at-the-money strike.
+        """
+        mid = self.mid
+        for i in range(len(self.expirations)):
+            s = slice(self.offsets[i], self.offsets[i + 1])
+            priced = mid[s] > 0
+            calls, puts = priced & self.is_call[s], priced & ~self.is_call[s]
+            strikes, ci, pi = np.intersect1d(self.strike[s][calls], self.strike[s][puts], return_indices=True)
+            if len(strikes):
+                diff = mid[s][calls][ci] - mid[s][puts][pi]
+                j = int(np.argmin(np.abs(diff)))
+                return float(strikes[j] + diff[j])
+        return float("nan")
+
+    def select(self, expiration_from: str | None = None, expiration_to: str | None = None,
+               min_strike: float | None = None, max_strike: float | None = None,
+               side: str | None = None, min_volume: int = 0, min_open_interest: int = 0) -> np.ndarray:
+        """Indices of the contracts matching every given filter, in chain order.
+
+        Expiration bounds (ISO dates, inclusive) pick the expiration slices
+        and strike bounds narrow each slice by binary search; only those
+        contracts are then checked for side, volume and open interest.
+        """
+        first = np.searchsorted(self.expirations, expiration_from, "left") if expiration_from else 0
+        last = (np.searchsorted(self.expirations, expiration_to, "right") if expiration_to
+                else len(self.expirations))
+        parts = []
+        for i in range(first, last):
+            start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+            strikes = self.strike[start:end]
+            lo = start + np.searchsorted(strikes, min_strike, "left") if min_strike is not None else start
+            hi = start + np.searchsorted(strikes, max_strike, "right") if max_strike is not None else end
+            parts.append(np.arange(lo, hi))
+        index = np.concatenate(parts) if parts else np.array([], dtype=np.int64)
+
+        keep = np.ones(len(index), dtype=bool)
+        if side:
+            keep &= self.is_call[index] == (side == "call")
+        if min_volume:
+            keep &= self.volume[index] >= min_volume
+        if min_open_interest:
+            keep &= self.open_interest[index] >= min_open_interest
+        return index[keep]
+
+    def to_entries(self, index: np.ndarray) -> tuple[list[dict], list[dict]]:
+        """(calls, puts) as contract dicts (the original options layout)."""
+        fields = ["contract_id", "strike", "expiration", "last_price", "bid", "ask",
+                  "volume", "open_interest", "implied_volatility"]
+        expiration = self.expiration
+        columns = [(expiration if name == "expiration" else getattr(self, name))[index].tolist()
+                   for name in fields]
+        entries = [dict(zip(fields, values)) for values in zip(*columns)]
+        calls = self.is_call[index].tolist()
+        return ([e for e, call in zip(entries, calls) if call],
+                [e for e, call in zip(entries, calls) if not call])
+
+    def to_columns(self, index: np.ndarray) -> dict:
+        """Parallel columns for the given contracts, with type as "call"/"put".
+
+        Numeric columns stay NumPy arrays, which the JSON encoder writes directly.
+        """
+        columns = {"contract_id": self.contract_id[index].tolist(),
+                   "type": np.where(self.is_call[index], "call", "put").tolist(),
+                   "expiration": self.expiration[index].tolist()}
+        columns.update({name: getattr(self, name)[index] for name, _ in self._DTYPES[1:]})
+        return columns
+
+    def pack(self) -> bytes:
+        width = max((len(i) for i in self.contract_id), default=1)
+        parts = [self._HEADER.pack(self.MAGIC, len(self), len(self.expirations), width, self.spot),
+                 np.asarray(self.expirations, dtype="S10").tobytes(),
+                 np.asarray(self.offsets, dtype="<i8").tobytes(),
+                 np.char.encode(self.contract_id, "ascii").astype(f"S{width}").tobytes()]
+        parts += [np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes()
+                  for name, dtype in self._DTYPES]
+        return b"".join(parts)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "OptionsChain":
+        magic, n, n_exp, width, spot = cls._HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError("Not a packed options chain")
+        offset = cls._HEADER.size
+        expirations = np.frombuffer(data, dtype="S10", count=n_exp, offset=offset).astype(str)
+        offset += 10 * n_exp
+        offsets = np.frombuffer(data, dtype="<i8", count=n_exp + 1, offset=offset)
+        offset += 8 * (n_exp + 1)
+        ids = np.frombuffer(data, dtype=f"S{width}", count=n, offset=offset).astype(str)
+        offset += width * n
+        columns = []
+        for _, dtype in cls._DTYPES:
+            columns.append(np.frombuffer(data, dtype=dtype, count=n, offset=offset))
+            offset += np.dtype(dtype).itemsize * n
+        return cls(expirations, offsets, ids, *columns, spot=spot)
@@ -0,0 +1,271 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import select
+from config import Config
+from services.cache import cache_get, cache_set
+from services.options_chain import OptionsChain
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = "options_flow:index"
+
+_scan_pool = ThreadPoolExecutor(max_workers=Config.OPTIONS_FLOW_WORKERS, thread_name_prefix="options-flow")
+
+
+def _result_key(ticker: str) -> str:
+    return f"options_flow:{ticker}"
+
+
+def _snapshot_key(ticker: str) -> str:
+    return f"options_flow:snapshot:{ticker}"
+
+
+def _columns(chain: OptionsChain) -> dict[str, np.ndarray]:
+    return {
+        "contract_id": chain.contract_id,
+        "is_call": chain.is_call,
+        "strike": chain.strike,
+        "expiration": chain.expiration,
+        "mid": chain.mid,
+        "volume": chain.volume,
+        "open_interest": chain.open_interest,
+        "iv": chain.implied_volatility,
+    }
+
+
+def incremental_volume(ids: np.ndarray, volume: np.ndarray, previous: dict | None) -> np.ndarray | None:
+    """Volume traded per contract since the previous snapshot; None without one.
+
+    Contracts are matched by id through a sorted join. Volume counts reset
+    each session, so a contract whose volume dropped is taken to have
+    traded its whole current volume since.
+    """
+    if not previous:
+        return None
+    prev_ids = np.asarray(previous["ids"], dtype=str)
+    prev_volume = np.asarray(previous["volume"], dtype=np.int64)
+    before = np.zeros(len(ids), dtype=np.int64)
+    if len(prev_ids) and len(ids):
+        order = np.argsort(prev_ids)
+        prev_ids, prev_volume = prev_ids[order], prev_volume[order]
+        pos = np.minimum(np.searchsorted(prev_ids, ids), len(prev_ids) - 1)
+        found = prev_ids[pos] == ids
+        before[found] = prev_volume[pos[found]]
+    return np.where(volume >= before, volume - before, volume)
+
+
+def _ratio(num, den, digits: int = 4):
+    return round(float(num) / float(den), digits) if den else None
+
+
+def _expirations(chain: OptionsChain, a: dict, premium: np.ndarray, spot: float | None) -> list[dict]:
+    """Volume, open interest, put/call ratios and IV summary per expiration."""
+    expirations = chain.expirations
+    k = len(expirations)
+    group = np.repeat(np.arange(k), np.diff(chain.offsets))
+    is_call, strike, iv = a["is_call"], a["strike"], a["iv"]
+
+    def total(values, mask):
+        return np.bincount(group[mask], weights=values[mask], minlength=k)
+
+    def mean_iv(mask):
+        counts = np.bincount(group[mask], minlength=k)
+        with np.errstate(invalid="ignore"):
+            return np.where(counts > 0, total(iv, mask) / np.maximum(counts, 1), np.nan)
+
+    call_volume, put_volume = total(a["volume"], is_call), total(a["volume"], ~is_call)
+    call_oi, put_oi = total(a["open_interest"], is_call), total(a["open_interest"], ~is_call)
+    call_premium, put_premium = total(premium, is_call), total(premium, ~is_call)
+
+    has_iv = iv > 0
+    atm_iv, put_skew = np.full(k, np.nan), np.full(k, np.nan)
+    if spot:
+        # IV at the strike(s) closest to spot, calls and puts averaged
+        dist = np.where(has_iv, np.abs(strike - spot), np.inf)
+        closest = np.full(k, np.inf)
+        np.minimum.at(closest, group, dist)
+        atm_iv = mean_iv(has_iv & (dist == closest[group]))
+        # Out-of-the-money puts over calls within the moneyness band
+        band = Config.OPTIONS_FLOW_SKEW_MONEYNESS
+        otm_puts = has_iv & ~is_call & (strike < spot) & (strike >= spot * (1 - band))
+        otm_calls = has_iv & is_call & (strike > spot) & (strike <= spot * (1 + band))
+        put_skew = mean_iv(otm_puts) - mean_iv(otm_calls)
+
+    return [
+        {
+            "expiration": str(expirations[i]),
+            "call_volume": int(call_volume[i]),
+            "put_volume": int(put_volume[i]),
+            "put_call_ratio": _ratio(put_volume[i], call_volume[i]),
+            "call_open_interest": int(call_oi[i]),
+            "put_open_interest": int(put_oi[i]),
+            "put_call_oi_ratio": _ratio(put_oi[i], call_oi[i]),
+            "put_call_premium_ratio": _ratio(put_premium[i], call_premium[i]),
+            "atm_iv": None if np.isnan(atm_iv[i]) else round(float(atm_iv[i]), 4),
+            "put_skew": None if np.isnan(put_skew[i]) else round(float(put_skew[i]), 4),
+        }
+        for i in range(k)
+    ]
+
+
+def _contract(a: dict, i: int, vol_oi: np.ndarray, premium: np.ndarray, new: np.ndarray | None) -> dict:
+    return {
+        "contract_id": str(a["contract_id"][i]),
+        "type": "call" if a["is_call"][i] else "put",
+        "strike": float(a["strike"][i]),
+        "expiration": str(a["expiration"][i]),
+        "volume": int(a["volume"][i]),
+        "open_interest": int(a["open_interest"][i]),
+        "vol_oi_ratio": round(float(vol_oi[i]), 2),
+        "implied_volatility": float(a["iv"][i]),
+        "mid": round(float(a["mid"][i]), 4),
+        "premium": round(float(premium[i]), 2),
+        "new_volume": int(new[i]) if new is not None else None,
+        "new_premium": round(float(new[i] * a["mid"][i] * 100), 2) if new is not None else None,
+    }
+
+
+def analyze(ticker: str, chain: OptionsChain, previous: dict | None = None,
+            spot: float | None = None) -> tuple[dict, dict]:
+    """Flow analytics for one options chain snapshot.
+
+    Computes volume/OI ratios, put/call volume, open interest and premium
+    ratios, ATM IV and put skew per expiration, unusual contracts (volume of
+    at least OPTIONS_FLOW_MIN_VOLUME and OPTIONS_FLOW_VOL_OI_RATIO times open
+    interest) and block trades: OPTIONS_FLOW_BLOCK_CONTRACTS contracts or
+    OPTIONS_FLOW_BLOCK_PREMIUM of premium traded in one contract since the
+    previous snapshot. spot defaults to the put-call parity estimate.
+    Returns (result, snapshot for the next call).
+    """
+    a = _columns(chain)
+    volume, is_call = a["volume"], a["is_call"]
+    premium = volume * a["mid"] * 100
+    # Contracts with no open interest yet count as one
+    vol_oi = volume / np.maximum(a["open_interest"], 1)
+    new = incremental_volume(a["contract_id"], volume, previous)
+    if spot is None and not np.isnan(chain.spot):
+        spot = chain.spot
+
+    top = Config.OPTIONS_FLOW_TOP_CONTRACTS
+    unusual = np.flatnonzero((volume >= Config.OPTIONS_FLOW_MIN_VOLUME)
+                             & (vol_oi >= Config.OPTIONS_FLOW_VOL_OI_RATIO))
+    unusual = unusual[np.lexsort((-premium[unusual], -vol_oi[unusual]))][:top]
+
+    totals = {
+        "call_volume": int(volume[is_call].sum()),
+        "put_volume": int(volume[~is_call].sum()),
+        "call_premium": round(float(premium[is_call].sum()), 2),
+        "put_premium": round(float(premium[~is_call].sum()), 2),
+        "new_call_volume": None,
+        "new_put_volume": None,
+    }
+    totals["put_call_ratio"] = _ratio(totals["put_volume"], totals["call_volume"])
+    totals["put_call_premium_ratio"] = _ratio(totals["put_premium"], totals["call_premium"])
+
+    blocks = np.array([], dtype=np.int64)
+    if new is not None:
+        new_premium = new * a["mid"] * 100
+        blocks = np.flatnonzero((new >= Config.OPTIONS_FLOW_BLOCK_CONTRACTS)
+                                | (new_premium >= Config.OPTIONS_FLOW_BLOCK_PREMIUM))
+        blocks = blocks[np.argsort(-new_premium[blocks], kind="stable")][:top]
+        totals["new_call_volume"] = int(new[is_call].sum())
+        totals["new_put_volume"] = int(new[~is_call].sum())
+
+    now = datetime.now(timezone.utc).isoformat()
+    result = {
+        "ticker": ticker,
+        "as_of": now,
+        "previous_as_of": previous.get("as_of") if previous else None,
+        "spot": round(spot, 4) if spot else None,
+        "contracts": len(volume),
+        "totals": totals,
+        "expirations": _expirations(chain, a, premium, spot),
+        "unusual": [_contract(a, i, vol_oi, premium, new) for i in unusual],
+        "blocks": [_contract(a, i, vol_oi, premium, new) for i in blocks],
+    }
+    snapshot = {"as_of": now, "ids": a["contract_id"].tolist(), "volume": volume.tolist()}
+    return result, snapshot
+
+
+def scan_ticker(ticker: str) -> dict | None:
+    """Fetch a fresh chain, analyze it against the last snapshot and store both."""
+    from services.market_data import MarketDataService
+
+    chain = MarketDataService().refresh_options_chain(ticker)
+    if chain is None:
+        return None
+    # Prefer the cached quote for spot, but don't spend a request on it
+    quote = cache_get(f"quote:{ticker}")
+    spot = quote.get("price") if quote else None
+    result, snapshot = analyze(ticker, chain, cache_get(_snapshot_key(ticker)), spot or None)
+    cache_set(_snapshot_key(ticker), snapshot, ttl=Config.OPTIONS_FLOW_RESULT_TTL)
+    cache_set(_result_key(ticker), result, ttl=Config.OPTIONS_FLOW_RESULT_TTL)
+    return result
+
+
+def get_options_flow(ticker: str) -> dict | None:
+    """The latest precomputed flow for a ticker, or None if it hasn't been scanned."""
+    return cache_get(_result_key(ticker.upper()))
+
+
+def get_flow_overview() -> dict | None:
+    """Per-ticker summary of the latest scan over the watchlist."""
+    return cache_get(INDEX_KEY)
+
+
+def _summary(result: dict) -> dict:
+    return {
+        "ticker": result["ticker"],
+        "as_of": result["as_of"],
+        "put_call_ratio": result["totals"]["put_call_ratio"],
+        "put_call_premium_ratio": result["totals"]["put_call_premium_ratio"],
+        "unusual": len(result["unusual"]),
+        "blocks": len(result["blocks"]),
+        "top_block": result["blocks"][0] if result["blocks"] else None,
+    }
+
+
+def _scan_safely(ticker: str) -> dict | None:
+    try:
+        return scan_ticker(ticker)
+    except Exception as e:
+        logger.error(f"Options flow scan failed for {ticker}: {e}")
+        return None
+
+
+def watchlist_tickers() -> list[str]:
+    """Distinct active US watchlist tickers (options data is US-only)."""
+    from models import db
+    from models.watchlist import Watchlist
+
+    rows = db.session.execute(
+        select(Watchlist.ticker).where(Watchlist.is_active.is_(True), Watchlist.market == "US")
+        .distinct().order_by(Watchlist.ticker)
+    ).scalars()
+    return list(dict.fromkeys(t.upper() for t in rows))[:Config.OPTIONS_FLOW_MAX_TICKERS]
+
+
+def scan_options_flow(app):
+    """Scheduled job: refresh options flow for the watchlist while the feature is on."""
+    from models import db
+    from models.feature import Feature
+
+    with app.app_context():
+        try:
+            if not db.session.execute(select(Feature.is_enabled).where(Feature.name == "options_flow")).scalar():
+                return
+            tickers = watchlist_tickers()
+        except Exception as e:
+            logger.error(f"Options flow scan could not load the watchlist: {e}")
+            return
+    if not tickers:
+        return
+
+    results = [r for r in _scan_pool.map(_scan_safely, tickers) if r is not None]
+    logger.info(f"Options flow scanned {len(results)}/{len(tickers)} tickers")
+    if results:
+        cache_set(INDEX_KEY, {"as_of": datetime.now(timezone.utc).isoformat(),
+                              "tickers": [_summary(r) for r in results]},
+                  ttl=Config.OPTIONS_FLOW_RESULT_TTL)
@@ -0,0 +1,200 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from config import Config
+from services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+INTERACTIVE = "interactive"
+REFRESH = "refresh"
+SEARCH = "search"
+
+# Token bucket shared by all workers. Time comes from the Redis server so
+# worker clock skew doesn't matter. A request only gets a token if at least
+# `reserve` tokens remain afterwards, which keeps headroom for higher
+# priority classes. Returns {granted, tokens left, ms to wait}; granted is -1
+# once the daily quota is used up.
+_TAKE_TOKEN_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+local daily_limit = tonumber(ARGV[4])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+if daily_limit > 0 and tonumber(redis.call("GET", KEYS[2]) or "0") >= daily_limit then
+    return {-1, "0", 0}
+end
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+
+local granted = 0
+local wait = 0
+if tokens - 1 >= reserve then
+    tokens = tokens - 1
+    granted = 1
+    redis.call("INCR", KEYS[2])
+    redis.call("EXPIRE", KEYS[2], 172800)
+else
+    wait = math.ceil((reserve + 1 - tokens) * 1000 / rate)
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity * 1000 / rate) + 60000)
+return {granted, tostring(tokens), wait}
+"""
+
+# Empty the bucket and restart its refill clock, so the tokens come back at
+# the normal rate from now rather than for the time since the last take
+_PENALIZE_LUA = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call("HSET", KEYS[1], "tokens", "0", "ts", now)
+redis.call("PEXPIRE", KEYS[1], tonumber(ARGV[1]))
+return 1
+"""
+
+
+class RateLimiter:
+    """Token-bucket limiter for an upstream API, shared across workers via Redis.
+
+    Callers wait (sleep until the bucket should have a token, then retry)
+    until they get one or their deadline passes, instead of failing
+    immediately. There is no ordered queue: waiters race for each token.
+    Priority comes from reserves only: lower priority classes can't take
+    the last tokens, which leaves headroom for interactive requests. Falls
+    back to a per-process bucket when Redis is unavailable.
+    """
+
+    def __init__(self, name: str, per_minute: int, burst: int, per_day: int = 0,
+                 reserves: dict[str, float] | None = None):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = burst
+        self.per_day = per_day
+        self.reserves = {priority: fraction * burst for priority, fraction in (reserves or {}).items()}
+        self._script = None
+        self._penalize_script = None
+        self._lock = threading.Lock()
+        self._local_tokens = float(burst)
+        self._local_ts = time.monotonic()
+        self._local_day = None
+        self._local_day_count = 0
+        self._stats = {"granted": {}, "timed_out": {}, "wait_time": 0.0, "throttled": 0,
+                       "quota_exhausted": 0}
+
+    def _keys(self) -> list[str]:
+        day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        return [f"ratelimit:{self.name}", f"ratelimit:{self.name}:day:{day}"]
+
+    def _take(self, reserve: float) -> tuple[int, float, float]:
+        """Try to take one token; returns (granted, tokens left, seconds to wait)."""
+        client = get_redis()
+        if client:
+            try:
+                if self._script is None:
+                    self._script = client.register_script(_TAKE_TOKEN_LUA)
+                granted, tokens, wait_ms = self._script(
+                    keys=self._keys(), args=[self.rate, self.capacity, reserve, self.per_day])
+                return int(granted), float(tokens), wait_ms / 1000
+            except Exception as e:
+                logger.warning(f"Shared rate limiter unavailable, using local bucket: {e}")
+        return self._take_local(reserve)
+
+    def _take_local(self, reserve: float) -> tuple[int, float, float]:
+        with self._lock:
+            day = datetime.now(timezone.utc).date()
+            if day != self._local_day:
+                self._local_day, self._local_day_count = day, 0
+            if self.per_day and self._local_day_count >= self.per_day:
+                return -1, 0.0, 0.0
+            now = time.monotonic()
+            self._local_tokens = min(self.capacity,
+                                     self._local_tokens + (now - self._local_ts) * self.rate)
+            self._local_ts = now
+            if self._local_tokens - 1 >= reserve:
+                self._local_tokens -= 1
+                self._local_day_count += 1
+                return 1, self._local_tokens, 0.0
+            return 0, self._local_tokens, (reserve + 1 - self._local_tokens) / self.rate
+
+    def acquire(self, priority: str = INTERACTIVE, deadline: float | None = None) -> bool:
+        """Wait for a token until deadline (time.monotonic()); False if none was granted."""
+        reserve = self.reserves.get(priority, 0.0)
+        start = time.monotonic()
+        while True:
+            granted, _, wait = self._take(reserve)
+            if granted == 1:
+                with self._lock:
+                    self._stats["granted"][priority] = self._stats["granted"].get(priority, 0) + 1
+                    self._stats["wait_time"] += time.monotonic() - start
+                return True
+            now = time.monotonic()
+            if granted == -1 or deadline is None or now + wait > deadline:
+                with self._lock:
+                    if granted == -1:
+                        self._stats["quota_exhausted"] += 1
+                    else:
+                        timed_out = self._stats["timed_out"]
+                        timed_out[priority] = timed_out.get(priority, 0) + 1
+                return False
+            # Small jitter so waiting workers don't all retry on the same tick
+            time.sleep(wait + random.uniform(0, 0.05))
+
+    def penalize(self):
+        """Empty the bucket after the upstream reports we are over quota."""
+        with self._lock:
+            self._stats["throttled"] += 1
+            self._local_tokens = 0.0
+            self._local_ts = time.monotonic()
+        client = get_redis()
+        if client:
+            try:
+                if self._penalize_script is None:
+                    self._penalize_script = client.register_script(_PENALIZE_LUA)
+                self._penalize_script(keys=self._keys()[:1],
+                                      args=[int(self.capacity * 1000 / self.rate) + 60000])
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        """Counters plus the current shared bucket level and daily usage."""
+        with self._lock:
+            stats = {
+                "granted": dict(self._stats["granted"]),
+                "timed_out": dict(self._stats["timed_out"]),
+                "total_wait_time": round(self._stats["wait_time"], 3),
+                "throttled": self._stats["throttled"],
+                "quota_exhausted": self._stats["quota_exhausted"],
+                "per_minute": round(self.rate * 60),
+                "per_day": self.per_day or None,
+                "tokens_available": round(self._local_tokens, 2),
+                "used_today": self._local_day_count,
+            }
+        client = get_redis()
+        if client:
+            try:
+                bucket_key, day_key = self._keys()
+                tokens, used = client.pipeline().hget(bucket_key, "tokens").get(day_key).execute()
+                stats["tokens_available"] = round(float(tokens), 2) if tokens else float(self.capacity)
+                stats["used_today"] = int(used or 0)
+            except Exception:
+                pass
+        if self.per_day:
+            stats["quota_used_pct"] = round(100 * stats["used_today"] / self.per_day, 1)
+        return stats
+
+
+alpha_vantage_limiter = RateLimiter(
+    "alpha_vantage",
+    per_minute=Config.ALPHA_VANTAGE_REQUESTS_PER_MINUTE,
+    burst=Config.ALPHA_VANTAGE_BURST,
+    per_day=Config.ALPHA_VANTAGE_REQUESTS_PER_DAY,
+    reserves=Config.ALPHA_VANTAGE_PRIORITY_RESERVES,
+)
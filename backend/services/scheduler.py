@@ -1,50 +1,163 @@
+import atexit
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import insert, select, update
+from config import Config
+from services.leader import LeaderLease
 
 logger = logging.getLogger(__name__)
 
 scheduler = BackgroundScheduler()
+_dispatch_pool = ThreadPoolExecutor(max_workers=Config.REMINDER_DISPATCH_WORKERS,
+                                    thread_name_prefix="reminder-dispatch")
+
+# Every worker runs the scheduler, but only the lease holder runs jobs
+scheduler_lease = LeaderLease("scheduler", ttl=Config.SCHEDULER_LEASE_TTL, pg_fallback=True)
+
+
+def _heartbeat(app):
+    """Renew (or try to take) the scheduler lease."""
+    from services.alerts import price_alert_engine
+
+    was_leader = scheduler_lease.is_leader
+    with app.app_context():
+        is_leader = scheduler_lease.heartbeat()
+    if was_leader and not is_leader:
+        # Another worker applies watchlist changes while we aren't leader
+        price_alert_engine.invalidate()
+
+
+def _leader_only(job):
+    @functools.wraps(job)
+    def wrapper(app):
+        if scheduler_lease.is_leader:
+            job(app)
+    return wrapper
+
+
+def _leader_or_local(job):
+    """Like _leader_only, but while Redis is down every worker runs the job.
+
+    For jobs whose results reach other workers only through Redis and
+    otherwise stay in the process that ran them.
+    """
+    from services.cache import get_redis
+
+    @functools.wraps(job)
+    def wrapper(app):
+        if scheduler_lease.is_leader or not get_redis():
+            job(app)
+    return wrapper
 
 
 def check_reminders(app):
-    """Check for due reminders and trigger notifications."""
+    """Claim due reminders in batches and hand their notifications to a worker pool."""
     with app.app_context():
-        from models import db
-        from models.reminder import Reminder
-        from services.notifications import apns_service
+        from services.notifications import registered_device_tokens
 
         now = datetime.now(timezone.utc)
         window = now + timedelta(minutes=1)
+        tokens = None
+
+        while True:
+            claimed = _claim_due_reminders(window, Config.REMINDER_BATCH_SIZE)
+            if not claimed:
+                break
+            logger.info(f"Triggering {len(claimed)} reminders")
 
-        due_reminders = Reminder.query.filter(
+            push = [r for r in claimed if r.alert_type == "push"]
+            if push:
+                if tokens is None:
+                    tokens = registered_device_tokens()
+                _dispatch_pool.submit(_send_reminder_pushes, push, tokens)
+            if len(claimed) < Config.REMINDER_BATCH_SIZE:
+                break
+
+
+def _claim_due_reminders(window: datetime, limit: int) -> list:
+    """Mark one batch of due reminders triggered and schedule their recurrences.
+
+    A recurrence is scheduled for the first occurrence after window, so a
+    reminder that fell far behind (e.g. during downtime) fires once, not
+    once per missed occurrence.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    dispatchers never process the same reminder, and the batch is updated and
+    its recurrences inserted with one statement each before committing.
+    """
+    from models import db
+    from models.reminder import Reminder
+
+    rows = db.session.execute(
+        select(Reminder.id, Reminder.title, Reminder.description, Reminder.reminder_time,
+               Reminder.recurrence, Reminder.ticker, Reminder.alert_type)
+        .where(
             Reminder.is_active.is_(True),
             Reminder.is_triggered.is_(False),
             Reminder.reminder_time <= window,
-        ).all()
+        )
+        .order_by(Reminder.reminder_time)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        db.session.rollback()
+        return []
 
-        for reminder in due_reminders:
-            logger.info(f"Triggering reminder: {reminder.title}")
+    db.session.execute(
+        update(Reminder)
+        .where(Reminder.id.in_([r.id for r in rows]))
+        .values(is_triggered=True)
+        .execution_options(synchronize_session=False)
+    )
 
-            # Mark as triggered
-            reminder.is_triggered = True
+    recurrences = []
+    for r in rows:
+        next_time = _next_after(r.reminder_time, r.recurrence, window) if r.recurrence else None
+        if next_time:
+            recurrences.append({
+                "title": r.title,
+                "description": r.description,
+                "reminder_time": next_time,
+                "recurrence": r.recurrence,
+                "ticker": r.ticker,
+                "alert_type": r.alert_type,
+            })
+    if recurrences:
+        db.session.execute(insert(Reminder), recurrences)
 
-            # Handle recurrence
-            if reminder.recurrence:
-                next_time = _calculate_next(reminder.reminder_time, reminder.recurrence)
-                if next_time:
-                    new_reminder = Reminder(
-                        title=reminder.title,
-                        description=reminder.description,
-                        reminder_time=next_time,
-                        recurrence=reminder.recurrence,
-                        ticker=reminder.ticker,
-                        alert_type=reminder.alert_type,
-                    )
-                    db.session.add(new_reminder)
+    db.session.commit()
+    return rows
 
-        db.session.commit()
+
+def _send_reminder_pushes(reminders: list, tokens: list[str]):
+    from services.notifications import apns_service
+
+    for r in reminders:
+        try:
+            apns_service.send_many(tokens, r.title, r.description or "",
+                                   data={"reminder_id": r.id, "ticker": r.ticker})
+        except Exception as e:
+            logger.error(f"Reminder push failed for {r.id}: {e}")
+
+
+def _next_after(current_time: datetime, recurrence: str, after: datetime) -> datetime | None:
+    """First occurrence of a recurring reminder later than after."""
+    if current_time.tzinfo is None:
+        after = after.astimezone(timezone.utc).replace(tzinfo=None)  # stored as naive UTC
+    step = {"daily": timedelta(days=1), "weekly": timedelta(weeks=1),
+            "hourly": timedelta(hours=1)}.get(recurrence)
+    if step and current_time < after:
+        # Skip whole missed periods at once
+        current_time += step * ((after - current_time) // step)
+    next_time = _calculate_next(current_time, recurrence)
+    while next_time is not None and next_time <= after:
+        next_time = _calculate_next(next_time, recurrence)
+    return next_time
 
 
 def _calculate_next(current_time: datetime, recurrence: str) -> datetime | None:
@@ -75,14 +188,75 @@ def _calculate_next(current_time: datetime, recurrence: str) -> datetime | None:
 
 
 def init_scheduler(app):
-    """Initialize the background scheduler for reminder checking."""
+    """Initialize the background scheduler for reminders and price alerts."""
+    from services.alerts import check_price_alerts
+    from services.options_flow import scan_options_flow
+    from services.symbol_search import fetch_symbol_listings, sync_symbol_index
+    from services.trending import ingest_trending
+
     if not scheduler.running:
+        _heartbeat(app)
         scheduler.add_job(
-            check_reminders,
+            _heartbeat,
+            trigger=IntervalTrigger(seconds=Config.SCHEDULER_HEARTBEAT_INTERVAL),
+            args=[app],
+            id="scheduler_heartbeat",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        scheduler.add_job(
+            _leader_only(check_reminders),
             trigger=IntervalTrigger(seconds=30),
             args=[app],
             id="check_reminders",
             replace_existing=True,
         )
+        scheduler.add_job(
+            _leader_only(check_price_alerts),
+            trigger=IntervalTrigger(seconds=Config.PRICE_ALERT_INTERVAL),
+            args=[app],
+            id="check_price_alerts",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        scheduler.add_job(
+            _leader_or_local(ingest_trending),
+            trigger=IntervalTrigger(seconds=Config.TRENDING_INGEST_INTERVAL),
+            args=[app],
+            id="ingest_trending",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        scheduler.add_job(
+            _leader_only(scan_options_flow),
+            trigger=IntervalTrigger(seconds=Config.OPTIONS_FLOW_INTERVAL),
+            args=[app],
+            id="scan_options_flow",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        scheduler.add_job(
+            _leader_only(fetch_symbol_listings),
+            trigger=IntervalTrigger(hours=1),
+            args=[app],
+            id="fetch_symbol_listings",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            next_run_time=datetime.now(timezone.utc),
+        )
+        scheduler.add_job(
+            sync_symbol_index,
+            trigger=IntervalTrigger(seconds=Config.SYMBOL_INDEX_SYNC_INTERVAL),
+            args=[app],
+            id="sync_symbol_index",
+            replace_existing=True,
+            next_run_time=datetime.now(timezone.utc),
+        )
         scheduler.start()
+        atexit.register(scheduler_lease.release)
         logger.info("Reminder scheduler started")
@@ -1,91 +1,83 @@
-import re
+import time
 import logging
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from config import Config
-from services.cache import cache_get, cache_set
+from services import http_pool
+from services.cache import cache_fetch
+from services.sentiment_scoring import score_texts
 
 logger = logging.getLogger(__name__)
 
-# Simple keyword-based sentiment scoring
-POSITIVE_WORDS = {
-    "moon", "rocket", "bull", "bullish", "long", "calls", "buy", "surge",
-    "breakout", "green", "up", "high", "profit", "gain", "squeeze", "yolo",
-    "diamond", "hands", "tendies", "earnings", "beat", "upgrade",
-}
-NEGATIVE_WORDS = {
-    "bear", "bearish", "short", "puts", "sell", "dump", "crash", "red",
-    "down", "low", "loss", "bag", "drill", "tank", "fade", "miss",
-    "downgrade", "overvalued", "bubble", "fear",
-}
-
-
-def _score_text(text: str) -> float:
-    """Score text sentiment from -1.0 (bearish) to 1.0 (bullish)."""
-    words = set(re.findall(r"\w+", text.lower()))
-    pos = len(words & POSITIVE_WORDS)
-    neg = len(words & NEGATIVE_WORDS)
-    total = pos + neg
-    if total == 0:
-        return 0.0
-    return (pos - neg) / total
+# Subreddit searches run concurrently; a search that misses its deadline
+# keeps running here and fills the cache for the next request
+_reddit_pool = ThreadPoolExecutor(max_workers=Config.REDDIT_FETCH_WORKERS,
+                                  thread_name_prefix="reddit")
 
 
 class SentimentService:
     """Service for aggregating sentiment from Reddit and News."""
 
     def __init__(self):
-        self.reddit = None
+        # praw.Reddit isn't thread-safe, so each fetch thread gets its own
+        self._local = threading.local()
 
     def _get_reddit(self):
-        if self.reddit is None and Config.REDDIT_CLIENT_ID:
+        reddit = getattr(self._local, "reddit", None)
+        if reddit is None and Config.REDDIT_CLIENT_ID:
             try:
                 import praw
-                self.reddit = praw.Reddit(
+                reddit = self._local.reddit = praw.Reddit(
                     client_id=Config.REDDIT_CLIENT_ID,
                     client_secret=Config.REDDIT_CLIENT_SECRET,
                     user_agent=Config.REDDIT_USER_AGENT,
                 )
             except Exception as e:
                 logger.warning(f"Could not initialize Reddit client: {e}")
-        return self.reddit
+        return reddit
 
     def get_reddit_sentiment(
         self, ticker: str, subreddits: list[str] | None = None, limit: int = 25
     ) -> dict:
-        """Scrape Reddit for sentiment on a ticker."""
+        """Scrape Reddit for sentiment on a ticker.
+
+        Subreddits are searched concurrently and cached per (ticker,
+        subreddit). A subreddit that fails or misses REDDIT_SOURCE_TIMEOUT is
+        left out of the result and reported in "sources" instead of failing
+        the whole request.
+        """
         if subreddits is None:
             subreddits = ["wallstreetbets", "stocks", "options"]
+        subreddits = list(dict.fromkeys(s.strip().lower() for s in subreddits if s.strip()))
+
+        futures = {
+            sub: _reddit_pool.submit(
+                cache_fetch, f"reddit_sentiment:{ticker.upper()}:{sub}",
+                lambda sub=sub: self._fetch_subreddit(ticker, sub, limit),
+                ttl=Config.SENTIMENT_CACHE_TTL)
+            for sub in subreddits
+        }
+        deadline = time.monotonic() + Config.REDDIT_SOURCE_TIMEOUT
 
-        cache_key = f"reddit_sentiment:{ticker}"
-        cached = cache_get(cache_key)
-        if cached:
-            return cached
-
-        reddit = self._get_reddit()
         posts = []
-        total_score = 0.0
-
-        if reddit:
+        sources = {}
+        for sub, future in futures.items():
             try:
-                for sub_name in subreddits:
-                    subreddit = reddit.subreddit(sub_name)
-                    for post in subreddit.search(ticker, sort="new", time_filter="day", limit=limit):
-                        text = f"{post.title} {post.selftext}"
-                        score = _score_text(text)
-                        total_score += score
-                        posts.append({
-                            "subreddit": sub_name,
-                            "title": post.title,
-                            "score": post.score,
-                            "num_comments": post.num_comments,
-                            "sentiment_score": round(score, 3),
-                            "url": f"https://reddit.com{post.permalink}",
-                            "created_utc": post.created_utc,
-                        })
+                sub_posts = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                sources[sub] = {"status": "timeout"}
+                continue
             except Exception as e:
-                logger.error(f"Reddit fetch error for {ticker}: {e}")
-
-        avg_score = round(total_score / len(posts), 3) if posts else 0.0
+                logger.error(f"Reddit fetch error for {ticker} in r/{sub}: {e}")
+                sources[sub] = {"status": "error", "error": str(e)}
+                continue
+            if sub_posts is None:
+                sources[sub] = {"status": "unavailable"}
+                continue
+            sources[sub] = {"status": "ok", "post_count": len(sub_posts)}
+            posts.extend(sub_posts)
+
+        avg_score = round(sum(p["sentiment_score"] for p in posts) / len(posts), 3) if posts else 0.0
         result = {
             "ticker": ticker,
             "source": "reddit",
@@ -93,23 +85,47 @@ class SentimentService:
             "avg_sentiment": avg_score,
             "sentiment_label": _label(avg_score),
             "posts": posts[:20],
+            "sources": sources,
         }
-        cache_set(cache_key, result, ttl=Config.SENTIMENT_CACHE_TTL)
         return result
 
+    def _fetch_subreddit(self, ticker: str, sub_name: str, limit: int) -> list[dict] | None:
+        """Search one subreddit and score its posts; None without a Reddit client."""
+        reddit = self._get_reddit()
+        if not reddit:
+            return None
+
+        posts = []
+        texts = []
+        for post in reddit.subreddit(sub_name).search(ticker, sort="new", time_filter="day", limit=limit):
+            posts.append({
+                "subreddit": sub_name,
+                "title": post.title,
+                "score": post.score,
+                "num_comments": post.num_comments,
+                "url": f"https://reddit.com{post.permalink}",
+                "created_utc": post.created_utc,
+            })
+            texts.append(f"{post.title} {post.selftext}")
+
+        # Score every post in one vectorized pass
+        for post, score in zip(posts, score_texts(texts)):
+            post["sentiment_score"] = round(score, 3)
+        return posts
+
     def get_news_sentiment(self, ticker: str, limit: int = 10) -> dict:
         """Fetch news headlines and score sentiment."""
-        cache_key = f"news_sentiment:{ticker}"
-        cached = cache_get(cache_key)
-        if cached:
-            return cached
+        return cache_fetch(f"news_sentiment:{ticker}",
+                           lambda: self._fetch_news_sentiment(ticker, limit),
+                           ttl=Config.NEWS_CACHE_TTL)
 
+    def _fetch_news_sentiment(self, ticker: str, limit: int) -> dict:
         articles = []
-        total_score = 0.0
+        texts = []
 
         if Config.NEWS_API_KEY:
             try:
-                resp = requests.get(
+                resp = http_pool.get(
                     f"{Config.NEWS_API_BASE_URL}/everything",
                     params={
                         "q": ticker,
@@ -117,25 +133,25 @@ class SentimentService:
                         "pageSize": limit,
                         "apiKey": Config.NEWS_API_KEY,
                     },
-                    timeout=10,
                 )
                 resp.raise_for_status()
                 data = resp.json()
                 for article in data.get("articles", []):
-                    text = f"{article.get('title', '')} {article.get('description', '')}"
-                    score = _score_text(text)
-                    total_score += score
                     articles.append({
                         "title": article.get("title"),
                         "source": article.get("source", {}).get("name"),
                         "url": article.get("url"),
                         "published_at": article.get("publishedAt"),
-                        "sentiment_score": round(score, 3),
                     })
+                    texts.append(f"{article.get('title') or ''} {article.get('description') or ''}")
             except Exception as e:
                 logger.error(f"News fetch error for {ticker}: {e}")
 
-        avg_score = round(total_score / len(articles), 3) if articles else 0.0
+        scores = score_texts(texts)
+        for article, score in zip(articles, scores):
+            article["sentiment_score"] = round(score, 3)
+
+        avg_score = round(sum(scores) / len(articles), 3) if articles else 0.0
         result = {
             "ticker": ticker,
             "source": "news",
@@ -144,7 +160,6 @@ class SentimentService:
             "sentiment_label": _label(avg_score),
             "articles": articles,
         }
-        cache_set(cache_key, result, ttl=Config.NEWS_CACHE_TTL)
         return result
 
     def calculate_combined_score(self, reddit_data: dict, news_data: dict) -> dict:
@@ -164,39 +179,11 @@ class SentimentService:
             "news_articles": news_data.get("article_count", 0),
         }
 
-    def get_trending_tickers(self) -> list:
-        """Get trending tickers from Reddit's wallstreetbets."""
-        cache_key = "trending_tickers"
-        cached = cache_get(cache_key)
-        if cached:
-            return cached
+    def get_trending_tickers(self, window: str = "24h", limit: int = 15) -> list:
+        """Get trending tickers from the incrementally ingested Reddit mention counts."""
+        from services.trending import trending_tracker
 
-        reddit = self._get_reddit()
-        if not reddit:
-            return []
-
-        ticker_counts: dict[str, int] = {}
-        ticker_pattern = re.compile(r"\b([A-Z]{2,5})\b")
-        common_words = {"THE", "AND", "FOR", "ARE", "BUT", "NOT", "YOU", "ALL",
-                        "CAN", "HER", "WAS", "ONE", "OUR", "OUT", "HAS", "ITS",
-                        "JUST", "LIKE", "BEEN", "THIS", "THAT", "WITH", "HAVE",
-                        "FROM", "THEY", "WILL", "WHAT", "WHEN", "YOUR", "SAID",
-                        "EACH", "SOME", "INTO", "THAN", "THEM", "VERY", "ALSO",
-                        "YOLO", "IMO", "DD", "TL", "EDIT", "UPDATE", "PSA", "FYI"}
-        try:
-            for post in reddit.subreddit("wallstreetbets").hot(limit=50):
-                matches = ticker_pattern.findall(f"{post.title} {post.selftext}")
-                for m in matches:
-                    if m not in common_words:
-                        ticker_counts[m] = ticker_counts.get(m, 0) + 1
-        except Exception as e:
-            logger.error(f"Trending tickers error: {e}")
-            return []
-
-        trending = sorted(ticker_counts.items(), key=lambda x: x[1], reverse=True)[:15]
-        result = [{"ticker": t, "mentions": c} for t, c in trending]
-        cache_set(cache_key, result, ttl=Config.SENTIMENT_CACHE_TTL)
-        return result
+        return trending_tracker.top(window, limit)
 
 
 def _label(score: float) -> str:
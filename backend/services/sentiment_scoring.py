@@ -0,0 +1,162 @@
+import json
+import logging
+import string
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Default lexicon: every word weighs 1.0 (bullish) or -1.0 (bearish)
+POSITIVE_WORDS = {
+    "moon", "rocket", "bull", "bullish", "long", "calls", "buy", "surge",
+    "breakout", "green", "up", "high", "profit", "gain", "squeeze", "yolo",
+    "diamond", "hands", "tendies", "earnings", "beat", "upgrade",
+}
+NEGATIVE_WORDS = {
+    "bear", "bearish", "short", "puts", "sell", "dump", "crash", "red",
+    "down", "low", "loss", "bag", "drill", "tank", "fade", "miss",
+    "downgrade", "overvalued", "bubble", "fear",
+}
+# Words that flip the polarity of lexicon terms shortly after them ("not bullish")
+NEGATORS = {
+    "not", "no", "never", "nor", "without", "hardly", "don't", "dont",
+    "doesn't", "doesnt", "isn't", "isnt", "wasn't", "wasnt", "won't", "wont",
+    "can't", "cant", "ain't", "aint",
+}
+
+# Bytes that make up a token: ASCII letters, digits, "_" and "'", plus any
+# non-ASCII UTF-8 byte so accented words stay whole
+_WORD_BYTES = np.zeros(256, dtype=bool)
+_WORD_BYTES[[ord(c) for c in string.ascii_letters + string.digits + "_'"]] = True
+_WORD_BYTES[128:] = True
+
+# Negation doesn't carry past clause punctuation or into the next document
+_CLAUSE_BREAKS = np.zeros(256, dtype=bool)
+_CLAUSE_BREAKS[[ord(c) for c in "\x00.,;:!?"]] = True
+
+
+def _tokenize(texts: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Split all texts in one pass over a single byte buffer.
+
+    Returns (buffer, token starts, token lengths, document index and clause
+    index per token).
+    """
+    joined = "\x00".join(texts)
+    if joined.count("\x00") != len(texts) - 1:
+        joined = "\x00".join(t.replace("\x00", " ") for t in texts)
+    joined = joined.lower().replace("’", "'")
+    buf = np.frombuffer(joined.encode() + b"\x00", dtype=np.uint8)
+    is_word = _WORD_BYTES[buf]
+    edges = np.diff(is_word.astype(np.int8), prepend=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    lengths = np.flatnonzero(edges == -1) - starts
+    doc = np.searchsorted(np.flatnonzero(buf == 0), starts)
+    clause = np.cumsum(_CLAUSE_BREAKS[buf])[starts]
+    return buf, starts, lengths, doc, clause
+
+
+class SentimentScorer:
+    """Scores batches of documents against a weighted lexicon with NumPy.
+
+    Documents are tokenized together and matched against the compiled
+    vocabulary without a per-token Python loop: a (first byte, length) table
+    rules out most tokens, and the rest are compared as fixed-width byte
+    keys. Lexicon hits form a sparse (document, term, weight) matrix reduced
+    per document with bincount. A term within `negation_window` tokens after
+    a negator in the same clause has its weight flipped. Each distinct (term, polarity) counts
+    once per document, and a score is (positive - negative) / (positive +
+    negative) in [-1.0, 1.0].
+    """
+
+    def __init__(self, lexicon: dict[str, float], negators: set[str] = NEGATORS,
+                 negation_window: int = 3):
+        self.terms = list(lexicon)
+        self.negation_window = negation_window
+
+        # Vocabulary: lexicon terms first, then negators; the extra last
+        # slot of each lookup array stands for "not in the vocabulary" (-1)
+        vocab = self.terms + sorted(set(negators) - set(self.terms))
+        encoded = [w.encode() for w in vocab]
+        self.width = max(map(len, encoded), default=1)
+        keys = np.array(encoded, dtype=f"S{self.width}")
+        self._order = np.argsort(keys)
+        self._keys = keys[self._order]
+        self.weights = np.zeros(len(vocab) + 1)
+        self.weights[:len(self.terms)] = [lexicon[t] for t in self.terms]
+        self._is_negator = np.zeros(len(vocab) + 1, dtype=bool)
+        self._is_negator[[i for i, w in enumerate(vocab) if w in negators]] = True
+        self._prefilter = np.zeros((256, self.width + 2), dtype=bool)
+        for w in encoded:
+            if w:
+                self._prefilter[w[0], len(w)] = True
+
+    def _lookup(self, buf: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Vocabulary id of each token, or -1."""
+        ids = np.full(len(starts), -1, dtype=np.int64)
+        capped = np.minimum(lengths, self.width + 1)
+        candidates = np.flatnonzero(self._prefilter[buf[starts], capped])
+        if not len(candidates):
+            return ids
+
+        offsets = np.arange(self.width)
+        idx = np.minimum(starts[candidates, None] + offsets, len(buf) - 1)
+        chars = np.where(offsets < lengths[candidates, None], buf[idx], 0).astype(np.uint8)
+        keys = np.ascontiguousarray(chars).view(f"S{self.width}").ravel()
+        pos = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        hit = self._keys[pos] == keys
+        ids[candidates[hit]] = self._order[pos[hit]]
+        return ids
+
+    def term_matrix(self, texts: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Lexicon hits as sparse COO arrays: (document, term, signed weight)."""
+        buf, starts, lengths, doc, clause = _tokenize(texts)
+        ids = self._lookup(buf, starts, lengths)
+
+        # A token is negated if a negator from its own clause sits in the
+        # window [i - negation_window, i)
+        position = np.arange(len(ids))
+        negators_before = np.concatenate(([0], np.cumsum(self._is_negator[ids])))
+        clause_start = np.searchsorted(clause, clause)
+        window_start = np.maximum(position - self.negation_window, clause_start)
+        negated = negators_before[position] > negators_before[window_start]
+
+        hit = (ids >= 0) & (ids < len(self.terms))
+        doc, term, negated = doc[hit], ids[hit], negated[hit]
+
+        # Count each (document, term, polarity) once
+        keys = np.unique((doc * len(self.terms) + term) * 2 + negated)
+        doc, term = np.divmod(keys // 2, len(self.terms))
+        values = np.where(keys % 2 == 1, -self.weights[term], self.weights[term])
+        return doc, term, values
+
+    def score_batch(self, texts: list[str]) -> np.ndarray:
+        """Score each text from -1.0 (bearish) to 1.0 (bullish)."""
+        scores = np.zeros(len(texts))
+        if not texts or not self.terms:
+            return scores
+        doc, _, values = self.term_matrix(texts)
+        pos = np.bincount(doc, weights=np.maximum(values, 0), minlength=len(texts))
+        neg = np.bincount(doc, weights=np.maximum(-values, 0), minlength=len(texts))
+        total = pos + neg
+        np.divide(pos - neg, total, out=scores, where=total > 0)
+        return scores
+
+
+def load_lexicon(path: str | None = None) -> dict[str, float]:
+    """Load {word: weight} from a JSON file, or build the default lexicon."""
+    path = path or Config.SENTIMENT_LEXICON_PATH
+    if path:
+        try:
+            with open(path, "r") as f:
+                return {str(k).lower(): float(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Could not load sentiment lexicon from {path}: {e}")
+    return {**{w: 1.0 for w in POSITIVE_WORDS}, **{w: -1.0 for w in NEGATIVE_WORDS}}
+
+
+scorer = SentimentScorer(load_lexicon(), negation_window=Config.SENTIMENT_NEGATION_WINDOW)
+
+
+def score_texts(texts: list[str]) -> list[float]:
+    """Score a batch of texts with the configured lexicon."""
+    return scorer.score_batch(texts).tolist()
@@ -0,0 +1,161 @@
+import logging
+import uuid
+from flask import request
+from flask_socketio import emit, join_room, leave_room
+from config import Config
+from services.cache import get_redis
+from services.leader import LeaderLease
+from services.market_data import MarketDataService
+
+logger = logging.getLogger(__name__)
+
+# Quote fields whose changes are pushed to subscribers
+STREAM_FIELDS = ("price", "change", "change_percent", "volume", "high", "low", "open", "previous_close")
+SUBSCRIPTIONS_KEY_PREFIX = "stream:subs:"
+
+
+class QuoteStreamer:
+    """Pushes quote changes to Socket.IO rooms with one upstream poll per ticker.
+
+    Clients emit "subscribe"/"unsubscribe" with {"ticker", "market"} and join
+    a per-ticker room. Each worker publishes the tickers its clients follow
+    to Redis; a single elected poller batch-fetches quotes for the union of
+    all workers' subscriptions and emits "quote" events carrying only the
+    fields that changed. Emits go through the Socket.IO message queue, so they
+    reach clients connected to any worker.
+    """
+
+    def __init__(self, market_service: MarketDataService | None = None):
+        self.market_service = market_service or MarketDataService()
+        self.socketio = None
+        self.worker_id = uuid.uuid4().hex
+        self.lease = LeaderLease("quote_stream", ttl=Config.QUOTE_STREAM_INTERVAL * 3)
+        self._sids_by_stream: dict[str, set[str]] = {}  # this worker's clients only
+        self._streams_by_sid: dict[str, set[str]] = {}
+        self._last_sent: dict[str, dict] = {}
+        self._started = False
+
+    def init_app(self, socketio):
+        self.socketio = socketio
+        socketio.on_event("subscribe", self._on_subscribe)
+        socketio.on_event("unsubscribe", self._on_unsubscribe)
+        socketio.on_event("disconnect", self._on_disconnect)
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self._run)
+
+    @staticmethod
+    def _stream_key(data) -> str | None:
+        if not isinstance(data, dict) or not data.get("ticker"):
+            return None
+        return f"{data.get('market', 'US')}:{data['ticker'].upper()}"
+
+    def _on_subscribe(self, data):
+        key = self._stream_key(data)
+        if not key:
+            emit("stream_error", {"error": "ticker is required"})
+            return
+        join_room(f"quote:{key}")
+        self._sids_by_stream.setdefault(key, set()).add(request.sid)
+        self._streams_by_sid.setdefault(request.sid, set()).add(key)
+        self._publish_subscriptions()
+
+        # Send the current quote right away rather than waiting for a change
+        market, ticker = key.split(":", 1)
+        quote = self.market_service.get_quote(ticker, market)
+        if quote:
+            emit("quote", quote)
+
+    def _on_unsubscribe(self, data):
+        key = self._stream_key(data)
+        if key:
+            leave_room(f"quote:{key}")
+            self._remove(request.sid, key)
+            self._publish_subscriptions()
+
+    def _on_disconnect(self, *args):
+        for key in list(self._streams_by_sid.get(request.sid, ())):
+            self._remove(request.sid, key)
+        self._publish_subscriptions()
+
+    def _remove(self, sid: str, key: str):
+        sids = self._sids_by_stream.get(key)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._sids_by_stream[key]
+        keys = self._streams_by_sid.get(sid)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._streams_by_sid[sid]
+
+    def _publish_subscriptions(self):
+        """Mirror this worker's subscriptions to Redis with a TTL, so a dead
+        worker's tickers stop being polled once its key expires."""
+        client = get_redis()
+        if not client:
+            return
+        key = f"{SUBSCRIPTIONS_KEY_PREFIX}{self.worker_id}"
+        try:
+            pipe = client.pipeline()
+            pipe.delete(key)
+            if self._sids_by_stream:
+                pipe.hset(key, mapping={k: len(v) for k, v in self._sids_by_stream.items()})
+                pipe.expire(key, Config.QUOTE_STREAM_INTERVAL * 3)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not publish stream subscriptions: {e}")
+
+    def _all_subscriptions(self) -> set[str]:
+        client = get_redis()
+        if not client:
+            return set(self._sids_by_stream)
+        keys = set()
+        for redis_key in client.scan_iter(match=f"{SUBSCRIPTIONS_KEY_PREFIX}*", count=100):
+            keys.update(k.decode() for k in client.hkeys(redis_key))
+        return keys
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(Config.QUOTE_STREAM_INTERVAL)
+            try:
+                self._publish_subscriptions()
+                if self.lease.heartbeat():
+                    self._poll()
+                else:
+                    self._last_sent.clear()
+            except Exception as e:
+                logger.error(f"Quote stream poll failed: {e}")
+
+    def _poll(self):
+        streams = self._all_subscriptions()
+        for key in set(self._last_sent) - streams:
+            del self._last_sent[key]
+
+        by_market: dict[str, list[str]] = {}
+        for key in streams:
+            market, ticker = key.split(":", 1)
+            by_market.setdefault(market, []).append(ticker)
+
+        for market, tickers in by_market.items():
+            quotes = self.market_service.get_quotes(tickers, market)
+            for ticker, quote in quotes.items():
+                key = f"{market}:{ticker}"
+                update = self._diff(key, quote) if quote else None
+                if update:
+                    self.socketio.emit("quote", update, to=f"quote:{key}")
+
+    def _diff(self, key: str, quote: dict) -> dict | None:
+        last = self._last_sent.get(key)
+        self._last_sent[key] = quote
+        if last is None:
+            return quote
+        changed = {f: quote.get(f) for f in STREAM_FIELDS if quote.get(f) != last.get(f)}
+        if not changed:
+            return None
+        return {"ticker": quote["ticker"], "symbol": quote["symbol"], "market": quote["market"],
+                **changed, "timestamp": quote["timestamp"]}
+
+
+quote_streamer = QuoteStreamer()
@@ -0,0 +1,248 @@
+import csv
+import io
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from config import Config
+from services.cache import get_redis
+from services.tickers import load_listings, ticker_extractor
+
+logger = logging.getLogger(__name__)
+
+LISTING_KEY = "symbols:listing"
+LISTING_VERSION_KEY = "symbols:listing:version"
+
+REGIONS = {"US": "United States", "IN": "India/Bombay"}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insert, delete, substitution or adjacent swap."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return a[i + 1:] == b[i:] if la > lb else a[i:] == b[i + 1:]
+
+
+class SymbolIndex:
+    """In-memory prefix and fuzzy search over listed symbols and company names.
+
+    Symbols, full names and individual name words are kept as sorted key
+    arrays with parallel row-id arrays, so a prefix lookup is two bisects
+    and a slice. Queries with no prefix match fall back to keys within one
+    edit of the query. A single edit after the first character keeps either
+    the first two characters or the first and last ones, so candidates come
+    from two small buckets keyed on those and the length.
+    """
+
+    def __init__(self, listings: list[dict]):
+        self.rows = [(r["symbol"], r["name"], r["type"], r["market"]) for r in listings]
+        self._symbols, self._symbol_ids = self._sorted(
+            (symbol, i) for i, (symbol, _, _, _) in enumerate(self.rows))
+        self._names, self._name_ids = self._sorted(
+            (name.lower(), i) for i, (_, name, _, _) in enumerate(self.rows) if name)
+        self._words, self._word_ids = self._sorted(
+            (word, i) for i, (_, name, _, _) in enumerate(self.rows)
+            for word in set(name.lower().replace(",", " ").split()[1:]) if len(word) > 1)
+
+        # Fuzzy candidates: symbols and first name words
+        self._buckets: dict[tuple[str, int], list[tuple[str, int]]] = {}
+        for i, (symbol, name, _, _) in enumerate(self.rows):
+            for term in {symbol.lower(), (name.lower().split() or [""])[0]}:
+                if len(term) >= 3:
+                    self._buckets.setdefault((term[:2], len(term)), []).append((term, i))
+                    self._buckets.setdefault((term[0] + term[-1], -len(term)), []).append((term, i))
+
+    def __len__(self):
+        return len(self.rows)
+
+    @staticmethod
+    def _sorted(pairs) -> tuple[list[str], array]:
+        pairs = sorted(pairs)
+        return [k for k, _ in pairs], array("I", (i for _, i in pairs))
+
+    @staticmethod
+    def _prefix(keys: list[str], ids: array, prefix: str, limit: int) -> list[int]:
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + "\uffff", lo)
+        return list(ids[lo:min(hi, lo + limit)])
+
+    def search(self, query: str, limit: int = 10, market: str | None = None) -> list[dict]:
+        """Best matches for query: exact symbol, symbol prefix, name prefix, name word prefix, then fuzzy."""
+        query = " ".join(query.split())
+        if not query:
+            return []
+        upper, lower = query.upper(), query.lower()
+        # Over-fetch from each tier so a market filter still fills the limit
+        fetch = limit * 4 if market else limit
+
+        ranked: dict[int, None] = {}
+        for ids in (
+            self._prefix(self._symbols, self._symbol_ids, upper, fetch),
+            self._prefix(self._names, self._name_ids, lower, fetch),
+            self._prefix(self._words, self._word_ids, lower, fetch),
+        ):
+            ranked.update(dict.fromkeys(ids))
+        if not ranked and len(lower) >= 3:
+            ranked.update(dict.fromkeys(self._fuzzy(lower)))
+
+        results = []
+        for i in ranked:
+            symbol, name, asset_type, row_market = self.rows[i]
+            if market and row_market != market:
+                continue
+            results.append({
+                "symbol": symbol,
+                "name": name,
+                "type": asset_type,
+                "region": REGIONS.get(row_market, row_market),
+                "market": row_market,
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def _fuzzy(self, term: str) -> list[int]:
+        matches: dict[int, None] = {}
+        head, ends = term[:2], term[0] + term[-1]
+        buckets = [self._buckets.get(key, ()) for length in (len(term), len(term) - 1, len(term) + 1)
+                   for key in ((head, length), (ends, -length))]
+        if len(term) == 3:
+            # Swapping the last two letters of a three-letter key changes both
+            buckets.append(self._buckets.get((term[0] + term[2], 3), ()))
+        for bucket in buckets:
+            for key, i in bucket:
+                if i not in matches and _within_one_edit(term, key):
+                    matches[i] = None
+        return list(matches)
+
+
+class SymbolSearch:
+    """Holds the current SymbolIndex and swaps in new listings as they arrive.
+
+    The scheduler leader downloads LISTING_STATUS periodically and publishes
+    it to Redis with a version; every worker checks the version and rebuilds
+    its index when it changes. Until then the bundled listing file is used.
+    """
+
+    def __init__(self):
+        self._index: SymbolIndex | None = None
+        self._version = None
+        self._published_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> SymbolIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = SymbolIndex(load_listings())
+                    logger.info(f"Loaded {len(self._index)} symbols into the search index")
+        return self._index
+
+    def search(self, query: str, limit: int = 10, market: str | None = None) -> list[dict]:
+        return self.index.search(query, limit, market)
+
+    def listing_age(self) -> float:
+        """Seconds since listings were last published."""
+        client = get_redis()
+        if client:
+            try:
+                version = client.get(LISTING_VERSION_KEY)
+                return time.time() - float(version) if version else float("inf")
+            except Exception:
+                pass
+        return time.time() - self._published_at
+
+    def publish(self, listing_csv: str):
+        """Share freshly downloaded US listings with every worker."""
+        listings = _merge_listings(listing_csv)
+        if not listings:
+            return
+        self._published_at = time.time()
+        client = get_redis()
+        if client:
+            try:
+                pipe = client.pipeline()
+                pipe.set(LISTING_KEY, listing_csv)
+                pipe.set(LISTING_VERSION_KEY, str(self._published_at))
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Could not publish symbol listings: {e}")
+        self._swap(listings, version=None)
+
+    def sync(self):
+        """Rebuild the index if newer listings were published."""
+        self.index  # build from the bundled file on first run
+        client = get_redis()
+        if not client:
+            return
+        try:
+            version = client.get(LISTING_VERSION_KEY)
+            if version is None or version == self._version:
+                return
+            listing_csv = client.get(LISTING_KEY)
+        except Exception as e:
+            logger.warning(f"Could not read symbol listings: {e}")
+            return
+        if listing_csv:
+            self._swap(_merge_listings(listing_csv.decode()), version)
+
+    def _swap(self, listings: list[dict], version):
+        index = SymbolIndex(listings)
+        with self._lock:
+            self._index = index
+            self._version = version
+        # Ticker extraction should know the same symbols search does
+        ticker_extractor.load(listings)
+        logger.info(f"Symbol search index refreshed with {len(index)} symbols")
+
+
+def _merge_listings(listing_csv: str) -> list[dict]:
+    """Downloaded US listings plus the bundled non-US ones (LISTING_STATUS is US-only)."""
+    rows = [r for r in csv.DictReader(io.StringIO(listing_csv))
+            if r.get("symbol") and r.get("assetType") in ("Stock", "ETF")
+            and (r.get("status") or "Active") == "Active"]
+    if not rows:
+        return []
+    downloaded = [{
+        "symbol": r["symbol"].strip().upper(),
+        "name": (r.get("name") or "").strip(),
+        "exchange": (r.get("exchange") or "").strip(),
+        "type": r["assetType"],
+        "market": "US",
+    } for r in rows]
+    return downloaded + [r for r in load_listings() if r["market"] != "US"]
+
+
+symbol_search = SymbolSearch()
+
+
+def fetch_symbol_listings(app):
+    """Scheduled job: download current listings and publish them to all workers."""
+    from services.market_data import MarketDataService
+
+    if symbol_search.listing_age() < Config.SYMBOL_LISTING_REFRESH_INTERVAL:
+        return
+    listing_csv = MarketDataService().fetch_listings()
+    if listing_csv:
+        symbol_search.publish(listing_csv)
+
+
+def sync_symbol_index(app):
+    """Scheduled job: pick up listings published by the leader."""
+    try:
+        symbol_search.sync()
+    except Exception as e:
+        logger.error(f"Symbol index sync failed: {e}")
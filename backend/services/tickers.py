@@ -0,0 +1,223 @@
+import csv
+import logging
+import re
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+INDIAN_EXCHANGES = {"BSE", "NSE"}
+
+# Words of a symbol-like token or an interior-punctuated name ("AT&T",
+# "BRK-B", "Coca-Cola", "Lowe's"), optionally written as a $cashtag
+_TOKEN_RE = re.compile(r"\$?[A-Za-z0-9]+(?:[&.\-'][A-Za-z0-9]+)*")
+
+# A $cashtag shaped like a ticker ("$ZM", "$BRK.B"), counted even when the
+# symbol isn't in the listings; "$100" and "$5k" are amounts
+_CASHTAG_RE = re.compile(r"\$[A-Za-z]{1,6}(?:[.\-][A-Za-z]{1,2})?")
+
+# Uppercase words that are also listed symbols but are usually just words or
+# trading jargon; they only count as tickers when written as cashtags
+AMBIGUOUS_SYMBOLS = {
+    "A", "I", "AI", "ALL", "AM", "ARE", "AT", "BE", "BIG", "CAN", "CEO", "DD",
+    "EV", "FOR", "FUN", "GO", "HAS", "IT", "LOW", "NOW", "ON", "ONE", "OPEN",
+    "OR", "OUT", "PM", "SO", "TV", "UK", "USA", "YOLO", "LOVE", "REAL", "NEW",
+    "BEL", "LT", "MA", "MS", "DE", "GE", "HD",
+}
+
+# Company names that are also everyday words; they only count when
+# capitalized ("Target", not "price target")
+AMBIGUOUS_NAMES = {
+    "target", "block", "snap", "visa", "arm", "oracle", "shell", "gap",
+    "titan", "lucid", "dell", "meta", "chase", "reddit",
+}
+
+# Names people use that can't be derived from the listed company name
+EXTRA_ALIASES = {
+    "GOOGL": ["google"],
+    "META": ["meta", "facebook"],
+    "BRK-B": ["berkshire"],
+    "JPM": ["jpmorgan", "jp morgan", "chase"],
+    "GS": ["goldman"],
+    "KO": ["coke"],
+    "LLY": ["lilly"],
+    "AMD": ["amd"],
+    "TSM": ["tsmc"],
+    "DIS": ["disney"],
+    "MSTR": ["microstrategy"],
+    "NVO": ["novo"],
+    "RELIANCE": ["reliance"],
+    "M&M": ["mahindra"],
+    "PAYTM": ["paytm"],
+    "NYKAA": ["nykaa"],
+}
+
+_NAME_SUFFIXES = {
+    "inc", "corp", "corporation", "co", "company", "ltd", "limited", "plc",
+    "holdings", "holding", "group", "sa", "nv", "a/s", "trust", "the",
+}
+# "Uber Technologies" is also just "Uber", but "General Motors" isn't "General"
+_NAME_DESCRIPTORS = {
+    "technologies", "technology", "platforms", "systems", "communications",
+    "global", "entertainment", "markets", "motor", "motors", "automotive",
+    "industries", "wholesale", "media", "enterprises", "companies",
+}
+_GENERIC_FIRST_WORDS = {
+    "general", "american", "international", "united", "advanced", "national",
+    "tata", "bajaj", "adani", "bharat", "hindustan", "indian", "asian", "sun",
+}
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text)
+
+
+def _name_aliases(name: str) -> set[str]:
+    """Spoken forms of a listed company name: "Tesla Inc" -> {"tesla"}."""
+    base = name.split(" - ")[0].lower()
+    words = [w for w in base.replace(",", " ").split() if w != "&"]
+    while words and words[-1].strip(".") in _NAME_SUFFIXES:
+        words.pop()
+    while words and words[0] == "the":
+        words.pop(0)
+    aliases = {" ".join(words)} if words else set()
+    if len(words) == 2 and words[1] in _NAME_DESCRIPTORS and words[0] not in _GENERIC_FIRST_WORDS:
+        aliases.add(words[0])
+    if words and words[0].endswith(".com"):
+        aliases.add(words[0][:-4])
+    return {a for a in aliases if len(a) >= 3}
+
+
+def load_listings(path: str | None = None) -> list[dict]:
+    """Read a LISTING_STATUS-style CSV (symbol,name,exchange,assetType,...)."""
+    path = path or Config.SYMBOLS_PATH
+    try:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+    except OSError as e:
+        logger.error(f"Could not load symbol listings from {path}: {e}")
+        return []
+    listings = []
+    for row in rows:
+        symbol = (row.get("symbol") or "").strip().upper()
+        if not symbol or (row.get("status") or "Active") != "Active":
+            continue
+        exchange = (row.get("exchange") or "").strip()
+        listings.append({
+            "symbol": symbol,
+            "name": (row.get("name") or "").strip(),
+            "exchange": exchange,
+            "type": (row.get("assetType") or "").strip(),
+            "market": "IN" if exchange in INDIAN_EXCHANGES else "US",
+        })
+    return listings
+
+
+class TickerExtractor:
+    """Finds ticker mentions in free text with a word-level trie.
+
+    Symbols, company names and $cashtags from the listings are compiled into
+    one trie keyed by lowercase words. Text is tokenized once and matched in a
+    single left-to-right pass, taking the longest match at each position, so
+    "Bank of America" wins over shorter names inside it. A bare symbol counts
+    only when written in capitals and not in AMBIGUOUS_SYMBOLS; a cashtag
+    always counts, as a US symbol if it isn't listed.
+    """
+
+    def __init__(self, listings: list[dict]):
+        self.load(listings)
+
+    def __len__(self):
+        return len(self.markets)
+
+    def load(self, listings: list[dict]):
+        """Rebuild the trie from new listings and swap it in."""
+        markets: dict[str, str] = {}
+        trie: dict = {}
+        max_words = 1
+        for row in listings:
+            symbol = row["symbol"]
+            markets.setdefault(symbol, row["market"])
+            max_words = max(max_words, self._add(trie, symbol.lower(), (symbol, "symbol")))
+            if "-" in symbol:
+                self._add(trie, symbol.lower().replace("-", "."), (symbol, "symbol"))
+            for alias in _name_aliases(row["name"]) | set(EXTRA_ALIASES.get(symbol, ())):
+                max_words = max(max_words, self._add(trie, alias, (symbol, "name")))
+        # One assignment, so a concurrent extract() sees the old or the new trie
+        self._state = (trie, markets, max_words)
+
+    @property
+    def markets(self) -> dict[str, str]:
+        return self._state[1]
+
+    @staticmethod
+    def _add(trie: dict, phrase: str, entry: tuple[str, str]) -> int:
+        """Add a phrase to the trie; returns its length in words."""
+        words = [w.lower() for w in _tokens(phrase)]
+        if not words:
+            return 0
+        node = trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(None, []).append(entry)
+        return len(words)
+
+    def market_of(self, symbol: str) -> str | None:
+        return self.markets.get(symbol.upper())
+
+    def extract(self, text: str, market: str | None = None) -> list[str]:
+        """Symbols mentioned in text, in order of first mention."""
+        trie, markets, max_words = self._state
+        tokens = _tokens(text)
+        lowered = [t.lower() for t in tokens]
+        # Only tokens that begin some known phrase, or cashtags, can start a match
+        candidates = [i for i, w in enumerate(lowered) if w in trie or w[0] == "$"]
+        found: dict[str, None] = {}
+        end = 0
+        for i in candidates:
+            if i < end:
+                continue  # inside the previous match
+            match, length = self._match(trie, max_words, tokens, lowered, i)
+            if match:
+                end = i + length
+                if market is None or markets.get(match, "US") == market:
+                    found[match] = None
+        return list(found)
+
+    def _match(self, trie: dict, max_words: int, tokens: list[str], lowered: list[str],
+               i: int) -> tuple[str | None, int]:
+        """Longest accepted match starting at token i, as (symbol, token count)."""
+        cashtag = tokens[i].startswith("$")
+        node = trie
+        best = (None, 0)
+        for j in range(i, min(i + max_words, len(tokens))):
+            word = lowered[j][1:] if j == i and cashtag else lowered[j]
+            node = node.get(word)
+            if node is None:
+                break
+            for symbol, kind in node.get(None, ()):
+                if self._accept(tokens, i, j, symbol, kind, cashtag):
+                    best = (symbol, j - i + 1)
+                    break
+        if best[0] is None and cashtag and _CASHTAG_RE.fullmatch(tokens[i]):
+            return tokens[i][1:].upper().replace(".", "-"), 1
+        return best
+
+    @staticmethod
+    def _accept(tokens: list[str], i: int, j: int, symbol: str, kind: str, cashtag: bool) -> bool:
+        if kind == "symbol":
+            if cashtag:
+                return True
+            written = tokens[i].replace(".", "-")
+            return written == symbol and len(symbol) > 1 and symbol not in AMBIGUOUS_SYMBOLS
+        if cashtag:
+            return False
+        phrase = " ".join(tokens[i:j + 1])
+        return phrase.lower() not in AMBIGUOUS_NAMES or phrase[0].isupper()
+
+
+ticker_extractor = TickerExtractor(load_listings())
+
+
+def extract_tickers(text: str, market: str | None = None) -> list[str]:
+    """Ticker symbols mentioned in text, optionally only those of one market."""
+    return ticker_extractor.extract(text, market)
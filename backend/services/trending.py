@@ -0,0 +1,183 @@
+import time
+import uuid
+import logging
+import threading
+from collections import Counter
+from config import Config
+from services.cache import cache_fetch, get_redis
+from services.sentiment import SentimentService
+from services.tickers import extract_tickers
+
+logger = logging.getLogger(__name__)
+
+SEEN_KEY = "trending:seen"
+BUCKET_KEY_PREFIX = "trending:mentions:"
+TMP_KEY_TTL = 60  # seconds; ranking temp keys outlive a query only if it fails
+
+
+class TrendingTracker:
+    """Sliding-window ticker mention counts over time buckets.
+
+    Each ingested post adds one mention per ticker it names to the sorted set
+    of the TRENDING_BUCKET_SECONDS bucket it was created in. A window's
+    ranking is the union of its buckets, and the same buckets one window
+    further back give the previous count for a velocity signal. Post ids are
+    remembered so each post is counted once. Without Redis the buckets are
+    kept in memory, and every worker ingests for itself (see the scheduler).
+    """
+
+    def __init__(self):
+        self.bucket_seconds = Config.TRENDING_BUCKET_SECONDS
+        # Velocity compares a window with the one before it
+        self.retention = 2 * max(Config.TRENDING_WINDOWS.values())
+        self._local_buckets: dict[int, Counter] = {}
+        self._local_seen: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def ingest(self, posts: list[tuple[str, float, str]]) -> int:
+        """Count mentions in (post_id, created_utc, text) posts not seen before.
+
+        Returns the number of new posts.
+        """
+        now = time.time()
+        cutoff = now - self.retention
+        posts = list({p[0]: p for p in posts if p[1] > cutoff}.values())
+        new_posts = self._claim_unseen(posts, now)
+        counts: dict[int, Counter] = {}
+        for _, created, text in new_posts:
+            counts.setdefault(self._bucket(created), Counter()).update(extract_tickers(text, "US"))
+        counts = {b: c for b, c in counts.items() if c}
+        if counts:
+            self._add_counts(counts)
+        return len(new_posts)
+
+    def _claim_unseen(self, posts: list[tuple[str, float, str]], now: float) -> list:
+        client = get_redis()
+        if client:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for post_id, _, _ in posts:
+                    pipe.zadd(SEEN_KEY, {post_id: now}, nx=True)
+                pipe.zremrangebyscore(SEEN_KEY, "-inf", now - self.retention)
+                added = pipe.execute()[:len(posts)]
+                return [p for p, is_new in zip(posts, added) if is_new]
+            except Exception as e:
+                logger.warning(f"Trending seen-set unavailable, using local state: {e}")
+
+        with self._lock:
+            self._local_seen = {k: v for k, v in self._local_seen.items() if v > now - self.retention}
+            new_posts = [p for p in posts if p[0] not in self._local_seen]
+            self._local_seen.update((p[0], now) for p in new_posts)
+        return new_posts
+
+    def _add_counts(self, counts: dict[int, Counter]):
+        client = get_redis()
+        if client:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for bucket, counter in counts.items():
+                    key = f"{BUCKET_KEY_PREFIX}{bucket}"
+                    for ticker, n in counter.items():
+                        pipe.zincrby(key, n, ticker)
+                    pipe.expireat(key, (bucket + 1) * self.bucket_seconds + self.retention)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Could not store trending counts in Redis: {e}")
+
+        with self._lock:
+            oldest = self._bucket(time.time() - self.retention)
+            for bucket in [b for b in self._local_buckets if b < oldest]:
+                del self._local_buckets[bucket]
+            for bucket, counter in counts.items():
+                self._local_buckets.setdefault(bucket, Counter()).update(counter)
+
+    def _window_buckets(self, end: int, seconds: int) -> list[int]:
+        return list(range(end - seconds // self.bucket_seconds + 1, end + 1))
+
+    def top(self, window: str = "24h", limit: int = 15) -> list[dict]:
+        """Most-mentioned tickers in the window, with their velocity."""
+        seconds = Config.TRENDING_WINDOWS[window]
+        return cache_fetch(f"trending:top:{window}:{limit}",
+                           lambda: self._compute_top(seconds, limit),
+                           ttl=Config.TRENDING_CACHE_TTL) or []
+
+    def _compute_top(self, seconds: int, limit: int) -> list[dict]:
+        end = self._bucket(time.time())
+        current = self._window_buckets(end, seconds)
+        previous = self._window_buckets(end - len(current), seconds)
+
+        client = get_redis()
+        ranked, before = None, None
+        if client:
+            try:
+                ranked, before = self._redis_top(client, current, previous, limit)
+            except Exception as e:
+                logger.warning(f"Trending query failed in Redis: {e}")
+        if ranked is None:
+            with self._lock:
+                now_counts = sum((self._local_buckets.get(b, Counter()) for b in current), Counter())
+                prev_counts = sum((self._local_buckets.get(b, Counter()) for b in previous), Counter())
+            ranked = now_counts.most_common(limit)
+            before = [prev_counts.get(t, 0) for t, _ in ranked]
+
+        hours = seconds / 3600
+        result = []
+        for (ticker, mentions), prev in zip(ranked, before):
+            result.append({
+                "ticker": ticker,
+                "mentions": int(mentions),
+                "previous_mentions": int(prev),
+                # Change in mentions per hour versus the previous window
+                "velocity": round((mentions - prev) / hours, 2),
+            })
+        return result
+
+    def _redis_top(self, client, current: list[int], previous: list[int], limit: int):
+        tmp_current = f"trending:tmp:{uuid.uuid4().hex}"
+        tmp_previous = f"{tmp_current}:prev"
+        # One MULTI, so each temp key is created together with its expiry and
+        # is cleaned up even if we never get to delete it
+        pipe = client.pipeline(transaction=True)
+        pipe.zunionstore(tmp_current, [f"{BUCKET_KEY_PREFIX}{b}" for b in current])
+        pipe.zrevrange(tmp_current, 0, limit - 1, withscores=True)
+        pipe.zunionstore(tmp_previous, [f"{BUCKET_KEY_PREFIX}{b}" for b in previous])
+        pipe.expire(tmp_previous, TMP_KEY_TTL)
+        pipe.delete(tmp_current)
+        _, ranked, _, _, _ = pipe.execute()
+        ranked = [(member.decode(), score) for member, score in ranked]
+
+        pipe = client.pipeline(transaction=False)
+        if ranked:
+            pipe.zmscore(tmp_previous, [t for t, _ in ranked])
+        pipe.delete(tmp_previous)
+        before = pipe.execute()[0] if ranked else []
+        return ranked, [b or 0 for b in before]
+
+
+trending_tracker = TrendingTracker()
+_sentiment_service = SentimentService()
+
+
+def ingest_trending(app):
+    """Scheduled job: count ticker mentions in new posts."""
+    reddit = _sentiment_service._get_reddit()
+    if not reddit:
+        return
+
+    posts = []
+    for sub_name in Config.TRENDING_SUBREDDITS:
+        try:
+            for post in reddit.subreddit(sub_name).new(limit=Config.TRENDING_INGEST_LIMIT):
+                posts.append((post.id, post.created_utc, f"{post.title} {post.selftext}"))
+        except Exception as e:
+            logger.error(f"Trending ingest failed for r/{sub_name}: {e}")
+    try:
+        count = trending_tracker.ingest(posts)
+        if count:
+            logger.info(f"Ingested {count} new posts for trending tickers")
+    except Exception as e:
+        logger.error(f"Trending ingest failed: {e}")
@@ -0,0 +1,67 @@
+import json
+from datetime import date
+from flask.json.provider import JSONProvider
+import numpy as np
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Native datetimes, NumPy arrays and scalars, and dicts with int keys
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def _default(value):
+    """Types neither encoder handles natively (and, for the stdlib, what orjson does)."""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _use_orjson() -> bool:
+    return orjson is not None and Config.JSON_ENCODER == "orjson"
+
+
+def dumps(value) -> bytes:
+    """Encode to compact JSON bytes.
+
+    Uses orjson when it is installed and JSON_ENCODER is "orjson", otherwise
+    the stdlib encoder. Either way datetimes become ISO 8601 strings and
+    NumPy arrays lists, so query rows and array columns can be passed
+    through without converting each value first.
+    """
+    if _use_orjson():
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def loads(data: bytes | str):
+    return orjson.loads(data) if _use_orjson() else json.loads(data)
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider on top of dumps()/loads().
+
+    Responses are built from the encoded bytes directly, without the
+    bytes -> str -> bytes round trip of the default provider.
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
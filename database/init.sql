@@ -58,11 +58,30 @@ CREATE TABLE IF NOT EXISTS features (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- OHLCV history; the primary key serves (symbol, interval, ts) range scans
+CREATE TABLE IF NOT EXISTS price_bars (
+    symbol VARCHAR(30) NOT NULL,
+    interval VARCHAR(10) NOT NULL,
+    ts TIMESTAMP NOT NULL,
+    open FLOAT NOT NULL,
+    high FLOAT NOT NULL,
+    low FLOAT NOT NULL,
+    close FLOAT NOT NULL,
+    volume BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (symbol, interval, ts)
+);
+
 -- Indexes
 CREATE INDEX IF NOT EXISTS idx_trading_ideas_ticker ON trading_ideas(ticker);
-CREATE INDEX IF NOT EXISTS idx_trading_ideas_status ON trading_ideas(status);
-CREATE INDEX IF NOT EXISTS idx_reminders_time ON reminders(reminder_time);
-CREATE INDEX IF NOT EXISTS idx_reminders_active ON reminders(is_active);
+-- Keyset pagination of the list endpoints: filter columns, then the sort key
+CREATE INDEX IF NOT EXISTS idx_trading_ideas_created ON trading_ideas(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_trading_ideas_status_created ON trading_ideas(status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_trading_ideas_market_status_created
+    ON trading_ideas(market, status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reminders_time_id ON reminders(reminder_time, id);
+CREATE INDEX IF NOT EXISTS idx_reminders_active_time ON reminders(is_active, reminder_time, id);
+CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders(reminder_time)
+    WHERE is_active AND NOT is_triggered;
 CREATE INDEX IF NOT EXISTS idx_watchlist_ticker ON watchlist(ticker);
 
 -- Seed default features
@@ -4,7 +4,7 @@ import TradingDashboard from "./components/TradingDashboard/TradingDashboard";
 import TaskManager from "./components/TaskManager/TaskManager";
 import SentimentFeed from "./components/SentimentFeed/SentimentFeed";
 import ExpandableFeatures from "./components/ExpandableFeatures/ExpandableFeatures";
-import { marketApi } from "./services/api";
+import { marketApi, notificationsApi } from "./services/api";
 import type { MarketStatus } from "./types";
 
 export default function App() {
@@ -19,6 +19,17 @@ export default function App() {
     return () => clearInterval(interval);
   }, []);
 
+  // The iOS app hands over its APNs device token by dispatching an
+  // "apns-device-token" event (detail: the hex token) once it has one
+  useEffect(() => {
+    const onToken = (e: Event) => {
+      const token = (e as CustomEvent<string>).detail;
+      if (token) notificationsApi.registerDevice(token).catch(console.error);
+    };
+    window.addEventListener("apns-device-token", onToken);
+    return () => window.removeEventListener("apns-device-token", onToken);
+  }, []);
+
   return (
     <div className="app">
       <header className="app-header">
@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import { sentimentApi } from "../../services/api";
-import type { SentimentData, CombinedSentiment } from "../../types";
+import type { SentimentData, CombinedSentiment, TrendingTicker } from "../../types";
 
 interface Props {
   ticker: string;
@@ -11,7 +11,7 @@ export default function SentimentFeed({ ticker }: Props) {
   const [combined, setCombined] = useState<CombinedSentiment | null>(null);
   const [reddit, setReddit] = useState<SentimentData | null>(null);
   const [news, setNews] = useState<SentimentData | null>(null);
-  const [trending, setTrending] = useState<{ ticker: string; mentions: number }[]>([]);
+  const [trending, setTrending] = useState<TrendingTicker[]>([]);
   const [loading, setLoading] = useState(false);
 
   useEffect(() => {
@@ -171,7 +171,9 @@ export default function SentimentFeed({ ticker }: Props) {
           {trending.map((t, i) => (
             <div key={i} className="sentiment-item" style={{ display: "flex", justifyContent: "space-between" }}>
               <strong>{t.ticker}</strong>
-              <span style={{ color: "var(--text-secondary)" }}>{t.mentions} mentions</span>
+              <span style={{ color: "var(--text-secondary)" }}>
+                {t.mentions} mentions · {t.velocity >= 0 ? "+" : ""}{t.velocity}/h
+              </span>
             </div>
           ))}
           {trending.length === 0 && <div className="loading">No trending data available</div>}
@@ -6,6 +6,9 @@ export default function TaskManager() {
   const [tab, setTab] = useState<"ideas" | "reminders">("ideas");
   const [ideas, setIdeas] = useState<TradingIdea[]>([]);
   const [reminders, setReminders] = useState<Reminder[]>([]);
+  // Lists are paginated; null once the last page is loaded
+  const [ideasCursor, setIdeasCursor] = useState<string | null>(null);
+  const [remindersCursor, setRemindersCursor] = useState<string | null>(null);
   const [showIdeaForm, setShowIdeaForm] = useState(false);
   const [showReminderForm, setShowReminderForm] = useState(false);
 
@@ -22,9 +25,25 @@ export default function TaskManager() {
   });
 
   const fetchIdeas = () =>
-    tasksApi.listIdeas("all").then((d: any) => setIdeas(d.ideas || []));
+    tasksApi.listIdeas("all").then((d: any) => {
+      setIdeas(d.ideas || []);
+      setIdeasCursor(d.next_cursor ?? null);
+    });
   const fetchReminders = () =>
-    tasksApi.listReminders().then((d: any) => setReminders(d.reminders || []));
+    tasksApi.listReminders().then((d: any) => {
+      setReminders(d.reminders || []);
+      setRemindersCursor(d.next_cursor ?? null);
+    });
+  const moreIdeas = () =>
+    ideasCursor && tasksApi.listIdeas("all", ideasCursor).then((d: any) => {
+      setIdeas((prev) => [...prev, ...(d.ideas || [])]);
+      setIdeasCursor(d.next_cursor ?? null);
+    });
+  const moreReminders = () =>
+    remindersCursor && tasksApi.listReminders(remindersCursor).then((d: any) => {
+      setReminders((prev) => [...prev, ...(d.reminders || [])]);
+      setRemindersCursor(d.next_cursor ?? null);
+    });
 
   useEffect(() => {
     fetchIdeas();
@@ -85,10 +104,10 @@ export default function TaskManager() {
 
       <div className="tabs">
         <button className={`tab-btn ${tab === "ideas" ? "active" : ""}`} onClick={() => setTab("ideas")}>
-          Ideas ({ideas.length})
+          Ideas ({ideas.length}{ideasCursor ? "+" : ""})
         </button>
         <button className={`tab-btn ${tab === "reminders" ? "active" : ""}`} onClick={() => setTab("reminders")}>
-          Reminders ({reminders.length})
+          Reminders ({reminders.length}{remindersCursor ? "+" : ""})
         </button>
       </div>
 
@@ -178,6 +197,7 @@ export default function TaskManager() {
             </div>
           ))}
           {ideas.length === 0 && <div className="loading">No trading ideas yet</div>}
+          {ideasCursor && <button className="btn" onClick={moreIdeas}>Load more</button>}
         </div>
       )}
 
@@ -202,6 +222,7 @@ export default function TaskManager() {
             </div>
           ))}
           {reminders.length === 0 && <div className="loading">No reminders set</div>}
+          {remindersCursor && <button className="btn" onClick={moreReminders}>Load more</button>}
         </div>
       )}
     </div>
@@ -1,7 +1,7 @@
 import { useState, useEffect, useCallback } from "react";
 import { LineChart, Line, XAxis, YAxis, Tooltip, ResponsiveContainer } from "recharts";
 import { marketApi } from "../../services/api";
-import type { StockQuote, IntradayPoint, OptionsData } from "../../types";
+import type { StockQuote, BatchQuotes, IntradayPoint, IntradayColumns, OptionsData, OptionsFlow } from "../../types";
 
 interface Props {
   activeTicker: string;
@@ -15,6 +15,7 @@ export default function TradingDashboard({ activeTicker, onTickerChange }: Props
   const [quotes, setQuotes] = useState<Record<string, StockQuote>>({});
   const [intraday, setIntraday] = useState<IntradayPoint[]>([]);
   const [options, setOptions] = useState<OptionsData | null>(null);
+  const [flow, setFlow] = useState<OptionsFlow | null>(null);
   const [searchQuery, setSearchQuery] = useState("");
   const [market, setMarket] = useState<"US" | "IN">("US");
 
@@ -24,13 +25,11 @@ export default function TradingDashboard({ activeTicker, onTickerChange }: Props
       ? WATCHLIST.filter((t) => !t.includes(".BSE"))
       : WATCHLIST.filter((t) => t.includes(".BSE"));
 
-    for (const ticker of tickers) {
-      try {
-        const q = (await marketApi.getQuote(ticker, market)) as StockQuote;
-        setQuotes((prev) => ({ ...prev, [ticker]: q }));
-      } catch {
-        /* skip failed quotes */
-      }
+    try {
+      const res = (await marketApi.getQuotes(tickers, market)) as BatchQuotes;
+      setQuotes((prev) => ({ ...prev, ...res.quotes }));
+    } catch {
+      /* skip failed quotes */
     }
   }, [market]);
 
@@ -43,8 +42,16 @@ export default function TradingDashboard({ activeTicker, onTickerChange }: Props
   // Fetch chart data when active ticker or tab changes
   useEffect(() => {
     if (tab === "chart" && activeTicker) {
-      marketApi.getIntraday(activeTicker, "5min", market).then((data: any) => {
-        setIntraday(data?.data || []);
+      marketApi.getIntraday(activeTicker, "5min", market, "columns").then((data: any) => {
+        const cols: IntradayColumns | undefined = data?.columns;
+        setIntraday(cols ? cols.timestamp.map((ts, i) => ({
+          timestamp: new Date(ts * 1000).toISOString().slice(0, 19).replace("T", " "),
+          open: cols.open[i],
+          high: cols.high[i],
+          low: cols.low[i],
+          close: cols.close[i],
+          volume: cols.volume[i],
+        })) : []);
       }).catch(() => setIntraday([]));
     }
   }, [tab, activeTicker, market]);
@@ -52,9 +59,13 @@ export default function TradingDashboard({ activeTicker, onTickerChange }: Props
   // Fetch options data
   useEffect(() => {
     if (tab === "options" && activeTicker) {
-      marketApi.getOptions(activeTicker).then((data) => {
+      marketApi.getOptions(activeTicker, { strike_window: 0.05 }).then((data) => {
         setOptions(data as OptionsData);
       }).catch(() => setOptions(null));
+      // Not scanned yet, or options_flow disabled
+      marketApi.getOptionsFlow(activeTicker).then((data) => {
+        setFlow(data as OptionsFlow);
+      }).catch(() => setFlow(null));
     }
   }, [tab, activeTicker]);
 
@@ -148,7 +159,7 @@ export default function TradingDashboard({ activeTicker, onTickerChange }: Props
           </div>
           {intraday.length > 0 ? (
             <ResponsiveContainer width="100%" height={250}>
-              <LineChart data={[...intraday].reverse()}>
+              <LineChart data={intraday}>
                 <XAxis
                   dataKey="timestamp"
                   tick={{ fontSize: 10 }}
@@ -221,6 +232,41 @@ export default function TradingDashboard({ activeTicker, onTickerChange }: Props
           ) : (
             <div className="loading">No options data available</div>
           )}
+          {flow && flow.unusual.length > 0 && (
+            <>
+              <div style={{ fontSize: 14, margin: "16px 0 8px", fontWeight: 600 }}>
+                Unusual Activity
+              </div>
+              <table className="options-table">
+                <thead>
+                  <tr>
+                    <th>Type</th>
+                    <th>Strike</th>
+                    <th>Exp</th>
+                    <th>Vol/OI</th>
+                    <th>Vol</th>
+                    <th>New</th>
+                    <th>Premium</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {flow.unusual.slice(0, 10).map((c) => (
+                    <tr key={c.contract_id}>
+                      <td style={{ color: c.type === "call" ? "var(--green)" : "var(--red)" }}>
+                        {c.type.toUpperCase()}
+                      </td>
+                      <td>${c.strike}</td>
+                      <td>{c.expiration}</td>
+                      <td>{c.vol_oi_ratio.toFixed(1)}x</td>
+                      <td>{c.volume.toLocaleString()}</td>
+                      <td>{c.new_volume !== null ? c.new_volume.toLocaleString() : "-"}</td>
+                      <td>${Math.round(c.premium).toLocaleString()}</td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </>
+          )}
         </div>
       )}
     </div>
@@ -1,3 +1,5 @@
+import type { OptionsFilters } from "../types";
+
 const API_BASE = "/api";
 
 async function request<T>(path: string, options?: RequestInit): Promise<T> {
@@ -16,9 +18,20 @@ async function request<T>(path: string, options?: RequestInit): Promise<T> {
 export const marketApi = {
   getQuote: (ticker: string, market = "US") =>
     request(`/market/quote/${ticker}?market=${market}`),
-  getIntraday: (ticker: string, interval = "5min", market = "US") =>
-    request(`/market/intraday/${ticker}?interval=${interval}&market=${market}`),
-  getOptions: (ticker: string) => request(`/market/options/${ticker}`),
+  getQuotes: (tickers: string[], market = "US") =>
+    request(`/market/quotes?tickers=${tickers.join(",")}&market=${market}`),
+  getIntraday: (ticker: string, interval = "5min", market = "US", format = "rows") =>
+    request(`/market/intraday/${ticker}?interval=${interval}&market=${market}&format=${format}`),
+  getIndicators: (ticker: string, indicators: string[], interval = "5min", market = "US") =>
+    request(`/market/indicators/${ticker}?indicators=${indicators.join(",")}&interval=${interval}&market=${market}`),
+  getOptions: (ticker: string, filters: OptionsFilters = {}) => {
+    const params = new URLSearchParams(
+      Object.entries(filters).filter(([, v]) => v !== undefined).map(([k, v]) => [k, String(v)])
+    );
+    return request(`/market/options/${ticker}?${params}`);
+  },
+  getOptionsFlow: (ticker: string) => request(`/market/options-flow/${ticker}`),
+  getOptionsFlowOverview: () => request(`/market/options-flow`),
   search: (q: string) => request(`/market/search?q=${q}`),
   getMarketStatus: () => request(`/market/market-status`),
 };
@@ -28,26 +41,42 @@ export const sentimentApi = {
   getReddit: (ticker: string) => request(`/sentiment/reddit/${ticker}`),
   getNews: (ticker: string) => request(`/sentiment/news/${ticker}`),
   getCombined: (ticker: string) => request(`/sentiment/combined/${ticker}`),
-  getTrending: () => request(`/sentiment/trending`),
+  getTrending: (window = "24h") => request(`/sentiment/trending?window=${window}`),
 };
 
 // Tasks & Reminders
 export const tasksApi = {
-  listIdeas: (status = "active") => request(`/tasks/ideas?status=${status}`),
+  listIdeas: (status = "active", cursor?: string) =>
+    request(`/tasks/ideas?status=${status}${cursor ? `&cursor=${cursor}` : ""}`),
   createIdea: (data: Record<string, unknown>) =>
     request(`/tasks/ideas`, { method: "POST", body: JSON.stringify(data) }),
   updateIdea: (id: number, data: Record<string, unknown>) =>
     request(`/tasks/ideas/${id}`, { method: "PUT", body: JSON.stringify(data) }),
   deleteIdea: (id: number) =>
     request(`/tasks/ideas/${id}`, { method: "DELETE" }),
+  bulkCreateIdeas: (ideas: Record<string, unknown>[], atomic = false) =>
+    request(`/tasks/ideas/bulk`, { method: "POST", body: JSON.stringify({ ideas, atomic }) }),
+  bulkUpdateIdeas: (ideas: Record<string, unknown>[], atomic = false) =>
+    request(`/tasks/ideas/bulk`, { method: "PATCH", body: JSON.stringify({ ideas, atomic }) }),
+  bulkDeleteIdeas: (ids: number[]) =>
+    request(`/tasks/ideas/bulk`, { method: "DELETE", body: JSON.stringify({ ids }) }),
+  backtestIdeas: (data: Record<string, unknown> = {}) =>
+    request(`/tasks/ideas/backtest`, { method: "POST", body: JSON.stringify(data) }),
 
-  listReminders: () => request(`/tasks/reminders`),
+  listReminders: (cursor?: string) =>
+    request(`/tasks/reminders${cursor ? `?cursor=${cursor}` : ""}`),
   createReminder: (data: Record<string, unknown>) =>
     request(`/tasks/reminders`, { method: "POST", body: JSON.stringify(data) }),
   updateReminder: (id: number, data: Record<string, unknown>) =>
     request(`/tasks/reminders/${id}`, { method: "PUT", body: JSON.stringify(data) }),
   deleteReminder: (id: number) =>
     request(`/tasks/reminders/${id}`, { method: "DELETE" }),
+  bulkCreateReminders: (reminders: Record<string, unknown>[], atomic = false) =>
+    request(`/tasks/reminders/bulk`, { method: "POST", body: JSON.stringify({ reminders, atomic }) }),
+  bulkUpdateReminders: (reminders: Record<string, unknown>[], atomic = false) =>
+    request(`/tasks/reminders/bulk`, { method: "PATCH", body: JSON.stringify({ reminders, atomic }) }),
+  bulkDeleteReminders: (ids: number[]) =>
+    request(`/tasks/reminders/bulk`, { method: "DELETE", body: JSON.stringify({ ids }) }),
 };
 
 // Voice
@@ -72,3 +101,12 @@ export const featuresApi = {
   add: (data: Record<string, unknown>) =>
     request(`/features/`, { method: "POST", body: JSON.stringify(data) }),
 };
+
+// Push notifications (APNs device tokens from the iOS app)
+export const notificationsApi = {
+  listDevices: () => request(`/notifications/devices`),
+  registerDevice: (token: string) =>
+    request(`/notifications/devices`, { method: "POST", body: JSON.stringify({ token }) }),
+  unregisterDevice: (token: string) =>
+    request(`/notifications/devices/${token}`, { method: "DELETE" }),
+};
@@ -14,6 +14,11 @@ export interface StockQuote {
   timestamp: string;
 }
 
+export interface BatchQuotes {
+  quotes: Record<string, StockQuote>;
+  errors: Record<string, string>;
+}
+
 export interface IntradayPoint {
   timestamp: string;
   open: number;
@@ -23,15 +28,41 @@ export interface IntradayPoint {
   volume: number;
 }
 
+// Intraday bars as parallel arrays, oldest first (?format=columns)
+export interface IntradayColumns {
+  timestamp: number[]; // exchange-local time as epoch seconds
+  open: number[];
+  high: number[];
+  low: number[];
+  close: number[];
+  volume: number[];
+}
+
 export interface OptionsData {
   ticker: string;
+  spot: number | null;
+  expirations: string[]; // every expiration in the chain
+  count: number; // contracts matching the filters
   calls: OptionEntry[];
   puts: OptionEntry[];
-  total_call_volume: number;
+  total_call_volume: number; // whole chain
   total_put_volume: number;
 }
 
+export interface OptionsFilters {
+  expiration_from?: string;
+  expiration_to?: string;
+  strike_window?: number; // fraction of spot
+  min_strike?: number;
+  max_strike?: number;
+  min_volume?: number;
+  min_open_interest?: number;
+  side?: "call" | "put";
+  format?: "rows" | "columns";
+}
+
 export interface OptionEntry {
+  contract_id: string;
   strike: number;
   expiration: string;
   last_price: number;
@@ -42,6 +73,56 @@ export interface OptionEntry {
   implied_volatility: number;
 }
 
+// Precomputed by the scheduled options flow scan
+export interface OptionsFlow {
+  ticker: string;
+  as_of: string;
+  previous_as_of: string | null;
+  spot: number | null;
+  contracts: number;
+  totals: {
+    call_volume: number;
+    put_volume: number;
+    call_premium: number;
+    put_premium: number;
+    new_call_volume: number | null; // null until there is a previous snapshot
+    new_put_volume: number | null;
+    put_call_ratio: number | null;
+    put_call_premium_ratio: number | null;
+  };
+  expirations: ExpirationFlow[];
+  unusual: FlowContract[];
+  blocks: FlowContract[];
+}
+
+export interface ExpirationFlow {
+  expiration: string;
+  call_volume: number;
+  put_volume: number;
+  put_call_ratio: number | null;
+  call_open_interest: number;
+  put_open_interest: number;
+  put_call_oi_ratio: number | null;
+  put_call_premium_ratio: number | null;
+  atm_iv: number | null;
+  put_skew: number | null;
+}
+
+export interface FlowContract {
+  contract_id: string;
+  type: "call" | "put";
+  strike: number;
+  expiration: string;
+  volume: number;
+  open_interest: number;
+  vol_oi_ratio: number;
+  implied_volatility: number;
+  mid: number;
+  premium: number;
+  new_volume: number | null;
+  new_premium: number | null;
+}
+
 // Trading Ideas
 export interface TradingIdea {
   id: number;
@@ -82,6 +163,20 @@ export interface SentimentData {
   sentiment_label: "bullish" | "bearish" | "neutral";
   posts?: RedditPost[];
   articles?: NewsArticle[];
+  sources?: Record<string, SourceStatus>;
+}
+
+export interface TrendingTicker {
+  ticker: string;
+  mentions: number;
+  previous_mentions: number;
+  velocity: number;
+}
+
+export interface SourceStatus {
+  status: "ok" | "timeout" | "error" | "unavailable";
+  post_count?: number;
+  error?: string;
 }
 
 export interface RedditPost {